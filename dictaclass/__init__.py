@@ -1,4 +1,21 @@
 from dictaclass.dictaclass import (
     to_dataclass,
+    to_dataclasses,
     dataclass_to_dict,
+    clear_cache,
+    compile_decoder,
+    Packed,
+    slotted,
+    InternPool,
+    DecoderStats,
+    collect_stats,
+    register_union,
+    UNSELECTED,
 )
+from dictaclass.stream import iter_json
+from dictaclass.parallel import parallel_to_dataclass, parallel_to_dataclasses
+from dictaclass.columns import Columns, to_columns
+from dictaclass.parser import from_json
+from dictaclass.warmup import warmup
+from dictaclass.binary import dumps_binary, loads_binary
+from dictaclass.store import RecordStore
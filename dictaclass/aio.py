@@ -0,0 +1,280 @@
+"""
+asyncio API: decoding without blocking the event loop for long.
+
+Large conversions either run in an executor (`ato_dataclass`), or are split in
+batches with the control returned to the event loop between them
+(`ato_dataclasses`, `aiter_ndjson`).
+"""
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+import asyncio
+import contextvars
+import functools
+import json
+
+from dictaclass.dictaclass import _intern_pool, compile_decoder, to_dataclass
+
+T = TypeVar("T")
+
+_ExtraField = Tuple[Type[Any], str, Any]
+
+
+async def _run_in_executor(
+    executor: Optional[Executor],
+    function: Callable[[], T],
+) -> T:
+    if executor is None or isinstance(executor, ThreadPoolExecutor):
+        # NOTE(braynstorm):
+        #   Like `asyncio.to_thread` - the conversion runs in the context of
+        #   the task, so it is recorded by its `collect_stats()` block.
+        function = functools.partial(contextvars.copy_context().run, function)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, function)
+
+
+def _batch_decoder(
+    dataclass_type: Type[T],
+    key_transformer: Optional[Callable[[str], str]],
+    on_extra_field: Optional[Callable[[Type, str, Any], None]],
+    implicit_optional: bool,
+    kwargs: Dict[str, Any],
+) -> Callable[[Any], T]:
+    """
+    `compile_decoder`, but with `intern=True` every call shares the same pool
+    (like the items of `to_dataclasses`), instead of getting a new one.
+    """
+    if kwargs.get("intern") is True:
+        kwargs = dict(kwargs, intern=_intern_pool(True))
+    return compile_decoder(
+        dataclass_type, key_transformer, on_extra_field, implicit_optional, **kwargs
+    )
+
+
+def _decode_batch(
+    dataclass_type: Type[T],
+    key_transformer: Optional[Callable[[str], str]],
+    record_extras: bool,
+    implicit_optional: bool,
+    kwargs: Dict[str, Any],
+    batch: List[Any],
+) -> Tuple[List[T], List[_ExtraField]]:
+    """
+    Runs in the executor (possibly in another process - everything is passed
+    as picklable arguments). The extra fields are returned, to be reported in
+    the event loop.
+    """
+    extras: List[_ExtraField] = []
+    decoder = _batch_decoder(
+        dataclass_type,
+        key_transformer,
+        (lambda *args: extras.append(args)) if record_extras else None,
+        implicit_optional,
+        kwargs,
+    )
+    return [decoder(item) for item in batch], extras
+
+
+async def ato_dataclass(
+    dataclass_type: Type[T],
+    data: Any,
+    key_transformer: Optional[Callable[[str], str]] = None,
+    on_extra_field: Optional[Callable[[Type, str, Any], None]] = None,
+    implicit_optional: bool = False,
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> T:
+    """
+    `to_dataclass` in an executor, so the event loop keeps running while
+    a large document is decoded.
+
+    >>> order = await ato_dataclass(Order, await response.json())
+
+    Args:
+        dataclass_type, data, key_transformer, on_extra_field, implicit_optional:
+            See `to_dataclass`.
+        executor (Executor | None, optional):
+            Where to run the conversion. Defaults to the default executor of
+            the loop (a thread pool). `on_extra_field` is called there.
+        **kwargs: The other arguments of `to_dataclass` (`trusted`, `slots`...).
+    Returns:
+        T: The decoded dataclass.
+    """
+    convert = functools.partial(
+        to_dataclass,
+        dataclass_type,
+        data,
+        key_transformer,
+        on_extra_field,
+        implicit_optional,
+        **kwargs,
+    )
+    return await _run_in_executor(executor, convert)
+
+
+async def ato_dataclasses(
+    dataclass_type: Type[T],
+    items: Any,
+    key_transformer: Optional[Callable[[str], str]] = None,
+    on_extra_field: Optional[Callable[[Type, str, Any], None]] = None,
+    implicit_optional: bool = False,
+    batch_size: int = 1000,
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> List[T]:
+    """
+    `to_dataclasses`, returning control to the event loop after every
+    `batch_size` items (or decoding the batches in `executor`, if set).
+
+    Args:
+        dataclass_type, items, key_transformer, on_extra_field, implicit_optional:
+            See `to_dataclasses`.
+        batch_size (int, optional):
+            Number of items decoded without returning to the event loop.
+        executor (Executor | None, optional):
+            Decode the batches in this executor (a thread or a process pool),
+            one at a time. `on_extra_field` is still called in the event
+            loop, after every batch. With a process pool, `dataclass_type`,
+            `key_transformer` and `**kwargs` must be picklable.
+        **kwargs: The other arguments of `compile_decoder` (`trusted`, ...).
+            With `intern=True`, all the items share the same pool (or the
+            items of each batch, with an executor).
+    Returns:
+        List[T]: The decoded items, in order.
+    """
+    if not isinstance(items, list):
+        items = list(items)
+
+    decoded: List[T] = []
+    if executor is None:
+        decoder = _batch_decoder(
+            dataclass_type, key_transformer, on_extra_field, implicit_optional, kwargs
+        )
+        for start in range(0, len(items), batch_size):
+            decoded += [decoder(item) for item in items[start : start + batch_size]]
+            await asyncio.sleep(0)
+        return decoded
+
+    for start in range(0, len(items), batch_size):
+        batch, extras = await _run_in_executor(
+            executor,
+            functools.partial(
+                _decode_batch,
+                dataclass_type,
+                key_transformer,
+                on_extra_field is not None,
+                implicit_optional,
+                kwargs,
+                items[start : start + batch_size],
+            ),
+        )
+        decoded += batch
+        if on_extra_field is not None:
+            for extra in extras:
+                on_extra_field(*extra)
+    return decoded
+
+
+class _AsyncChunks:
+    """
+    Adapts an object with an `async read(n)` method to an async iterable
+    of chunks.
+    """
+
+    def __init__(self, source: Any, chunk_size: int) -> None:
+        self.source = source
+        self.chunk_size = chunk_size
+
+    def __aiter__(self) -> "_AsyncChunks":
+        return self
+
+    async def __anext__(self) -> bytes:
+        chunk = await self.source.read(self.chunk_size)
+        if not chunk:
+            raise StopAsyncIteration
+        return chunk
+
+
+async def aiter_ndjson(
+    dataclass_type: Type[T],
+    source: Union[AsyncIterable[bytes], Any],
+    key_transformer: Optional[Callable[[str], str]] = None,
+    on_extra_field: Optional[Callable[[Type, str, Any], None]] = None,
+    implicit_optional: bool = False,
+    yield_every: int = 100,
+    chunk_size: int = 1 << 16,
+    **kwargs: Any,
+) -> AsyncIterator[T]:
+    """
+    Decode newline-delimited JSON from an async byte stream, one record at
+    a time.
+
+    >>> async with session.get(url) as response:
+    >>>     async for event in aiter_ndjson(Event, response.content):
+    >>>         ...
+
+    Args:
+        dataclass_type (Type[T]): The type of every record.
+        source (AsyncIterable[bytes] | StreamReader):
+            An async iterable of utf-8 chunks (of any size, not necessarily
+            whole lines), or an object with an `async read(n)` method
+            (`asyncio.StreamReader`, aiohttp's `StreamReader`...).
+        key_transformer, on_extra_field, implicit_optional:
+            See `to_dataclass`.
+        yield_every (int, optional):
+            Return control to the event loop after every `yield_every`
+            records (it also gets it back while waiting for the next chunk).
+        chunk_size (int, optional): Bytes per `read(n)` call.
+        **kwargs: The other arguments of `compile_decoder` (`trusted`, ...).
+            With `intern=True`, all the records share the same pool.
+    Returns:
+        AsyncIterator[T]: The decoded records, in order.
+    """
+    decoder = _batch_decoder(
+        dataclass_type, key_transformer, on_extra_field, implicit_optional, kwargs
+    )
+
+    if hasattr(source, "read"):
+        chunks: AsyncIterable[bytes] = _AsyncChunks(source, chunk_size)
+    else:
+        chunks = source
+
+    # NOTE(braynstorm):
+    #   The start of an unfinished line, possibly in many chunks.
+    pending: List[bytes] = []
+    decoded = 0
+    async for chunk in chunks:
+        end = chunk.find(b"\n")
+        if end == -1:
+            pending.append(chunk)
+            continue
+
+        pending.append(chunk[:end])
+        lines = chunk[end + 1 :].split(b"\n")
+        lines[0:0] = [b"".join(pending)]
+        pending = [lines.pop()]
+        for line in lines:
+            if not line.strip():
+                continue
+
+            yield decoder(json.loads(line))
+            decoded += 1
+            if decoded % yield_every == 0:
+                await asyncio.sleep(0)
+
+    line = b"".join(pending)
+    if line.strip():
+        yield decoder(json.loads(line))
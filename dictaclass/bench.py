@@ -0,0 +1,678 @@
+"""
+Benchmarks for dictaclass.
+
+    python -m dictaclass.bench [--records N] [--repeat R] [--startup]
+        [--parallel [--workers N]]
+        [--width W] [--depth D] [--size S] [--schema NAME ...]
+        [--output results.json] [--compare baseline.json]
+
+Every schema is generated from `--width` (scalar fields per dataclass),
+`--depth` (levels of nesting / inheritance) and `--size` (items per
+list/set/dict), and its payloads are generated from a fixed seed, so two runs
+with the same arguments decode exactly the same data.
+"""
+from dataclasses import dataclass, make_dataclass
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Type
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from dictaclass import (
+    dataclass_to_dict,
+    dumps_binary,
+    loads_binary,
+    parallel_to_dataclasses,
+    to_dataclass,
+    to_dataclasses,
+)
+
+
+@dataclass(frozen=True)
+class _Point:
+    x: int
+    y: int
+
+
+@dataclass
+class _Tree:
+    id: int
+    name: str
+    children: List["_Tree"]
+
+
+@dataclass(frozen=True)
+class _Record:
+    id: int
+    name: str
+    score: float
+    note: Optional[str]
+    origin: _Point
+
+
+def _records(count: int) -> List[Dict[str, Any]]:
+    return [
+        dict(
+            id=i,
+            name=f"record-{i}",
+            score=i / 7,
+            note=None if i % 3 else "note",
+            origin=dict(x=i, y=-i),
+        )
+        for i in range(count)
+    ]
+
+
+def _best_of(repeat: int, function: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_batch(records: int, repeat: int) -> Dict[str, float]:
+    """
+    Per-record time (in seconds) of `to_dataclass` in a loop vs `to_dataclasses`.
+    """
+    data = _records(records)
+    results = dict(
+        to_dataclass_loop=_best_of(
+            repeat, lambda: [to_dataclass(_Record, item) for item in data]
+        ),
+        to_dataclasses=_best_of(repeat, lambda: to_dataclasses(_Record, data)),
+        to_dataclasses_generator=_best_of(
+            repeat, lambda: list(to_dataclasses(_Record, data, generator=True))
+        ),
+    )
+    return {name: seconds / records for name, seconds in results.items()}
+
+
+def _retained_bytes(function: Callable[[], Any]) -> int:
+    """
+    Memory held by the result of `function`.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained
+
+
+def _peak_bytes(function: Callable[[], Any]) -> int:
+    """
+    Highest memory usage while `function` runs (including its result).
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def bench_slots(records: int) -> Dict[str, float]:
+    """
+    Per-record memory (in bytes) of regular vs `slots=True` dataclasses.
+    """
+    data = _records(records)
+    results = dict(
+        dataclass=_retained_bytes(lambda: to_dataclasses(_Record, data)),
+        slotted=_retained_bytes(lambda: to_dataclasses(_Record, data, slots=True)),
+    )
+    return {name: size / records for name, size in results.items()}
+
+
+@dataclass
+class _Node:
+    value: int
+    next: Optional["_Node"]
+
+
+def bench_depth(
+    depths: List[int], repeat: int
+) -> Dict[int, Dict[str, Optional[float]]]:
+    """
+    Time (in seconds) of decoding a linked list of `depth` nodes with the
+    generated (recursive) vs the iterative decoder. None when the recursive
+    decoder hits the recursion limit.
+    """
+    results: Dict[int, Dict[str, Optional[float]]] = dict()
+    for depth in depths:
+        data: Optional[Dict[str, Any]] = None
+        for value in range(depth):
+            data = dict(value=value, next=data)
+
+        try:
+            recursive: Optional[float] = _best_of(
+                repeat, lambda: to_dataclass(_Node, data)
+            )
+        except RecursionError:
+            recursive = None
+        results[depth] = dict(
+            recursive=recursive,
+            iterative=_best_of(
+                repeat, lambda: to_dataclass(_Node, data, iterative=True)
+            ),
+        )
+    return results
+
+
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import dictaclass
+imported = time.perf_counter()
+from dictaclass.bench import _Record, _Tree, _records
+record, tree = _records(1)[0], dict(id=0, name="root", children=[])
+called = time.perf_counter()
+if sys.argv[1]:
+    dictaclass.warmup(_Record, _Tree, cache_file=sys.argv[1])
+dictaclass.to_dataclass(_Record, record)
+dictaclass.to_dataclass(_Tree, tree)
+done = time.perf_counter()
+times = dict(import_seconds=imported - start, first_call_seconds=done - called)
+print(json.dumps(times))
+"""
+
+
+def _startup(cache_file: str) -> Dict[str, float]:
+    environment = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [package_root, environment.get("PYTHONPATH")])
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SCRIPT, cache_file],
+        check=True,
+        stdout=subprocess.PIPE,
+        env=environment,
+    ).stdout
+    return json.loads(output)
+
+
+def bench_startup(repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time (in seconds) of `import dictaclass` and of the first decoding calls
+    in a new process: without preparation (cold), and with
+    `warmup(..., cache_file=...)` loading a cache file written by a previous
+    process (cached). Best of `repeat` processes each.
+    """
+    results: Dict[str, Dict[str, float]] = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        cache_file = os.path.join(directory, "schemas.dictaclass")
+        _startup(cache_file)
+
+        for name, argument in (("cold", ""), ("cached", cache_file)):
+            runs = [_startup(argument) for _ in range(repeat)]
+            results[name] = {
+                measure: min(run[measure] for run in runs) for measure in runs[0]
+            }
+    return results
+
+
+def _best_cpu_of(repeat: int, function: Callable[[], Any]) -> float:
+    """
+    Like `_best_of`, but the CPU time of this process only (not of the
+    worker processes, nor the time spent waiting for them).
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        function()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def bench_parallel(records: int, workers: int, repeat: int) -> Dict[str, float]:
+    """
+    Per-record time (in seconds) of `to_dataclasses` vs
+    `parallel_to_dataclasses` with `workers` processes, from parsed dicts and
+    from lines of JSON (`parse_json=True`).
+
+    The `*_parent` measures are the CPU time of this process alone during the
+    parallel calls: the work that does not scale with `workers`.
+    """
+    data = _records(records)
+    lines = [json.dumps(item) for item in data]
+
+    def parallel() -> Any:
+        return parallel_to_dataclasses(_Record, data, workers=workers)
+
+    def parallel_json() -> Any:
+        return parallel_to_dataclasses(
+            _Record, lines, workers=workers, parse_json=True
+        )
+
+    results = dict(
+        serial=_best_of(repeat, lambda: to_dataclasses(_Record, data)),
+        parallel=_best_of(repeat, parallel),
+        parallel_parent=_best_cpu_of(repeat, parallel),
+        serial_json=_best_of(
+            repeat,
+            lambda: to_dataclasses(_Record, [json.loads(line) for line in lines]),
+        ),
+        parallel_json=_best_of(repeat, parallel_json),
+        parallel_json_parent=_best_cpu_of(repeat, parallel_json),
+    )
+    return {name: seconds / records for name, seconds in results.items()}
+
+
+# ---------------------------------------------------------------------------
+# Synthetic schemas and payloads
+# ---------------------------------------------------------------------------
+
+_SCALARS: Tuple[Type[Any], ...] = (int, str, float, bool)
+
+
+class Schema(NamedTuple):
+    """
+    A generated dataclass type and a function generating one of its payloads.
+    """
+
+    dataclass_type: Type[Any]
+    generate: Callable[[random.Random], Dict[str, Any]]
+
+
+def _scalar(value_type: Type[Any], rng: random.Random) -> Any:
+    if value_type is int:
+        return rng.randrange(-(1 << 31), 1 << 31)
+    if value_type is float:
+        return rng.random() * 1000
+    if value_type is bool:
+        return rng.random() < 0.5
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(8))
+
+
+def _scalar_fields(width: int, prefix: str) -> List[Tuple[str, Type[Any]]]:
+    return [(f"{prefix}{i}", _SCALARS[i % len(_SCALARS)]) for i in range(width)]
+
+
+def _scalar_payload(
+    scalar_fields: List[Tuple[str, Type[Any]]],
+    rng: random.Random,
+) -> Dict[str, Any]:
+    return {name: _scalar(value_type, rng) for name, value_type in scalar_fields}
+
+
+def flat_schema(width: int, depth: int, size: int) -> Schema:
+    """
+    `width` scalar fields.
+    """
+    scalar_fields = _scalar_fields(width, "f")
+    dataclass_type = make_dataclass("Flat", scalar_fields, frozen=True)
+    return Schema(dataclass_type, lambda rng: _scalar_payload(scalar_fields, rng))
+
+
+def nested_schema(width: int, depth: int, size: int) -> Schema:
+    """
+    `depth` levels of dataclasses with `width` scalar fields each. Every level
+    holds the next one, the deepest level holds a list of `size` leaves.
+    """
+    scalar_fields = _scalar_fields(width, "f")
+    leaf = make_dataclass("Leaf", scalar_fields, frozen=True)
+
+    def generate_leaf(rng: random.Random) -> Dict[str, Any]:
+        return _scalar_payload(scalar_fields, rng)
+
+    dataclass_type = make_dataclass(
+        f"Level{depth}", scalar_fields + [("items", List[leaf])]  # type: ignore
+    )
+
+    def generate_deepest(rng: random.Random) -> Dict[str, Any]:
+        payload = _scalar_payload(scalar_fields, rng)
+        payload["items"] = [generate_leaf(rng) for _ in range(size)]
+        return payload
+
+    generate = generate_deepest
+    for level in range(depth - 1, 0, -1):
+        dataclass_type = make_dataclass(
+            f"Level{level}", scalar_fields + [("child", dataclass_type)]
+        )
+
+        def generate_level(
+            rng: random.Random,
+            generate_child: Callable[[random.Random], Dict[str, Any]] = generate,
+        ) -> Dict[str, Any]:
+            payload = _scalar_payload(scalar_fields, rng)
+            payload["child"] = generate_child(rng)
+            return payload
+
+        generate = generate_level
+
+    return Schema(dataclass_type, generate)
+
+
+def inherited_schema(width: int, depth: int, size: int) -> Schema:
+    """
+    A chain of `depth` dataclasses, each inheriting from the previous one and
+    adding `width` scalar fields.
+    """
+    scalar_fields: List[Tuple[str, Type[Any]]] = []
+    dataclass_type: Optional[Type[Any]] = None
+    for level in range(depth):
+        own_fields = _scalar_fields(width, f"l{level}_")
+        scalar_fields += own_fields
+        bases = () if dataclass_type is None else (dataclass_type,)
+        dataclass_type = make_dataclass(f"Derived{level}", own_fields, bases=bases)
+
+    assert dataclass_type is not None
+    return Schema(dataclass_type, lambda rng: _scalar_payload(scalar_fields, rng))
+
+
+def optional_schema(width: int, depth: int, size: int) -> Schema:
+    """
+    `width` Optional scalar fields (half of the values are None) and an
+    Optional nested dataclass.
+    """
+    scalar_fields = _scalar_fields(width, "f")
+    inner = make_dataclass(
+        "Inner", [(name, Optional[t]) for name, t in scalar_fields]  # type: ignore
+    )
+    dataclass_type = make_dataclass(
+        "Sparse",
+        [(name, Optional[t]) for name, t in scalar_fields]  # type: ignore
+        + [("inner", Optional[inner])],  # type: ignore
+    )
+
+    def generate_sparse(rng: random.Random) -> Dict[str, Any]:
+        payload = {
+            name: _scalar(t, rng) if rng.random() < 0.5 else None
+            for name, t in scalar_fields
+        }
+        payload["inner"] = None
+        if rng.random() < 0.5:
+            payload["inner"] = {
+                name: _scalar(t, rng) if rng.random() < 0.5 else None
+                for name, t in scalar_fields
+            }
+        return payload
+
+    return Schema(dataclass_type, generate_sparse)
+
+
+def collections_schema(width: int, depth: int, size: int) -> Schema:
+    """
+    `width` scalar fields and sets/dicts/lists of `size` items each.
+    """
+    scalar_fields = _scalar_fields(width, "f")
+    dataclass_type = make_dataclass(
+        "Collections",
+        scalar_fields
+        + [
+            ("tags", Set[str]),
+            ("points", Set[_Point]),
+            ("scores", Dict[str, float]),
+            ("by_name", Dict[str, _Point]),
+            ("values", List[int]),
+        ],  # type: ignore
+    )
+
+    def generate_collections(rng: random.Random) -> Dict[str, Any]:
+        payload = _scalar_payload(scalar_fields, rng)
+        payload["tags"] = [_scalar(str, rng) for _ in range(size)]
+        payload["points"] = [
+            dict(x=rng.randrange(1 << 16), y=rng.randrange(1 << 16))
+            for _ in range(size)
+        ]
+        payload["scores"] = {_scalar(str, rng): rng.random() for _ in range(size)}
+        payload["by_name"] = {
+            _scalar(str, rng): dict(x=rng.randrange(1 << 16), y=rng.randrange(1 << 16))
+            for _ in range(size)
+        }
+        payload["values"] = [rng.randrange(1 << 31) for _ in range(size)]
+        return payload
+
+    return Schema(dataclass_type, generate_collections)
+
+
+def tree_schema(width: int, depth: int, size: int) -> Schema:
+    """
+    A recursive tree `depth` levels deep: every node has `size` leaves and
+    (above the last level) one more child node. `width` is not used.
+    """
+
+    def generate_tree(rng: random.Random, level: int = 1) -> Dict[str, Any]:
+        children = [
+            dict(id=rng.randrange(1 << 31), name=_scalar(str, rng), children=[])
+            for _ in range(size)
+        ]
+        if level < depth:
+            children.append(generate_tree(rng, level + 1))
+        return dict(
+            id=rng.randrange(1 << 31), name=_scalar(str, rng), children=children
+        )
+
+    return Schema(_Tree, generate_tree)
+
+
+SCHEMAS: Dict[str, Callable[[int, int, int], Schema]] = dict(
+    flat=flat_schema,
+    nested=nested_schema,
+    inherited=inherited_schema,
+    optional=optional_schema,
+    collections=collections_schema,
+    tree=tree_schema,
+)
+
+
+def payloads(schema: Schema, records: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    `records` payloads of `schema`, always the same ones for the same `seed`.
+    """
+    rng = random.Random(seed)
+    return [schema.generate(rng) for _ in range(records)]
+
+
+def _measure(
+    records: int,
+    repeat: int,
+    function: Callable[[], Any],
+) -> Dict[str, float]:
+    seconds = _best_of(repeat, function)
+    return dict(
+        records_per_second=records / seconds if seconds else float("inf"),
+        seconds_per_record=seconds / records,
+        peak_bytes=_peak_bytes(function),
+    )
+
+
+def bench_schema(
+    schema: Schema,
+    records: int,
+    repeat: int,
+    seed: int = 0,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Throughput, per-record latency and peak memory of decoding (`to_dataclasses`,
+    with the generated and the iterative decoders), encoding
+    (`dataclass_to_dict`) and round-tripping through JSON vs the binary format
+    (`dumps_binary`/`loads_binary`, with their `bytes_per_record`) `records`
+    payloads of `schema`.
+    """
+    dataclass_type = schema.dataclass_type
+    data = payloads(schema, records, seed)
+    objects = to_dataclasses(dataclass_type, data)
+
+    def json_round_trip() -> List[Any]:
+        return [
+            to_dataclass(dataclass_type, json.loads(json.dumps(dataclass_to_dict(o))))
+            for o in objects
+        ]
+
+    def binary_round_trip() -> List[Any]:
+        return [loads_binary(dataclass_type, dumps_binary(o)) for o in objects]
+
+    json_bytes = sum(len(json.dumps(dataclass_to_dict(o))) for o in objects)
+    binary_bytes = sum(len(dumps_binary(o)) for o in objects)
+    return dict(
+        json_round_trip=dict(
+            _measure(records, repeat, json_round_trip),
+            bytes_per_record=json_bytes / records,
+        ),
+        binary_round_trip=dict(
+            _measure(records, repeat, binary_round_trip),
+            bytes_per_record=binary_bytes / records,
+        ),
+        decode=_measure(records, repeat, lambda: to_dataclasses(dataclass_type, data)),
+        decode_iterative=_measure(
+            records,
+            repeat,
+            lambda: to_dataclasses(dataclass_type, data, iterative=True),
+        ),
+        encode=_measure(
+            records, repeat, lambda: [dataclass_to_dict(o) for o in objects]
+        ),
+    )
+
+
+def run_suite(
+    schemas: List[str],
+    records: int,
+    repeat: int,
+    width: int,
+    depth: int,
+    size: int,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Run `bench_schema` for each schema in `schemas` (names from `SCHEMAS`).
+    Returns the JSON-serializable results, including the parameters.
+    """
+    results: Dict[str, Any] = dict()
+    for name in schemas:
+        schema = SCHEMAS[name](width, depth, size)
+        results[name] = bench_schema(schema, records, repeat, seed)
+
+    return dict(
+        parameters=dict(
+            records=records,
+            repeat=repeat,
+            width=width,
+            depth=depth,
+            size=size,
+            seed=seed,
+        ),
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        results=results,
+    )
+
+
+def _print_results(
+    results: Dict[str, Any],
+    baseline: Optional[Dict[str, Any]] = None,
+) -> None:
+    for name, operations in results["results"].items():
+        for operation, measured in operations.items():
+            line = (
+                f"{name + '.' + operation:<28}"
+                f" {measured['records_per_second']:12.0f} records/s"
+                f" {measured['seconds_per_record'] * 1e9:10.1f} ns/record"
+                f" {measured['peak_bytes'] / 1024:10.1f} KiB peak"
+            )
+            if "bytes_per_record" in measured:
+                line += f" {measured['bytes_per_record']:8.1f} bytes/record"
+            if baseline is not None:
+                before = baseline["results"].get(name, {}).get(operation)
+                if before is not None:
+                    speedup = (
+                        before["seconds_per_record"] / measured["seconds_per_record"]
+                    )
+                    line += f" {speedup:6.2f}x vs baseline"
+            print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m dictaclass.bench")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--schema",
+        action="append",
+        choices=sorted(SCHEMAS),
+        help="Schema to benchmark (can be repeated). Defaults to all of them.",
+    )
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument("--compare", help="JSON file of a previous run.")
+    parser.add_argument(
+        "--startup",
+        action="store_true",
+        help="Only measure the import and first-call times in new processes.",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Only measure parallel_to_dataclasses vs to_dataclasses.",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        for name, measured in bench_startup(args.repeat).items():
+            for measure, seconds in measured.items():
+                print(f"{name + '.' + measure:<28} {seconds * 1e3:10.2f} ms")
+        return
+
+    if args.parallel:
+        measured = bench_parallel(args.records, args.workers, args.repeat)
+        for name, seconds in measured.items():
+            print(f"{name:<28} {seconds * 1e9:10.1f} ns/record")
+        return
+
+    for name, seconds in bench_batch(args.records, args.repeat).items():
+        print(f"{name:<28} {seconds * 1e9:10.1f} ns/record")
+
+    for name, size in bench_slots(args.records).items():
+        print(f"{name:<28} {size:10.1f} bytes/record")
+
+    for depth, engines in bench_depth([10, 100, 500, 10_000], args.repeat).items():
+        for engine, elapsed in engines.items():
+            name = f"depth{depth}.{engine}"
+            if elapsed is None:
+                print(f"{name:<28} {'RecursionError':>10}")
+            else:
+                print(f"{name:<28} {elapsed * 1e9 / depth:10.1f} ns/node")
+
+    results = run_suite(
+        args.schema or list(SCHEMAS),
+        args.records,
+        args.repeat,
+        args.width,
+        args.depth,
+        args.size,
+        args.seed,
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+    _print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,640 @@
+"""
+Compact binary serialization driven by the dataclass schema.
+
+`dumps_binary(obj)` writes the init fields of `obj` positionally - no field
+names - and `loads_binary(T, buffer)` reads them back, so the format is only
+readable with the same schema. Every buffer starts with a header holding a
+fingerprint of the schema (field names, types and nesting of every dataclass
+involved), checked by `loads_binary`.
+
+Encoding of the values:
+    - runs of consecutive (non-Optional) `int`/`float`/`bool` fields: a
+      single `struct` ("<q", "<d", "?" each).
+    - `str`/`bytes`: a "<I" length, then the (utf-8) bytes.
+    - Optional fields: a byte (0 for None, 1 otherwise), then the value.
+    - nested dataclasses: a byte (0 for None, 1 otherwise), then the fields.
+      Unions of dataclasses: a byte (0 for None, 1 + the index of the
+      member), then the member.
+    - lists/sets/dicts: a "<I" count, then the items (dict keys are `str`s).
+      Lists of `int`/`float` are a single `struct`.
+    - packed fields: the typecode, a "<I" count, then the raw array.
+    - anything else (`Any`, nested generics...): a type tag, then the value.
+
+The result of `loads_binary(T, dumps_binary(obj))` is the same as that of
+`to_dataclass(T, dataclass_to_dict(obj))`, except that values are written as
+the type of their field: an `int` in a `float` field is read back as a
+`float`. Values that the type of their field can not hold (a `float` in an
+`int` field, ints that do not fit in 64 bits...) raise `TypeError`.
+"""
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+
+import array
+import struct
+
+from dictaclass.dictaclass import (
+    _KIND_DATACLASS,
+    _KIND_DICT,
+    _KIND_LIST,
+    _KIND_PACKED,
+    _KIND_SET,
+    _KIND_VALUE,
+    _FieldPlan,
+    _Plan,
+    _UnionPlan,
+    _encode_any,
+    _function_name,
+    _generate,
+    _get_plan,
+    _plan_cache_lock,
+    _referenced_plans,
+    _transformer_noop,
+)
+
+T = TypeVar("T")
+
+_MAGIC = b"DCB\x01"
+_HEADER_SIZE = len(_MAGIC) + 8
+
+_LEAF_FORMATS = {int: "q", float: "d", bool: "?"}
+
+_count = struct.Struct("<I")
+_pack_count = _count.pack
+_unpack_count = _count.unpack_from
+
+_int = struct.Struct("<q")
+_float = struct.Struct("<d")
+
+# NOTE(braynstorm):
+#   Type tags of the values whose type is not known from the schema.
+_TAG_NONE = 0
+_TAG_FALSE = 1
+_TAG_TRUE = 2
+_TAG_INT = 3
+_TAG_BIG_INT = 4
+_TAG_FLOAT = 5
+_TAG_STR = 6
+_TAG_BYTES = 7
+_TAG_LIST = 8
+_TAG_TUPLE = 9
+_TAG_DICT = 10
+
+
+def _dump_any(value: Any, buffer: bytearray) -> None:
+    value_type = type(value)
+    if value is None:
+        buffer.append(_TAG_NONE)
+    elif value_type is bool:
+        buffer.append(_TAG_TRUE if value else _TAG_FALSE)
+    elif value_type is int:
+        if -(1 << 63) <= value < (1 << 63):
+            buffer.append(_TAG_INT)
+            buffer += _int.pack(value)
+        else:
+            _dump_bytes(_TAG_BIG_INT, str(value).encode(), buffer)
+    elif value_type is float:
+        buffer.append(_TAG_FLOAT)
+        buffer += _float.pack(value)
+    elif value_type is str:
+        _dump_bytes(_TAG_STR, value.encode(), buffer)
+    elif value_type is bytes:
+        _dump_bytes(_TAG_BYTES, value, buffer)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        buffer.append(_TAG_TUPLE if isinstance(value, tuple) else _TAG_LIST)
+        buffer += _pack_count(len(value))
+        for item in value:
+            _dump_any(item, buffer)
+    elif isinstance(value, dict):
+        buffer.append(_TAG_DICT)
+        buffer += _pack_count(len(value))
+        for key, item in value.items():
+            _dump_any(key, buffer)
+            _dump_any(item, buffer)
+    else:
+        encoded = _encode_any(value, _transformer_noop)
+        if encoded is value:
+            raise TypeError(f"dictaclass can't serialize {value_type.__name__} values.")
+        _dump_any(encoded, buffer)
+
+
+def _dump_bytes(tag: int, value: bytes, buffer: bytearray) -> None:
+    buffer.append(tag)
+    buffer += _pack_count(len(value))
+    buffer += value
+
+
+def _load_any(buffer: bytes, pos: int) -> Tuple[Any, int]:
+    tag = buffer[pos]
+    pos += 1
+    if tag == _TAG_NONE:
+        return None, pos
+    if tag == _TAG_FALSE:
+        return False, pos
+    if tag == _TAG_TRUE:
+        return True, pos
+    if tag == _TAG_INT:
+        return _int.unpack_from(buffer, pos)[0], pos + 8
+    if tag == _TAG_FLOAT:
+        return _float.unpack_from(buffer, pos)[0], pos + 8
+
+    (count,) = _unpack_count(buffer, pos)
+    pos += 4
+    if tag == _TAG_STR:
+        return buffer[pos : pos + count].decode(), pos + count
+    if tag == _TAG_BYTES:
+        return buffer[pos : pos + count], pos + count
+    if tag == _TAG_BIG_INT:
+        return int(buffer[pos : pos + count]), pos + count
+    if tag == _TAG_DICT:
+        items: Dict[Any, Any] = dict()
+        for _ in range(count):
+            key, pos = _load_any(buffer, pos)
+            items[key], pos = _load_any(buffer, pos)
+        return items, pos
+    if tag in (_TAG_LIST, _TAG_TUPLE):
+        values = []
+        for _ in range(count):
+            value, pos = _load_any(buffer, pos)
+            values.append(value)
+        return (tuple(values) if tag == _TAG_TUPLE else values), pos
+    raise ValueError(f"dictaclass found an unknown type tag {tag} in binary data.")
+
+
+def _dump_packed(value: Any, typecode: Optional[str], buffer: bytearray) -> None:
+    if not isinstance(value, array.array):
+        values = value.tolist() if hasattr(value, "tolist") else list(value)
+        if typecode is None:
+            typecode = "d" if any(type(v) is float for v in values) else "q"
+        value = array.array(typecode, values)
+    buffer += value.typecode.encode()
+    buffer += _pack_count(len(value))
+    buffer += value.tobytes()
+
+
+def _load_packed(buffer: bytes, pos: int, numpy: bool) -> Tuple[Any, int]:
+    typecode = chr(buffer[pos])
+    (count,) = _unpack_count(buffer, pos + 1)
+    pos += 5
+    value = array.array(typecode)
+    end = pos + count * value.itemsize
+    value.frombytes(buffer[pos:end])
+    if numpy:
+        import numpy as np  # type: ignore
+
+        return np.asarray(value, dtype=typecode), end
+    return value, end
+
+
+def _member_index(members: Tuple[Type[Any], ...], obj: Any) -> int:
+    for index, member in enumerate(members):
+        if isinstance(obj, member):
+            return index
+    raise TypeError(f"dictaclass can't serialize {type(obj).__name__} in this Union.")
+
+
+def _pack_error(
+    obj: Any, group: Tuple[Tuple[str, Optional[str]], ...], error: Exception
+) -> TypeError:
+    """
+    The error raised when `struct` can not pack a field of `obj`. `group` are
+    the (name, struct code or None) of the fields packed together.
+    """
+    for name, code in group:
+        if code is not None:
+            try:
+                struct.pack("<" + code, getattr(obj, name))
+                continue
+            except struct.error:
+                pass
+        return TypeError(
+            f"dictaclass can't serialize {type(obj).__qualname__}.{name}: {error}."
+        )
+    return TypeError(f"dictaclass can't serialize {type(obj).__qualname__}: {error}.")
+
+
+def _init_fields(plan: _Plan) -> List[_FieldPlan]:
+    names = set(f.name for f in fields(plan.dataclass_type) if f.init)
+    return [f for f in plan.fields if f.name in names]
+
+
+def _runs(field_plans: List[_FieldPlan]) -> List[Any]:
+    """
+    Group the consecutive fixed-size fields, which are packed with a single
+    `struct`. Returns a list of field plans and lists of field plans (runs).
+    """
+    groups: List[Any] = []
+    for field_plan in field_plans:
+        fixed = (
+            field_plan.kind == _KIND_VALUE
+            and not field_plan.optional
+            and field_plan.value_type in _LEAF_FORMATS
+        )
+        if not fixed:
+            groups.append(field_plan)
+        elif groups and isinstance(groups[-1], list):
+            groups[-1].append(field_plan)
+        else:
+            groups.append([field_plan])
+    return groups
+
+
+def _dump_value_source(
+    field_plan: _FieldPlan,
+    indices: Dict[int, int],
+    value: str,
+    indent: str,
+) -> List[str]:
+    """
+    Lines writing `value` (not None, unless it is a dataclass) to `buffer`.
+    """
+    kind = field_plan.kind
+    value_type = field_plan.value_type
+    item = field_plan.item
+    if kind == _KIND_PACKED:
+        return [f"{indent}_dump_packed({value}, {value_type.typecode!r}, buffer)"]
+
+    if item is not None:
+        function = _function_name("dumpb", indices[id(item)], item)
+        element = [f"{function}(v, buffer)"]
+    elif value_type is str:
+        element = [
+            f"e = v.encode()",
+            f"buffer += _pack_count(len(e))",
+            f"buffer += e",
+        ]
+    elif value_type is bytes:
+        element = [
+            f"buffer += _pack_count(len(v))",
+            f"buffer += v",
+        ]
+    elif value_type in _LEAF_FORMATS:
+        element = [f"buffer += _leaf_{value_type.__name__}.pack(v)"]
+    else:
+        element = [f"_dump_any(v, buffer)"]
+
+    if kind in (_KIND_VALUE, _KIND_DATACLASS):
+        return [f"{indent}v = {value}"] + [indent + line for line in element]
+
+    lines = [f"{indent}buffer += _pack_count(len({value}))"]
+    if kind == _KIND_LIST and item is None and value_type in (int, float):
+        code = _LEAF_FORMATS[value_type]
+        pack = f"_pack('<%d{code}' % len({value}), *{value})"
+        return lines + [f"{indent}buffer += {pack}"]
+
+    if kind == _KIND_DICT:
+        lines += [
+            f"{indent}for k, v in {value}.items():",
+            f"{indent}    e = k.encode()",
+            f"{indent}    buffer += _pack_count(len(e))",
+            f"{indent}    buffer += e",
+        ]
+    else:
+        lines.append(f"{indent}for v in {value}:")
+    return lines + [f"{indent}    {line}" for line in element]
+
+
+def _load_value_source(
+    field_plan: _FieldPlan,
+    indices: Dict[int, int],
+    target: str,
+    indent: str,
+) -> List[str]:
+    """
+    Lines reading a value (not None, unless it is a dataclass) at `pos` of
+    `buffer` to `target`.
+    """
+    kind = field_plan.kind
+    value_type = field_plan.value_type
+    item = field_plan.item
+    if kind == _KIND_PACKED:
+        numpy = value_type.numpy
+        return [f"{indent}{target}, pos = _load_packed(buffer, pos, {numpy!r})"]
+
+    if item is not None:
+        function = _function_name("loadb", indices[id(item)], item)
+        element = [f"v, pos = {function}(buffer, pos)"]
+    elif value_type in (str, bytes):
+        decode = ".decode()" if value_type is str else ""
+        element = [
+            f"(n,) = _unpack_count(buffer, pos)",
+            f"v = buffer[pos + 4 : pos + 4 + n]{decode}",
+            f"pos += 4 + n",
+        ]
+    elif value_type in _LEAF_FORMATS:
+        leaf = f"_leaf_{value_type.__name__}"
+        element = [
+            f"(v,) = {leaf}.unpack_from(buffer, pos)",
+            f"pos += {leaf}.size",
+        ]
+    else:
+        element = [f"v, pos = _load_any(buffer, pos)"]
+
+    if kind in (_KIND_VALUE, _KIND_DATACLASS):
+        return [indent + line for line in element] + [f"{indent}{target} = v"]
+
+    lines = [
+        f"{indent}(count,) = _unpack_count(buffer, pos)",
+        f"{indent}pos += 4",
+    ]
+    if kind == _KIND_LIST and item is None and value_type in (int, float):
+        code = _LEAF_FORMATS[value_type]
+        return lines + [
+            f"{indent}{target} = list(_unpack_from('<%d{code}' % count, buffer, pos))",
+            f"{indent}pos += count * _leaf_{value_type.__name__}.size",
+        ]
+
+    if kind == _KIND_DICT:
+        lines += [
+            f"{indent}values = {{}}",
+            f"{indent}for _ in range(count):",
+            f"{indent}    (n,) = _unpack_count(buffer, pos)",
+            f"{indent}    k = buffer[pos + 4 : pos + 4 + n].decode()",
+            f"{indent}    pos += 4 + n",
+        ]
+        lines += [f"{indent}    {line}" for line in element]
+        lines.append(f"{indent}    values[k] = v")
+    else:
+        lines += [
+            f"{indent}values = []",
+            f"{indent}for _ in range(count):",
+        ]
+        lines += [f"{indent}    {line}" for line in element]
+        lines.append(f"{indent}    values.append(v)")
+
+    convert = "set(values)" if kind == _KIND_SET else "values"
+    return lines + [f"{indent}{target} = {convert}"]
+
+
+def _run_struct(run: List[_FieldPlan], index: int, namespace: Dict[str, Any]) -> str:
+    name = f"_struct_{index}_{run[0].name}"
+    namespace[name] = struct.Struct(
+        "<" + "".join(_LEAF_FORMATS[f.value_type] for f in run)
+    )
+    return name
+
+
+def _dumper_source(
+    plan: _Plan,
+    indices: Dict[int, int],
+    namespace: Dict[str, Any],
+) -> List[str]:
+    index = indices[id(plan)]
+    function_name = _function_name("dumpb", index, plan)
+    if isinstance(plan, _UnionPlan):
+        members = list(dict.fromkeys(plan.members.values()))
+        namespace[f"_member_types_{index}"] = tuple(m.dataclass_type for m in members)
+        functions = ", ".join(
+            _function_name("dumpb", indices[id(m)], m) for m in members
+        )
+        return [
+            f"def {function_name}(obj, buffer):",
+            f"    if obj is None:",
+            f"        buffer.append(0)",
+            f"        return",
+            f"    index = _member_index(_member_types_{index}, obj)",
+            f"    buffer.append(index + 1)",
+            f"    _member_dumpers_{index}[index](obj, buffer)",
+            f"",
+            f"_member_dumpers_{index} = ({functions},)",
+        ]
+
+    lines = [
+        f"def {function_name}(obj, buffer):",
+        f"    if obj is None:",
+        f"        buffer.append(0)",
+        f"        return",
+        f"    buffer.append(1)",
+    ]
+    for group in _runs(_init_fields(plan)):
+        if isinstance(group, list):
+            values = ", ".join(f"obj.{f.name}" for f in group)
+            struct_name = _run_struct(group, index, namespace)
+            lines += _catch_pack_errors(
+                [f"    buffer += {struct_name}.pack({values})"],
+                tuple((f.name, _LEAF_FORMATS[f.value_type]) for f in group),
+            )
+            continue
+
+        value = f"obj.{group.name}"
+        if group.optional and group.kind != _KIND_DATACLASS:
+            group_lines = [
+                f"    if {value} is None:",
+                f"        buffer.append(0)",
+                f"    else:",
+                f"        buffer.append(1)",
+            ]
+            group_lines += _dump_value_source(group, indices, value, "        ")
+        else:
+            group_lines = _dump_value_source(group, indices, value, "    ")
+
+        if group.item is None and group.value_type in _LEAF_FORMATS:
+            group_lines = _catch_pack_errors(group_lines, ((group.name, None),))
+        lines += group_lines
+    return lines
+
+
+def _catch_pack_errors(
+    lines: List[str], group: Tuple[Tuple[str, Optional[str]], ...]
+) -> List[str]:
+    """
+    Wrap the `lines` packing the fields of `group` (see `_pack_error`), so
+    values of the wrong type raise a TypeError naming the field.
+    """
+    return (
+        ["    try:"]
+        + ["    " + line for line in lines]
+        + [
+            "    except _struct_error as error:",
+            f"        raise _pack_error(obj, {group!r}, error) from None",
+        ]
+    )
+
+
+def _loader_source(
+    plan: _Plan,
+    indices: Dict[int, int],
+    namespace: Dict[str, Any],
+) -> List[str]:
+    index = indices[id(plan)]
+    function_name = _function_name("loadb", index, plan)
+    if isinstance(plan, _UnionPlan):
+        members = list(dict.fromkeys(plan.members.values()))
+        functions = ", ".join(
+            _function_name("loadb", indices[id(m)], m) for m in members
+        )
+        return [
+            f"def {function_name}(buffer, pos):",
+            f"    index = buffer[pos]",
+            f"    if not index:",
+            f"        return None, pos + 1",
+            f"    return _member_loaders_{index}[index - 1](buffer, pos + 1)",
+            f"",
+            f"_member_loaders_{index} = ({functions},)",
+        ]
+
+    lines = [
+        f"def {function_name}(buffer, pos):",
+        f"    if not buffer[pos]:",
+        f"        return None, pos + 1",
+        f"    pos += 1",
+        f"    kwargs = {{}}",
+    ]
+    for group in _runs(_init_fields(plan)):
+        if isinstance(group, list):
+            run_struct = _run_struct(group, index, namespace)
+            targets = ", ".join(f"kwargs[{f.name!r}]" for f in group)
+            lines += [
+                f"    ({targets},) = {run_struct}.unpack_from(buffer, pos)",
+                f"    pos += {run_struct}.size",
+            ]
+            continue
+
+        target = f"kwargs[{group.name!r}]"
+        if group.optional and group.kind != _KIND_DATACLASS:
+            lines += [
+                f"    pos += 1",
+                f"    if not buffer[pos - 1]:",
+                f"        {target} = None",
+                f"    else:",
+            ]
+            lines += _load_value_source(group, indices, target, "        ")
+        else:
+            lines += _load_value_source(group, indices, target, "    ")
+    lines.append(f"    return _cls_{index}(**kwargs), pos")
+    return lines
+
+
+def _namespace() -> Dict[str, Any]:
+    namespace: Dict[str, Any] = dict(
+        _pack=struct.pack,
+        _unpack_from=struct.unpack_from,
+        _pack_count=_pack_count,
+        _unpack_count=_unpack_count,
+        _dump_any=_dump_any,
+        _load_any=_load_any,
+        _dump_packed=_dump_packed,
+        _load_packed=_load_packed,
+        _member_index=_member_index,
+        _struct_error=struct.error,
+        _pack_error=_pack_error,
+    )
+    for value_type, code in _LEAF_FORMATS.items():
+        namespace[f"_leaf_{value_type.__name__}"] = struct.Struct("<" + code)
+    return namespace
+
+
+def _fingerprint(plan: _Plan) -> bytes:
+    """
+    8 bytes identifying the schema: the fields (names, kinds, types) of every
+    dataclass reachable from `plan`, in order.
+    """
+    import hashlib
+
+    order: Dict[int, int] = dict()
+    schema: List[Any] = []
+    stack = [plan]
+    while stack:
+        current = stack.pop()
+        if id(current) in order:
+            continue
+        order[id(current)] = len(order)
+        if isinstance(current, _UnionPlan):
+            schema.append(("Union", current.key, list(current.members)))
+        else:
+            schema.append(
+                (
+                    current.dataclass_type.__qualname__,
+                    [
+                        (f.name, f.optional, f.kind, repr(f.value_type))
+                        for f in _init_fields(current)
+                    ],
+                )
+            )
+        stack.extend(reversed(_referenced_plans(current)))
+
+    return hashlib.blake2b(repr(schema).encode(), digest_size=8).digest()
+
+
+def _codec(dataclass_type: Any) -> Tuple[bytes, Callable[..., Any], Callable[..., Any]]:
+    """
+    The (cached) header, dumper and loader of `dataclass_type`.
+    """
+    plan = _get_plan(dataclass_type, _transformer_noop, False)
+    if plan is None:
+        raise TypeError(
+            "dumps_binary()/loads_binary() should be called with dataclasses"
+            " or Unions of dataclasses"
+        )
+
+    with _plan_cache_lock:
+        header = plan.binary_header
+        if header is None:
+            header = plan.binary_header = _MAGIC + _fingerprint(plan)
+
+    dumper = plan.functions.get("dumpb") or _generate(
+        plan, "dumpb", "dumpb", _dumper_source, _namespace()
+    )
+    loader = plan.functions.get("loadb") or _generate(
+        plan, "loadb", "loadb", _loader_source, _namespace()
+    )
+    return header, dumper, loader
+
+
+def dumps_binary(obj: Any, dataclass_type: Optional[Type[Any]] = None) -> bytes:
+    """
+    Serialize a dataclass hierarchy to the compact binary format.
+
+    >>> cache.set(key, dumps_binary(order))
+    >>> order = loads_binary(Order, cache.get(key))
+
+    Args:
+        obj (Any): The dataclass instance.
+        dataclass_type (Type | None, optional):
+            The schema to write `obj` with, e.g. a Union of dataclasses.
+            Defaults to the type of `obj`.
+    Returns:
+        bytes: The serialized data, readable with `loads_binary`.
+    """
+    if dataclass_type is None:
+        dataclass_type = type(obj)
+        if not is_dataclass(dataclass_type):
+            raise TypeError("dumps_binary() should be called on dataclass instances")
+
+    header, dumper, _ = _codec(dataclass_type)
+    buffer = bytearray(header)
+    dumper(obj, buffer)
+    return bytes(buffer)
+
+
+def loads_binary(dataclass_type: Type[T], buffer: Any) -> T:
+    """
+    Deserialize data written by `dumps_binary` with the same schema.
+
+    Args:
+        dataclass_type (Type[T]): The type the data was written with.
+        buffer (bytes | bytearray | memoryview): The serialized data.
+    Returns:
+        T: The dataclass instance.
+    Raises:
+        ValueError: The data was written with a different schema, or is
+            truncated.
+    """
+    header, _, loader = _codec(dataclass_type)
+    if type(buffer) is not bytes:
+        buffer = bytes(buffer)
+
+    if buffer[:_HEADER_SIZE] != header:
+        raise ValueError(
+            f"dictaclass binary data was not written for the schema of"
+            f" {getattr(dataclass_type, '__qualname__', dataclass_type)}."
+        )
+
+    try:
+        obj, end = loader(buffer, _HEADER_SIZE)
+    except (IndexError, struct.error) as error:
+        raise ValueError("dictaclass binary data is truncated.") from error
+    if end > len(buffer):
+        raise ValueError("dictaclass binary data is truncated.")
+    if end < len(buffer):
+        raise ValueError("dictaclass binary data has trailing bytes.")
+    return obj
@@ -0,0 +1,252 @@
+"""
+Struct-of-arrays decoding: one column per dataclass field instead of one
+object per record.
+"""
+from dataclasses import MISSING, Field, fields
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+    overload,
+)
+
+import array
+
+from dictaclass.dictaclass import (
+    _KIND_DATACLASS,
+    _KIND_DICT,
+    _KIND_LIST,
+    _KIND_PACKED,
+    _KIND_SET,
+    _KIND_VALUE,
+    _MISSING,
+    _DecoderOptions,
+    _FieldPlan,
+    _get_decoder,
+    _get_plan,
+    _on_extra_field_noop,
+    _transformer_noop,
+)
+
+T = TypeVar("T")
+
+_TYPECODES = {int: "q", float: "d"}
+
+
+class Columns(Generic[T]):
+    """
+    A table of `dataclass_type` records, stored as one column per field.
+
+    Indexing returns a (newly constructed) record, slicing returns a `Columns`
+    view of the sliced columns. The columns themselves are in `columns`,
+    keyed by field name.
+    """
+
+    __slots__ = ("dataclass_type", "columns", "_length")
+
+    def __init__(
+        self,
+        dataclass_type: Type[T],
+        columns: Dict[str, Sequence[Any]],
+        length: int,
+    ) -> None:
+        self.dataclass_type = dataclass_type
+        self.columns = columns
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> T:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "Columns[T]":
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, "Columns[T]"]:
+        if isinstance(index, slice):
+            columns = {name: column[index] for name, column in self.columns.items()}
+            return Columns(
+                self.dataclass_type,
+                columns,
+                len(range(*index.indices(self._length))),
+            )
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Columns index out of range")
+
+        return self.dataclass_type(
+            **{name: column[index] for name, column in self.columns.items()}
+        )
+
+    def __iter__(self) -> Iterator[T]:
+        dataclass_type = self.dataclass_type
+        names = list(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dataclass_type(**dict(zip(names, values)))
+
+    def __repr__(self) -> str:
+        return (
+            f"Columns({self.dataclass_type.__qualname__}, "
+            f"{list(self.columns)}, length={self._length})"
+        )
+
+
+def _converter(
+    field_plan: _FieldPlan,
+    key_transformer: Callable[[str], str],
+    on_extra_field: Callable[[Type, str, Any], None],
+    implicit_optional: bool,
+) -> Optional[Callable[[Any], Any]]:
+    """
+    Function converting a single (non-None) value of the field, or None if
+    the values are used as they are.
+    """
+    kind = field_plan.kind
+    if kind == _KIND_VALUE:
+        return None
+    if kind == _KIND_PACKED:
+        return field_plan.value_type.converter()
+    if field_plan.item is None:
+        return {_KIND_LIST: list, _KIND_SET: set, _KIND_DICT: dict}[kind]
+
+    decoder = _get_decoder(
+        field_plan.item.dataclass_type,
+        key_transformer,
+        implicit_optional,
+        _DecoderOptions(extra_fields=on_extra_field is not _on_extra_field_noop),
+    )
+    assert decoder is not None
+
+    if kind == _KIND_DATACLASS:
+        return lambda value: decoder(value, on_extra_field)
+    if kind == _KIND_LIST:
+        return lambda value: [decoder(v, on_extra_field) for v in value]
+    if kind == _KIND_SET:
+        return lambda value: {decoder(v, on_extra_field) for v in value}
+    return lambda value: {k: decoder(v, on_extra_field) for k, v in value.items()}
+
+
+def _fill_defaults(
+    dataclass_type: Type[Any],
+    field: Field,
+    column: List[Any],
+) -> List[Any]:
+    if field.default is not MISSING:
+        default = field.default
+        return [default if v is _MISSING else v for v in column]
+
+    if field.default_factory is not MISSING:  # type: ignore
+        factory = field.default_factory  # type: ignore
+        return [factory() if v is _MISSING else v for v in column]
+
+    raise TypeError(
+        f"{dataclass_type.__name__} is missing required field '{field.name}'"
+    )
+
+
+def to_columns(
+    dataclass_type: Type[T],
+    rows: Iterable[Dict[str, Any]],
+    key_transformer: Optional[Callable[[str], str]] = None,
+    on_extra_field: Optional[Callable[[Type, str, Any], None]] = None,
+    implicit_optional: bool = False,
+    packed: bool = True,
+) -> Columns[T]:
+    """
+    Decode many dicts of `dataclass_type` straight into one column per field.
+
+    `int` and `float` fields are stored in compact `array.array`s ("q" and "d")
+    when every value fits; every other field (and int/float columns with
+    `None`s or huge ints) is stored in a list, converted the same way
+    `to_dataclass` converts it (nested dataclasses, sets, ...).
+
+    >>> table = to_columns(Point, json.loads(source))
+    >>> xs = table.columns["x"]  # array('q', [...])
+    >>> table[10]  # Point(x=..., y=...)
+
+    Args:
+        dataclass_type (Type[T]): The type of every row.
+        rows (Iterable[Dict[str, Any]]): json.loads()'d rows.
+        key_transformer, on_extra_field, implicit_optional:
+            See `to_dataclass`.
+        packed (bool, optional):
+            Set to False to always store the columns in lists.
+    Returns:
+        Columns[T]: The table.
+    """
+    if key_transformer is None:
+        key_transformer = _transformer_noop
+
+    plan = _get_plan(dataclass_type, key_transformer, implicit_optional)
+    assert plan is not None, "to_columns() should be called with a dataclass type"
+
+    if not isinstance(rows, list):
+        rows = list(rows)
+
+    if on_extra_field is not None:
+        keys = frozenset(f.key for f in plan.fields)
+        for row in rows:
+            for key in row.keys() - keys:
+                on_extra_field(dataclass_type, key, row[key])
+    else:
+        on_extra_field = _on_extra_field_noop
+
+    init_fields = {f.name: f for f in fields(plan.dataclass_type) if f.init}
+
+    columns: Dict[str, Sequence[Any]] = dict()
+    for field_plan in plan.fields:
+        field = init_fields.get(field_plan.name)
+        if field is None:
+            continue
+
+        key = field_plan.key
+        try:
+            column: List[Any] = [row[key] for row in rows]
+            missing = False
+        except KeyError:
+            column = [row.get(key, _MISSING) for row in rows]
+            missing = True
+
+        assert (
+            field_plan.optional or None not in column
+        ), f"dictaclass key '{key}' is not optional."
+
+        converter = _converter(
+            field_plan,
+            key_transformer,
+            on_extra_field,
+            implicit_optional,
+        )
+        if converter is not None:
+            column = [
+                v if v is None or v is _MISSING else converter(v) for v in column
+            ]
+
+        if missing:
+            column = _fill_defaults(dataclass_type, field, column)
+
+        typecode = _TYPECODES.get(field_plan.value_type)
+        if packed and field_plan.kind == _KIND_VALUE and typecode is not None:
+            try:
+                columns[field_plan.name] = array.array(typecode, column)
+                continue
+            except (TypeError, OverflowError):
+                pass
+
+        columns[field_plan.name] = column
+
+    return Columns(dataclass_type, columns, len(rows))
@@ -1,7 +1,44 @@
-from typing import Any, Dict, Type, TypeVar, List, Set, Dict, Callable, Union, Optional, get_type_hints
-from dataclasses import is_dataclass, asdict
+from typing import (
+    Any,
+    Dict,
+    Type,
+    TypeVar,
+    List,
+    NamedTuple,
+    Set,
+    Dict,
+    Callable,
+    Hashable,
+    Iterable,
+    Iterator,
+    Tuple,
+    Union,
+    Optional,
+    get_type_hints,
+)
+from dataclasses import MISSING, dataclass, field, fields, is_dataclass
+from collections import OrderedDict
+from copy import deepcopy
 
+import array
+import contextlib
+import contextvars
+import functools
+import re
 import sys
+import threading
+import time
+import weakref
+
+if sys.version_info >= (3, 8):
+    from typing import Literal, get_args, get_origin
+else:
+    Literal = None
+
+if sys.version_info >= (3, 9):
+    from typing import Annotated
+else:
+    Annotated = None
 
 T = TypeVar("T")
 
@@ -14,231 +51,1608 @@ def _on_extra_field_noop(*args):
     pass
 
 
-def _to_dataclass_38(
-    dataclass_type: Type[T],
-    data: Any,
-    key_transformer: Callable[[str], str],
-    on_extra_field: Callable[[Type, str, Any], None],
-    implicit_optional: bool,
-) -> T:
-    from typing import get_args, get_origin
+_KIND_VALUE = 0
+_KIND_DATACLASS = 1
+_KIND_LIST = 2
+_KIND_SET = 3
+_KIND_DICT = 4
+_KIND_PACKED = 5
 
-    dict_value: Any
+_PLAN_CACHE_SIZE = 1024
 
-    if not is_dataclass(dataclass_type) or data is None:
-        return data
 
-    assert isinstance(data, dict)
+class Packed:
+    """
+    Field annotation marker: decode a list of numbers to a compact
+    `array.array(typecode)` instead of a `list`.
+
+    >>> @dataclass
+    >>> class Series:
+    >>>     values: Annotated[List[float], Packed("d")]
+    >>>     counts: Annotated[List[int], Packed("q", numpy=True)]
+
+    With `numpy=True` the field is decoded to a `numpy.ndarray` of the same
+    typecode (dtype) instead, which requires NumPy to be installed.
+
+    Fields annotated with plain `array.array` are treated as `Packed(None)`:
+    the typecode is "d" if the list has any floats, "q" otherwise.
+    """
+
+    __slots__ = ("typecode", "numpy")
 
-    dataclass_dict: Dict[str, Any] = dict()
-    used_keys: Set[str] = set()
+    def __init__(self, typecode: Optional[str], numpy: bool = False) -> None:
+        self.typecode = typecode
+        self.numpy = numpy
+
+    def __repr__(self) -> str:
+        return f"Packed({self.typecode!r}, numpy={self.numpy!r})"
+
+    def converter(self) -> Callable[[Any], Any]:
+        """
+        Function converting a list of numbers to the packed representation.
+        """
+        if self.numpy:
+            import numpy  # type: ignore
+
+            return functools.partial(numpy.asarray, dtype=self.typecode)
+
+        if self.typecode is None:
+            return _to_array
+
+        return functools.partial(array.array, self.typecode)
+
+
+def _to_array(values: Any) -> "array.array[Any]":
+    typecode = "d" if any(type(v) is float for v in values) else "q"
+    return array.array(typecode, values)
+
+
+class _FieldPlan:
+    """
+    Everything `to_dataclass` needs to know about a single dataclass field,
+    worked out once per (dataclass type, key transformer, implicit optional).
+    """
+
+    __slots__ = ("name", "key", "optional", "kind", "value_type", "item")
+
+    def __init__(
+        self,
+        name: str,
+        key: str,
+        optional: bool,
+        kind: int,
+        value_type: Any,
+        item: Optional["_Plan"],
+    ) -> None:
+        self.name = name
+        self.key = key
+        self.optional = optional
+        self.kind = kind
+        # NOTE(braynstorm):
+        #   Type of the field (or of the values in the collection in the field),
+        #   with Optional[] removed. The `Packed` marker for packed fields.
+        self.value_type = value_type
+        # NOTE(braynstorm):
+        #   Plan of the dataclass stored in the field (or in the collection
+        #   in the field). None if the values are passed through as they are.
+        self.item = item
 
-    for annotation_name, annotation_type in get_type_hints(dataclass_type).items():
+
+class _Plan:
+    """
+    Compiled decoding plan of a single dataclass type.
+
+    `fields` is filled after the plan is put in the cache, so self-referencing
+    dataclasses point back to the same plan instead of recursing forever.
+
+    `functions` are the generated decoders/encoders (see `_generate`),
+    `lazy_type` is the lazy proxy type (see `dictaclass.lazy`) and
+    `binary_header` the header of the binary format (see `dictaclass.binary`),
+    all created on first use.
+
+    Projected plans (see `_project`) have only the selected `fields`, their
+    `base` is the full plan, and `unselected` are the dataclass fields that
+    were left out.
+    """
+
+    __slots__ = (
+        "dataclass_type",
+        "fields",
+        "functions",
+        "lazy_type",
+        "binary_header",
+        "base",
+        "unselected",
+    )
+
+    def __init__(self, dataclass_type: Type[Any]) -> None:
+        self.dataclass_type = dataclass_type
+        self.fields: Tuple[_FieldPlan, ...] = ()
+        self.functions: Dict[Hashable, Callable[..., Any]] = dict()
+        self.lazy_type: Optional[Type[Any]] = None
+        self.binary_header: Optional[bytes] = None
+        self.base: Optional[_Plan] = None
+        self.unselected: Tuple[Any, ...] = ()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # NOTE(braynstorm):
+        #   Generated functions and lazy types are not picklable, and are
+        #   recreated on first use anyway (see `dictaclass.warmup`), like the
+        #   binary header.
+        return {
+            name: getattr(self, name)
+            for cls in type(self).__mro__
+            for name in getattr(cls, "__slots__", ())
+            if name not in ("functions", "lazy_type", "binary_header")
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.functions = dict()
+        self.lazy_type = None
+        self.binary_header = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class _UnionPlan(_Plan):
+    """
+    Plan of a discriminated `Union` of dataclasses (stored in `dataclass_type`).
+
+    `members` maps every value of `key` in the data (the tag) to the plan of
+    the member dataclass it selects.
+    """
+
+    __slots__ = ("key", "members")
+
+    def __init__(self, union_type: Any) -> None:
+        super().__init__(union_type)
+        self.key = ""
+        self.members: Dict[Any, _Plan] = dict()
+
+    def member(self, data: Dict[str, Any]) -> _Plan:
         try:
-            key = key_transformer(annotation_name)
-            dict_value = data[key]
-            used_keys.add(key)
-        except KeyError:
-            # TODO(braynstorm):
-            #   Check if the field has default value. Only "continue" if it does.
-            #   The current code is safe but will raise less readable exceptions.
-            continue
+            return self.members[data[self.key]]
+        except (KeyError, TypeError):
+            raise self.tag_error(data) from None
 
-        optional = implicit_optional
-        origin = get_origin(annotation_type)
-        if origin is Union:
-            args = list(get_args(annotation_type))
-            len_args = len(args)
-            type_none = type(None)
-            optional = type_none in args
+    def tag_error(self, data: Dict[str, Any]) -> ValueError:
+        if self.key not in data:
+            return ValueError(
+                f"dictaclass key '{self.key}' (the tag of {self.dataclass_type})"
+                " is missing."
+            )
+        return ValueError(
+            f"dictaclass found unknown tag {data[self.key]!r} in key '{self.key}'"
+            f" of {self.dataclass_type}."
+        )
 
-            assert len_args == 2 and optional, "dictaclass doesn't support real Unions."
-            args.remove(type_none)
 
-            annotation_type = args[0]
-            origin = get_origin(annotation_type)
+# NOTE(braynstorm):
+#   (type, key transformer, implicit optional) -> plan, and
+#   (type, key transformer, implicit optional, mask) -> projected plan.
+_plan_cache: "OrderedDict[Tuple[Any, ...], _Plan]"
+_plan_cache = OrderedDict()
+_plan_cache_lock = threading.RLock()
 
-        if dict_value is None:
-            assert optional, f"dictaclass key '{key}' is not optional."
+# NOTE(braynstorm):
+#   Generated source -> its code object, so the same decoders are compiled
+#   only once (also across processes, see `dictaclass.warmup`).
+_code_cache: "OrderedDict[str, Any]"
+_code_cache = OrderedDict()
 
-            dataclass_dict[annotation_name] = None
-            continue
+# NOTE(braynstorm):
+#   Union type -> (discriminator field name, tag -> member type), see
+#   `register_union`.
+_registered_unions: Dict[Any, Tuple[Optional[str], Optional[Dict[Any, Any]]]]
+_registered_unions = dict()
 
-        if origin is set:
-            value_type = get_args(annotation_type)[0]
-            dataclass_dict[annotation_name] = set(
-                _to_dataclass_38(
-                    value_type, v, key_transformer, on_extra_field, implicit_optional
+
+def _type_hints_38(dataclass_type: Type[Any]) -> Dict[str, Any]:
+    if Annotated is not None:
+        return get_type_hints(dataclass_type, include_extras=True)
+    return get_type_hints(dataclass_type)
+
+
+def _type_hints_37(dataclass_type: Type[Any]) -> Dict[str, Any]:
+    annotations = dict()
+    for c in dataclass_type.mro():
+        try:
+            annotations.update(get_type_hints(c))
+        except AttributeError:
+            pass
+    return annotations
+
+
+def _origin_args_38(annotation_type: Any) -> Tuple[Any, Tuple[Any, ...]]:
+    return get_origin(annotation_type), get_args(annotation_type)
+
+
+def _origin_args_37(annotation_type: Any) -> Tuple[Any, Tuple[Any, ...]]:
+    # NOTE(braynstorm):
+    #   typing._GenericAlias is inaccessible, except:
+    #   - Dict.__class__ is typing._GenericAlias
+    #   - List.__class__ is typing._GenericAlias
+    #   - Set.__class__  is typing._GenericAlias
+    if isinstance(annotation_type, List.__class__):
+        return annotation_type.__origin__, annotation_type.__args__
+    return None, ()
+
+
+if sys.version_info >= (3, 8):
+    _type_hints = _type_hints_38
+    _origin_args = _origin_args_38
+else:
+    _type_hints = _type_hints_37
+    _origin_args = _origin_args_37
+
+
+def _is_dataclass_union(annotation_type: Any) -> bool:
+    origin, args = _origin_args(annotation_type)
+    return (
+        origin is Union
+        and len(args) > 1
+        and all(is_dataclass(arg) and isinstance(arg, type) for arg in args)
+    )
+
+
+def _get_plan(
+    dataclass_type: Any,
+    key_transformer: Callable[[str], str],
+    implicit_optional: bool,
+) -> Optional[_Plan]:
+    """
+    Get the (cached) plan of `dataclass_type`, or None if it is neither a
+    dataclass nor a Union of dataclasses.
+    """
+    plan_type: Type[_Plan]
+    if is_dataclass(dataclass_type):
+        plan_type = _Plan
+    elif _is_dataclass_union(dataclass_type):
+        plan_type = _UnionPlan
+    else:
+        return None
+
+    cache_key = (dataclass_type, key_transformer, implicit_optional)
+    with _plan_cache_lock:
+        plan = _plan_cache.get(cache_key)
+        if plan is not None:
+            _plan_cache.move_to_end(cache_key)
+            return plan
+
+        plan = plan_type(dataclass_type)
+        _plan_cache[cache_key] = plan
+        try:
+            if isinstance(plan, _UnionPlan):
+                _fill_union_plan(plan, key_transformer, implicit_optional)
+            else:
+                plan.fields = tuple(
+                    _build_field_plan(
+                        annotation_name,
+                        annotation_type,
+                        key_transformer,
+                        implicit_optional,
+                    )
+                    for annotation_name, annotation_type in _type_hints(
+                        dataclass_type
+                    ).items()
                 )
-                for v in dict_value
+        except BaseException:
+            _plan_cache.pop(cache_key, None)
+            raise
+
+        while len(_plan_cache) > _PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+
+        return plan
+
+
+def _literal_values(annotation_type: Any) -> Tuple[Any, ...]:
+    """
+    The values of a `Literal[...]` annotation, () for any other annotation.
+    """
+    if Literal is None:
+        return ()
+    annotation_type, _ = _unwrap_annotated(annotation_type)
+    if get_origin(annotation_type) is not Literal:
+        return ()
+    return get_args(annotation_type)
+
+
+def _discriminator(union_type: Any) -> Tuple[str, Dict[Any, Any]]:
+    """
+    Find the discriminator field name of `union_type`, and the member type
+    selected by each tag - either registered with `register_union`, or from
+    the `Literal` field that every member has.
+    """
+    _, members = _origin_args(union_type)
+    name, registered = _registered_unions.get(union_type, (None, None))
+    if registered is not None:
+        assert name is not None
+        return name, dict(registered)
+
+    literals = [
+        {
+            field_name: values
+            for field_name, values in (
+                (field_name, _literal_values(hint))
+                for field_name, hint in _type_hints(member).items()
             )
-        elif origin is list:
-            value_type = get_args(annotation_type)[0]
-            dataclass_dict[annotation_name] = [
-                _to_dataclass_38(
-                    value_type, v, key_transformer, on_extra_field, implicit_optional
-                )
-                for v in dict_value
-            ]
-        elif origin is dict:
-            key_type, value_type = get_args(annotation_type)
-            assert key_type == str
-            dataclass_dict[annotation_name] = {
-                key: _to_dataclass_38(
-                    value_type,
-                    value,
-                    key_transformer,
-                    on_extra_field,
-                    implicit_optional,
+            if values
+        }
+        for member in members
+    ]
+    candidates = set.intersection(*(set(member) for member in literals))
+    if name is not None:
+        candidates &= {name}
+    if len(candidates) != 1:
+        raise TypeError(
+            f"dictaclass can't find the tag field of {union_type}: every member"
+            " must have exactly one common Literal[...] field (or pass the name"
+            " of the field to register_union())."
+        )
+
+    name = candidates.pop()
+    tags: Dict[Any, Any] = dict()
+    for member, member_literals in zip(members, literals):
+        for tag in member_literals[name]:
+            if tag in tags:
+                raise TypeError(
+                    f"dictaclass found the same tag {tag!r} on {tags[tag]} and"
+                    f" {member} in {union_type}."
                 )
-                for key, value in dict_value.items()
+            tags[tag] = member
+    return name, tags
+
+
+def _fill_union_plan(
+    plan: _UnionPlan,
+    key_transformer: Callable[[str], str],
+    implicit_optional: bool,
+) -> None:
+    name, tags = _discriminator(plan.dataclass_type)
+    plan.key = key_transformer(name)
+    for tag, member in tags.items():
+        member_plan = _get_plan(member, key_transformer, implicit_optional)
+        assert member_plan is not None
+        plan.members[tag] = member_plan
+
+
+def register_union(
+    union_type: Any,
+    key: Optional[str] = None,
+    tags: Optional[Dict[Any, Type[Any]]] = None,
+) -> None:
+    """
+    Declare how the members of a Union of dataclasses are told apart.
+
+    Unions whose members all have a single common `Literal[...]` field
+    (`kind: Literal["created"]`) don't need to be registered. Register them
+    to pick the field, when the members have more than one common `Literal`
+    field, or to map the tags to the members explicitly.
+
+    >>> Event = Union[Created, Deleted]
+    >>> register_union(Event, "type", {"created": Created, "deleted": Deleted})
+    >>> events = to_dataclasses(Event, json.loads(source))
+
+    Args:
+        union_type (Any): The Union of dataclasses.
+        key (str | None, optional):
+            Name of the tag field. Transformed by `key_transformer`, like the
+            dataclass field names. If the members do not have this field,
+            `on_extra_field` is called for it.
+        tags (Dict[Any, Type] | None, optional):
+            Member dataclass selected by each value of the tag field.
+            Defaults to the `Literal[...]` values of the `key` field of
+            every member.
+    """
+    if not _is_dataclass_union(union_type):
+        raise TypeError("register_union() should be called with a Union of dataclasses")
+
+    if tags is not None:
+        if key is None:
+            raise TypeError("register_union() needs the key of the tags")
+
+        _, members = _origin_args(union_type)
+        for member in tags.values():
+            if member not in members:
+                raise TypeError(f"{member} is not a member of {union_type}")
+        tags = dict(tags)
+
+    with _plan_cache_lock:
+        _registered_unions[union_type] = (key, tags)
+        _plan_cache.clear()
+
+
+class _Unselected:
+    """
+    The type of `UNSELECTED`.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "UNSELECTED"
+
+    def __reduce__(self) -> str:
+        return "UNSELECTED"
+
+
+# NOTE(braynstorm):
+#   The value of required fields left out by `only=`.
+UNSELECTED = _Unselected()
+
+# NOTE(braynstorm):
+#   ((field name, mask of the field or None for the whole field), ...)
+_Mask = Tuple[Tuple[str, Any], ...]
+
+
+def _freeze_mask(only: Any) -> _Mask:
+    """
+    Normalize an `only=` mask - a dict of field name -> mask (or True/None
+    for the whole field), or a collection of field names - to a hashable,
+    canonical tuple.
+    """
+    if isinstance(only, str):
+        raise TypeError(f"dictaclass mask should be a dict or a set of names: {only!r}")
+
+    items: Iterable[Tuple[str, Any]]
+    if isinstance(only, dict):
+        items = only.items()
+    else:
+        items = ((name, None) for name in only)
+
+    return tuple(
+        sorted(
+            (name, None if mask is None or mask is True else _freeze_mask(mask))
+            for name, mask in items
+        )
+    )
+
+
+def _project(
+    plan: _Plan,
+    mask: _Mask,
+    key_transformer: Callable[[str], str],
+    implicit_optional: bool,
+    strict: bool = True,
+) -> _Plan:
+    """
+    Get the (cached) plan of only the fields of `plan` selected by `mask`.
+
+    Fields selected as a whole use the regular plans of their dataclasses.
+    Unions apply the mask to each member (`strict` is False for them - a
+    field has to be in at least one member).
+    """
+    cache_key = (plan.dataclass_type, key_transformer, implicit_optional, mask)
+    with _plan_cache_lock:
+        projected = _plan_cache.get(cache_key)
+        if projected is not None and strict:
+            _plan_cache.move_to_end(cache_key)
+            return projected
+
+        selected = dict(mask)
+        if isinstance(plan, _UnionPlan):
+            projected = _UnionPlan(plan.dataclass_type)
+            projected.key = plan.key
+            projected.members = {
+                tag: _project(member, mask, key_transformer, implicit_optional, False)
+                for tag, member in plan.members.items()
             }
+            names = {f.name for member in plan.members.values() for f in member.fields}
         else:
-            dataclass_dict[annotation_name] = _to_dataclass_38(
-                annotation_type,
-                dict_value,
-                key_transformer,
-                on_extra_field,
-                implicit_optional,
+            projected = _Plan(plan.dataclass_type)
+            names = {f.name for f in plan.fields}
+            projected_fields = []
+            for field_plan in plan.fields:
+                if field_plan.name not in selected:
+                    continue
+
+                field_mask = selected[field_plan.name]
+                if field_mask is not None:
+                    if field_plan.item is None:
+                        raise ValueError(
+                            f"dictaclass can't select fields of '{field_plan.name}'"
+                            f" of {plan.dataclass_type.__name__} - it does not"
+                            " hold dataclasses."
+                        )
+                    field_plan = _FieldPlan(
+                        field_plan.name,
+                        field_plan.key,
+                        field_plan.optional,
+                        field_plan.kind,
+                        field_plan.value_type,
+                        _project(
+                            field_plan.item,
+                            field_mask,
+                            key_transformer,
+                            implicit_optional,
+                        ),
+                    )
+                projected_fields.append(field_plan)
+
+            projected.fields = tuple(projected_fields)
+            projected.unselected = tuple(
+                f for f in fields(plan.dataclass_type) if f.name not in selected
             )
 
-    extra_keys = set(data.keys())
-    extra_keys.difference_update(used_keys)
+        if strict:
+            unknown = set(selected) - names
+            if unknown:
+                raise ValueError(
+                    f"dictaclass can't select {', '.join(sorted(unknown))} - not"
+                    f" fields of {plan.dataclass_type}."
+                )
 
-    for field in extra_keys:
-        value = data[field]
-        on_extra_field(dataclass_type, field, value)
+        projected.base = plan
+        if strict:
+            _plan_cache[cache_key] = projected
+            while len(_plan_cache) > _PLAN_CACHE_SIZE:
+                _plan_cache.popitem(last=False)
+        return projected
 
-    return dataclass_type(**dataclass_dict)
 
+def _unwrap_annotated(annotation_type: Any) -> Tuple[Any, Optional[Packed]]:
+    """
+    Remap Annotated[X, ...] to X, and find the `Packed` marker, if any.
+    """
+    if Annotated is None or get_origin(annotation_type) is not Annotated:
+        return annotation_type, None
 
-def _to_dataclass_37(
-    dataclass_type: Type[T],
-    data: Any,
+    for metadata in annotation_type.__metadata__:
+        if isinstance(metadata, Packed):
+            return annotation_type.__origin__, metadata
+    return annotation_type.__origin__, None
+
+
+def _build_field_plan(
+    annotation_name: str,
+    annotation_type: Any,
     key_transformer: Callable[[str], str],
-    on_extra_field: Callable[[Type, str, Any], None],
     implicit_optional: bool,
-) -> T:
-    dict_value: Any
+) -> _FieldPlan:
+    key = key_transformer(annotation_name)
+    optional = implicit_optional
 
-    if not is_dataclass(dataclass_type) or data is None:
-        return data
+    annotation_type, packed = _unwrap_annotated(annotation_type)
 
-    assert isinstance(data, dict)
+    # NOTE(braynstorm):
+    #   Remap Optional[X](== Union[X, NoneType]) to X, and set `optional`.
+    #   Unions of several dataclasses stay Unions (see `_UnionPlan`).
+    origin, args = _origin_args(annotation_type)
+    if origin is Union:
+        type_none = type(None)
+        optional = optional or type_none in args
+        members = [arg for arg in args if arg is not type_none]
 
-    dataclass_dict: Dict[str, Any] = dict()
-    used_keys: Set[str] = set()
+        if len(members) == 1:
+            annotation_type, inner_packed = _unwrap_annotated(members[0])
+            packed = packed or inner_packed
+            origin, args = _origin_args(annotation_type)
+        else:
+            annotation_type = Union[tuple(members)]
+            assert _is_dataclass_union(
+                annotation_type
+            ), "dictaclass only supports Unions of dataclasses."
+            origin, args = None, ()
 
-    annotations = dict()
-    for c in dataclass_type.mro():
-        try:
-            annotations.update(get_type_hints(c))
-        except AttributeError:
-            pass
+    if packed is None and annotation_type is array.array:
+        packed = Packed(None)
 
-    for annotation_name, annotation_type in annotations.items():
-        try:
-            key = key_transformer(annotation_name)
-            dict_value = data[key]
-            used_keys.add(key)
-        except KeyError:
-            # TODO(bozho2):
-            #   Check if the field has default value. Only "continue" if it does.
-            #   The current code is safe but will raise less readable exceptions.
-            continue
+    if packed is not None:
+        return _FieldPlan(annotation_name, key, optional, _KIND_PACKED, packed, None)
+
+    if origin is set:
+        kind = _KIND_SET
+        value_type = args[0]
+    elif origin is list:
+        kind = _KIND_LIST
+        value_type = args[0]
+    elif origin is dict:
+        kind = _KIND_DICT
+        key_type, value_type = args
+        assert key_type == str
+    elif origin is not None and sys.version_info < (3, 8):
+        raise Exception(f"Unsupported typehint __origin__ = {origin}.")
+    else:
+        value_type = annotation_type
+        kind = _KIND_VALUE
 
-        optional = implicit_optional
+    item = _get_plan(value_type, key_transformer, implicit_optional)
+    if kind == _KIND_VALUE and item is not None:
+        kind = _KIND_DATACLASS
 
+    return _FieldPlan(annotation_name, key, optional, kind, value_type, item)
+
+
+# NOTE(braynstorm):
+#   Class attributes that are generated by @dataclass (or by `type`), and must
+#   not be copied to the slotted class.
+_NOT_COPIED_TO_SLOTTED = frozenset(
+    (
+        "__annotations__",
+        "__dataclass_fields__",
+        "__dataclass_params__",
+        "__delattr__",
+        "__dict__",
+        "__doc__",
+        "__eq__",
+        "__ge__",
+        "__getstate__",
+        "__gt__",
+        "__hash__",
+        "__init__",
+        "__le__",
+        "__lt__",
+        "__match_args__",
+        "__module__",
+        "__orig_bases__",
+        "__parameters__",
+        "__qualname__",
+        "__repr__",
+        "__setattr__",
+        "__setstate__",
+        "__slots__",
+        "__weakref__",
+    )
+)
+
+_slotted_cache: "weakref.WeakKeyDictionary[Type[Any], Type[Any]]"
+_slotted_cache = weakref.WeakKeyDictionary()
+
+
+def slotted(dataclass_type: Type[T]) -> Type[T]:
+    """
+    Get a `__slots__` equivalent of `dataclass_type`.
+
+    Works on every Python version (before `@dataclass(slots=True)` existed) and
+    flattens inheritance - the fields of all base dataclasses become slots of
+    the new class, so its instances have no `__dict__` at all. That also means
+    the new class is *not* a subclass of `dataclass_type`.
+
+    The fields (with defaults, `field()` options and resolved type hints), the
+    @dataclass options and the methods defined in `dataclass_type` and its
+    bases are carried over; methods generated by @dataclass are regenerated.
+    Methods relying on `super()` or on the class cell will not work.
+
+    Slotted classes are cached, so `slotted(T) is slotted(T)`. Their instances
+    can be copied and pickled (`dataclass_type` must be picklable).
+
+    >>> SlottedPoint = slotted(Point)
+    >>> to_dataclass(Point, data, slots=True)  # returns SlottedPoint instances
+    """
+    with _plan_cache_lock:
+        existing = _slotted_cache.get(dataclass_type)
+        if existing is not None:
+            return existing
+
+        if all("__slots__" in c.__dict__ for c in dataclass_type.__mro__[:-1]):
+            return dataclass_type
+
+        namespace: Dict[str, Any] = dict()
+        for c in reversed(dataclass_type.__mro__[:-1]):
+            for name, value in c.__dict__.items():
+                if name not in _NOT_COPIED_TO_SLOTTED:
+                    namespace[name] = value
+
+        hints = _type_hints(dataclass_type)
+        dataclass_fields = fields(dataclass_type)  # type: ignore
+        annotations: Dict[str, Any] = dict()
+        for f in dataclass_fields:
+            kwargs = dict(
+                init=f.init,
+                repr=f.repr,
+                hash=f.hash,
+                compare=f.compare,
+                metadata=f.metadata,
+            )
+            if f.default is not MISSING:
+                kwargs["default"] = f.default
+            if f.default_factory is not MISSING:  # type: ignore
+                kwargs["default_factory"] = f.default_factory  # type: ignore
+            if hasattr(f, "kw_only"):
+                kwargs["kw_only"] = f.kw_only  # type: ignore
+
+            namespace[f.name] = field(**kwargs)  # type: ignore
+            annotations[f.name] = hints.get(f.name, f.type)
+
+        namespace.update(
+            __annotations__=annotations,
+            __module__=dataclass_type.__module__,
+            __qualname__=dataclass_type.__qualname__,
+            __doc__=dataclass_type.__doc__,
+        )
+
+        params = dataclass_type.__dataclass_params__  # type: ignore
+        cls: Type[Any] = dataclass(
+            init=params.init,
+            repr=params.repr,
+            eq=params.eq,
+            order=params.order,
+            unsafe_hash=params.unsafe_hash,
+            frozen=params.frozen,
+        )(type(dataclass_type.__name__, (), namespace))
+
+        # NOTE(braynstorm):
+        #   Same as what @dataclass(slots=True) does - recreate the class with
+        #   __slots__, without the class attributes holding the defaults (the
+        #   defaults are already baked in the generated __init__).
+        cls_dict = dict(cls.__dict__)
+        field_names = tuple(f.name for f in fields(cls))
+        for name in field_names:
+            cls_dict.pop(name, None)
+        cls_dict.pop("__dict__", None)
+        cls_dict.pop("__weakref__", None)
+        cls_dict["__slots__"] = field_names
         # NOTE(braynstorm):
-        #   typing._GenericAlias is inaccessible, except:
-        #   - Dict.__class__ is typing._GenericAlias
-        #   - List.__class__ is typing._GenericAlias
-        #   - Set.__class__  is typing._GenericAlias
-        is_generic_alias = isinstance(annotation_type, List.__class__)
+        #   The slotted class has the `__qualname__` of `dataclass_type`, so
+        #   pickle can not find it by name - instances are rebuilt from
+        #   `dataclass_type` instead (which copy/deepcopy use too, bypassing
+        #   the frozen `__setattr__`).
+        cls_dict["__reduce__"] = _reduce_slotted
+        cls_dict["__dictaclass_slotted_from__"] = weakref.ref(dataclass_type)
+
+        metaclass: Any = type(cls)
+        result = metaclass(cls.__name__, cls.__bases__, cls_dict)
+        _slotted_cache[dataclass_type] = result
+        return result
+
+
+def _reduce_slotted(obj: Any) -> Tuple[Any, ...]:
+    cls = type(obj)
+    dataclass_type = cls.__dictaclass_slotted_from__()
+    state = tuple(getattr(obj, name) for name in cls.__slots__)
+    return _new_slotted, (dataclass_type, state)
+
+
+def _new_slotted(dataclass_type: Type[Any], state: Tuple[Any, ...]) -> Any:
+    cls = slotted(dataclass_type)
+    obj = object.__new__(cls)
+    for name, value in zip(cls.__slots__, state):
+        object.__setattr__(obj, name, value)
+    return obj
+
+
+def clear_cache() -> None:
+    """
+    Drop every cached decoding plan.
+
+    Plans are cached per (dataclass type, key transformer, implicit optional)
+    in a bounded LRU cache, so calling this is only needed when the dataclasses
+    themselves are redefined at runtime (tests, reloads).
+    """
+    with _plan_cache_lock:
+        _plan_cache.clear()
+        _code_cache.clear()
+
+
+_MISSING = object()
+
+
+class _DecoderOptions(NamedTuple):
+    """
+    Everything that changes the generated decoder, besides the plan itself.
+    """
+
+    memoize_keys: bool = True
+    trusted: bool = False
+    slots: bool = False
+    intern: bool = False
+    profile: bool = False
+    # NOTE(braynstorm):
+    #   False when `on_extra_field` is not set - nothing to report them to.
+    extra_fields: bool = True
+
+
+class InternPool:
+    """
+    Size-bounded pool of shared (interned) frozen dataclass instances.
+
+    Pass the same pool to many `to_dataclass(..., intern=pool)` calls to
+    share equal frozen dataclasses between all of them. When the pool is
+    full, the oldest instances are evicted (but remain valid, of course).
+    """
+
+    __slots__ = ("maxsize", "_pool")
+
+    def __init__(self, maxsize: int = 1 << 16) -> None:
+        self.maxsize = maxsize
+        self._pool: Dict[Any, Any] = dict()
 
+    def __call__(self, obj: T, key: Hashable) -> T:
+        """
+        The pooled instance for `key` (the types and values of the fields of
+        `obj`), or `obj` itself, which is added to the pool.
+        """
+        pool = self._pool
+        existing = pool.get(key)
+        if existing is not None:
+            return existing
+
+        pool[key] = obj
+        if len(pool) > self.maxsize:
+            del pool[next(iter(pool))]
+        return obj
+
+    def __len__(self) -> int:
+        return len(self._pool)
+
+    def clear(self) -> None:
+        self._pool.clear()
+
+
+class DecoderStats:
+    """
+    Statistics of the decoders that ran inside a `collect_stats()` block.
+
+    Per dataclass type: the number of decoder calls (including the ones with
+    `None` data), the cumulative time spent in them (including nested
+    dataclasses), the number of objects created, and per list/set/dict
+    field, the number of elements decoded.
+    """
+
+    def __init__(self) -> None:
+        # NOTE(braynstorm):
+        #   [calls, seconds, objects] - a list, to update it in place.
+        self.types: Dict[Type[Any], List[Any]] = dict()
+        self.elements: Dict[Type[Any], Dict[str, int]] = dict()
         # NOTE(braynstorm):
-        #   Remap Optional[X](== Union[X, NoneType]) to X, and set `optional`.
-        if is_generic_alias:
-            if annotation_type.__origin__ is Union:
-                args = list(annotation_type.__args__)
-                type_none = type(None)
-                len_args = len(args)
-                optional = type_none in args
-
-                assert (
-                    len_args == 2 and optional
-                ), "dictaclass doesn't support real Unions."
-                args.remove(type_none)
-
-                annotation_type = args[0]
-                is_generic_alias = isinstance(annotation_type, List.__class__)
-
-        if dict_value is None:
-            assert optional, f"dictaclass key '{key}' is not optional."
-
-            dataclass_dict[annotation_name] = None
+        #   The same stats can be recorded to by many threads (a
+        #   `compile_decoder` decoder shared by a thread pool...).
+        self._lock = threading.Lock()
+
+    def record(self, dataclass_type: Type[Any], seconds: float, created: bool) -> None:
+        with self._lock:
+            counters = self.types.get(dataclass_type)
+            if counters is None:
+                counters = self.types[dataclass_type] = [0, 0.0, 0]
+            counters[0] += 1
+            counters[1] += seconds
+            counters[2] += created
+
+    def count(self, dataclass_type: Type[Any], name: str, elements: int) -> None:
+        with self._lock:
+            counts = self.elements.get(dataclass_type)
+            if counts is None:
+                counts = self.elements[dataclass_type] = dict()
+            counts[name] = counts.get(name, 0) + elements
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The statistics, keyed by the qualified name of the dataclass types,
+        slowest first.
+        """
+        with self._lock:
+            types = [(t, list(counters)) for t, counters in self.types.items()]
+            elements = {t: dict(counts) for t, counts in self.elements.items()}
+
+        result: Dict[str, Dict[str, Any]] = dict()
+        ordered = sorted(types, key=lambda item: -item[1][1])
+        for dataclass_type, (calls, seconds, objects) in ordered:
+            result[dataclass_type.__qualname__] = dict(
+                calls=calls,
+                seconds=seconds,
+                objects=objects,
+                elements=elements.get(dataclass_type, {}),
+            )
+        return result
+
+    def report(self) -> str:
+        """
+        The statistics as a printable table, slowest first.
+        """
+        lines = [f"{'type':<32} {'calls':>10} {'objects':>10} {'seconds':>12}"]
+        for name, stats in self.as_dict().items():
+            lines.append(
+                f"{name:<32} {stats['calls']:>10} {stats['objects']:>10}"
+                f" {stats['seconds']:>12.6f}"
+            )
+            for field_name, elements in stats["elements"].items():
+                lines.append(f"    .{field_name:<26} {elements:>10} elements")
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.types.clear()
+            self.elements.clear()
+
+    def __str__(self) -> str:
+        return self.report()
+
+
+# NOTE(braynstorm):
+#   A context variable, not a global - every thread and asyncio task has its
+#   own, so concurrent code outside of the `with` block is not recorded.
+_active_stats: "contextvars.ContextVar[Optional[DecoderStats]]"
+_active_stats = contextvars.ContextVar("dictaclass_active_stats", default=None)
+
+
+@contextlib.contextmanager
+def collect_stats(stats: Optional[DecoderStats] = None) -> Iterator[DecoderStats]:
+    """
+    Record `DecoderStats` of every conversion inside the `with` block.
+
+    >>> with collect_stats() as stats:
+    >>>     orders = to_dataclasses(Order, json.loads(source))
+    >>> print(stats.report())
+
+    Outside of the block, the regular (not instrumented) decoders are used,
+    so the instrumentation costs nothing. Decoders created by
+    `compile_decoder` inside the block keep recording to `stats` after it.
+    Lazy conversion is not recorded.
+
+    Only the conversions of the current thread (or asyncio task) are
+    recorded - other threads and tasks are not, even while the block runs.
+
+    Args:
+        stats (DecoderStats | None, optional):
+            Add to these statistics instead of new ones.
+    """
+    if stats is None:
+        stats = DecoderStats()
+
+    token = _active_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+def _intern_str(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def _value_expr(
+    kind: int,
+    item: Optional[str],
+    value_type: Any,
+    value: str,
+    args: str,
+    options: _DecoderOptions,
+) -> str:
+    """
+    Python expression converting `value` according to the field `kind`.
+
+    `item` is the name of the decoder of the stored dataclass, if any, and
+    `args` are the extra arguments passed to it.
+    """
+    intern_str = options.intern and value_type is str
+    if kind == _KIND_VALUE:
+        return f"_intern_str({value})" if intern_str else value
+    if kind == _KIND_DATACLASS:
+        return f"{item}({value}, {args})"
+
+    if item is not None:
+        element = f"{item}(v, {args})"
+    elif intern_str:
+        element = "_intern_str(v)"
+    else:
+        element = None
+
+    if kind == _KIND_LIST:
+        if element is None:
+            return value if options.trusted else f"list({value})"
+        return f"[{element} for v in {value}]"
+    if kind == _KIND_SET:
+        if element is None:
+            return f"set({value})"
+        return f"{{{element} for v in {value}}}"
+
+    if options.intern:
+        return f"{{_intern_str(k): {element or 'v'} for k, v in {value}.items()}}"
+    if element is None:
+        return value if options.trusted else f"dict({value})"
+    return f"{{k: {element} for k, v in {value}.items()}}"
+
+
+def _internable(plan: _Plan) -> bool:
+    """
+    Can instances of the plan's dataclass be interned (shared)?
+    """
+    dataclass_type = plan.dataclass_type
+    return (
+        dataclass_type.__dataclass_params__.frozen
+        and dataclass_type.__hash__ is not None
+        and all(f.kind in (_KIND_VALUE, _KIND_DATACLASS) for f in plan.fields)
+    )
+
+
+_NOT_IDENTIFIER = re.compile(r"[^0-9A-Za-z_]")
+
+
+def _intern_key_source(plan: _Plan) -> str:
+    """
+    Python expression of the intern pool key of `obj`.
+
+    Equal is not enough - `1 == 1.0 == True` - so the key holds the type of
+    every value too. Nested dataclasses are interned first, so they are
+    identified by their id (the interned instance keeps them alive).
+    """
+    nested = {f.name for f in plan.fields if f.kind == _KIND_DATACLASS}
+    parts = ["type(obj)"]
+    for field in fields(plan.dataclass_type):
+        value = f"obj.{field.name}"
+        if field.name in nested:
+            parts.append(f"id({value})")
+        else:
+            parts += [f"type({value})", value]
+    return f"({', '.join(parts)})"
+
+
+def _function_name(prefix: str, index: int, plan: _Plan) -> str:
+    if isinstance(plan, _UnionPlan):
+        return f"_{prefix}_{index}_Union"
+    # NOTE(braynstorm):
+    #   The name is only there to make tracebacks readable - classes created
+    #   with `type()`/`make_dataclass()` can have any name.
+    name = _NOT_IDENTIFIER.sub("_", plan.dataclass_type.__name__)
+    return f"_{prefix}_{index}_{name}"
+
+
+def _referenced_plans(plan: _Plan) -> List[_Plan]:
+    if isinstance(plan, _UnionPlan):
+        return list(plan.members.values())
+    return [f.item for f in plan.fields if f.item is not None]
+
+
+def _union_decoder_source(
+    plan: _UnionPlan,
+    indices: Dict[int, int],
+    namespace: Dict[str, Any],
+    args: str,
+    memoize_keys: bool,
+) -> List[str]:
+    """
+    Dispatch to the decoder of the member selected by the tag, with a
+    single dict lookup.
+    """
+    index = indices[id(plan)]
+    namespace[f"_plan_{index}"] = plan
+    namespace[f"_tags_{index}"] = list(plan.members)
+
+    key = repr(plan.key)
+    if not memoize_keys:
+        key = f"key_transformer({key})"
+
+    members = ", ".join(
+        _function_name("decode", indices[id(member)], member)
+        for member in plan.members.values()
+    )
+    # NOTE(braynstorm):
+    #   `_members_{index}` is filled after every decoder has been defined
+    #   (`_generate` puts the Unions last).
+    return [
+        f"def {_function_name('decode', index, plan)}(data, {args}):",
+        f"    if data is None:",
+        f"        return None",
+        f"    assert isinstance(data, dict)",
+        f"    try:",
+        f"        decoder = _members_{index}[data[{key}]]",
+        f"    except (KeyError, TypeError):",
+        f"        raise _plan_{index}.tag_error(data) from None",
+        f"    return decoder(data, {args})",
+        f"",
+        f"_members_{index} = dict(zip(_tags_{index}, ({members},)))",
+    ]
+
+
+def _has_slots(dataclass_type: Type[Any]) -> bool:
+    """
+    Does any class in the MRO of `dataclass_type` use `__slots__`?
+    """
+    return any("__slots__" in vars(c) for c in dataclass_type.__mro__[:-1])
+
+
+def _default_source(
+    plan: _Plan,
+    field: Any,
+    suffix: str,
+    namespace: Dict[str, Any],
+) -> List[str]:
+    """
+    The `else` branch for a field missing from the data, when `__init__` is
+    not called: what `__init__` would do - use the default, or raise.
+    """
+    name = repr(field.name)
+    if field.default is not MISSING:
+        namespace[f"_default_{suffix}"] = field.default
+        return [
+            f"    else:",
+            f"        kwargs[{name}] = _default_{suffix}",
+        ]
+    if field.default_factory is not MISSING:  # type: ignore
+        namespace[f"_factory_{suffix}"] = field.default_factory  # type: ignore
+        return [
+            f"    else:",
+            f"        kwargs[{name}] = _factory_{suffix}()",
+        ]
+    if not field.init:
+        return []
+
+    message = (
+        f"{plan.dataclass_type.__name__} is missing required field '{field.name}'"
+    )
+    return [
+        f"    else:",
+        f"        raise TypeError({message!r})",
+    ]
+
+
+def _unselected_source(
+    plan: _Plan,
+    index: int,
+    trusted: bool,
+    namespace: Dict[str, Any],
+) -> List[str]:
+    """
+    Fill the fields left out by `only=`: `UNSELECTED` for the required ones,
+    and (when `__init__` is not called) the defaults of the others.
+    """
+    lines = []
+    for i, field in enumerate(plan.unselected):
+        name = repr(field.name)
+        suffix = f"{index}_unselected_{i}"
+        if field.default is not MISSING:
+            if trusted:
+                namespace[f"_default_{suffix}"] = field.default
+                lines.append(f"    kwargs[{name}] = _default_{suffix}")
+        elif field.default_factory is not MISSING:  # type: ignore
+            if trusted:
+                namespace[f"_factory_{suffix}"] = field.default_factory  # type: ignore
+                lines.append(f"    kwargs[{name}] = _factory_{suffix}()")
+        elif field.init:
+            lines.append(f"    kwargs[{name}] = _UNSELECTED")
+    return lines
+
+
+def _decoder_source(
+    plan: _Plan,
+    indices: Dict[int, int],
+    namespace: Dict[str, Any],
+    options: _DecoderOptions,
+) -> List[str]:
+    index = indices[id(plan)]
+    args = "on_extra_field"
+    memoize_keys = options.memoize_keys
+    if memoize_keys:
+        all_fields = (plan.base or plan).fields
+        namespace[f"_keys_{index}"] = frozenset(f.key for f in all_fields)
+    else:
+        # NOTE(braynstorm):
+        #   Keys are not memoized - `key_transformer` is called for every field
+        #   of every object.
+        args += ", key_transformer"
+    if options.intern:
+        args += ", intern"
+    if options.profile:
+        args += ", stats"
+
+    if isinstance(plan, _UnionPlan):
+        return _union_decoder_source(plan, indices, namespace, args, memoize_keys)
+
+    # NOTE(braynstorm):
+    #   `_cls_` is the class constructed (the `slotted` one with `slots`),
+    #   `_type_` the dataclass reported to `on_extra_field` and the stats.
+    if options.slots:
+        namespace[f"_cls_{index}"] = slotted(plan.dataclass_type)
+    namespace[f"_type_{index}"] = plan.dataclass_type
+
+    function_name = _function_name("decode", index, plan)
+    lines: List[str] = []
+    if options.profile:
+        lines += [
+            f"def {function_name}(data, {args}):",
+            f"    start = _perf_counter()",
+            f"    obj = {function_name}_profiled(data, {args})",
+            f"    elapsed = _perf_counter() - start",
+            f"    stats.record(_type_{index}, elapsed, obj is not None)",
+            f"    return obj",
+            f"",
+        ]
+        function_name += "_profiled"
+
+    # NOTE(braynstorm):
+    #   Trusted data is not validated (no type assertions, no extra keys), and
+    #   the instances are created without calling `__init__`/`__post_init__`.
+    trusted = options.trusted
+    dataclass_fields = {f.name: f for f in fields(plan.dataclass_type)}
+    check_extra_keys = options.extra_fields and not trusted
+
+    lines += [
+        f"def {function_name}(data, {args}):",
+        f"    if data is None:",
+        f"        return None",
+    ]
+    if not trusted:
+        lines.append(f"    assert isinstance(data, dict)")
+    lines.append(f"    kwargs = {{}}")
+    key_names: List[str] = []
+
+    for i, field_plan in enumerate(plan.fields):
+        field = dataclass_fields.get(field_plan.name)
+        if trusted and field is None:
             continue
 
-        if is_generic_alias:
-            origin = annotation_type.__origin__
-            args = annotation_type.__args__
-            if origin == set:
-                value_type = args[0]
-                dataclass_dict[annotation_name] = set(
-                    _to_dataclass_37(
-                        value_type,
-                        v,
-                        key_transformer,
-                        on_extra_field,
-                        implicit_optional,
-                    )
-                    for v in dict_value
-                )
-            elif origin == list:
-                value_type = args[0]
-                dataclass_dict[annotation_name] = [
-                    _to_dataclass_37(
-                        value_type,
-                        v,
-                        key_transformer,
-                        on_extra_field,
-                        implicit_optional,
-                    )
-                    for v in dict_value
-                ]
-            elif origin == dict:
-                key_type = args[0]
-                value_type = args[1]
-                assert key_type == str
-                dataclass_dict[annotation_name] = {
-                    k: _to_dataclass_37(
-                        value_type,
-                        v,
-                        key_transformer,
-                        on_extra_field,
-                        implicit_optional,
-                    )
-                    for k, v in dict_value.items()
-                }
-            else:
-                raise Exception(f"Unsupported typehint __origin__ = {origin}.")
+        name = repr(field_plan.name)
+        item = None
+        if field_plan.item is not None:
+            item_index = indices[id(field_plan.item)]
+            item = _function_name("decode", item_index, field_plan.item)
+
+        if field_plan.kind == _KIND_PACKED:
+            converter = f"_packed_{index}_{i}"
+            namespace[converter] = field_plan.value_type.converter()
+            value = f"{converter}(value)"
+        else:
+            value = _value_expr(
+                field_plan.kind,
+                item,
+                field_plan.value_type,
+                "value",
+                args,
+                options,
+            )
+
+        if memoize_keys:
+            message = repr(f"dictaclass key '{field_plan.key}' is not optional.")
+            lines += [
+                f"    value = data.get({field_plan.key!r}, _MISSING)",
+                f"    if value is not _MISSING:",
+            ]
+        else:
+            message = f"\"dictaclass key '%s' is not optional.\" % key_{i}"
+            key_names.append(f"key_{i}")
+            lines += [
+                f"    key_{i} = key_transformer({name})",
+                f"    value = data.get(key_{i}, _MISSING)",
+                f"    if value is not _MISSING:",
+            ]
+
+        if options.profile and field_plan.kind in (_KIND_LIST, _KIND_SET, _KIND_DICT):
+            lines.append(
+                f"        stats.count(_type_{index}, {name}, "
+                f"0 if value is None else len(value))"
+            )
+
+        if field_plan.optional:
+            lines += [
+                f"        if value is None:",
+                f"            kwargs[{name}] = None",
+                f"        else:",
+                f"            kwargs[{name}] = {value}",
+            ]
         else:
-            dataclass_dict[annotation_name] = _to_dataclass_37(
-                annotation_type,
-                dict_value,
+            lines += [
+                f"        assert value is not None, {message}",
+                f"        kwargs[{name}] = {value}",
+            ]
+
+        if trusted:
+            assert field is not None
+            lines += _default_source(plan, field, f"{index}_{i}", namespace)
+
+    if check_extra_keys:
+        # NOTE(braynstorm):
+        #   Every key in `kwargs` came from `data`, so there are extra keys
+        #   only if `data` has more keys than `kwargs`.
+        if memoize_keys:
+            used_keys = f"_keys_{index}"
+        else:
+            if plan.base is not None:
+                selected = {f.name for f in plan.fields}
+                key_names += [
+                    f"key_transformer({f.name!r})"
+                    for f in plan.base.fields
+                    if f.name not in selected
+                ]
+            used_keys = f"{{{', '.join(key_names)}}}" if key_names else "()"
+        lines += [
+            f"    if len(data) != len(kwargs):",
+            f"        for key in data.keys() - {used_keys}:",
+            f"            on_extra_field(_type_{index}, key, data[key])",
+        ]
+
+    lines += _unselected_source(plan, index, trusted, namespace)
+
+    if not trusted:
+        construct = f"_cls_{index}(**kwargs)"
+    elif _has_slots(namespace[f"_cls_{index}"]):
+        lines += [
+            f"    obj = _new(_cls_{index})",
+            f"    for name, value in kwargs.items():",
+            f"        _setattr(obj, name, value)",
+        ]
+        construct = "obj"
+    else:
+        lines += [
+            f"    obj = _new(_cls_{index})",
+            f"    _setattr(obj, '__dict__', kwargs)",
+        ]
+        construct = "obj"
+
+    if options.intern and _internable(plan):
+        # NOTE(braynstorm):
+        #   Fields typed as Any (or anything else) can still hold unhashable
+        #   values - those instances are simply not interned.
+        if construct != "obj":
+            lines.append(f"    obj = {construct}")
+        lines += [
+            f"    try:",
+            f"        return intern(obj, {_intern_key_source(plan)})",
+            f"    except TypeError:",
+            f"        return obj",
+        ]
+    else:
+        lines.append(f"    return {construct}")
+    return lines
+
+
+def _compile(source: str) -> Any:
+    """
+    Get the (cached) code object of generated `source`.
+    """
+    with _plan_cache_lock:
+        code = _code_cache.get(source)
+        if code is not None:
+            _code_cache.move_to_end(source)
+            return code
+
+        code = _code_cache[source] = compile(source, "<dictaclass>", "exec")
+        while len(_code_cache) > _PLAN_CACHE_SIZE:
+            _code_cache.popitem(last=False)
+        return code
+
+
+def _generate(
+    plan: _Plan,
+    variant: Hashable,
+    prefix: str,
+    plan_source: Callable[[_Plan, Dict[int, int], Dict[str, Any]], List[str]],
+    namespace: Dict[str, Any],
+) -> Callable[..., Any]:
+    """
+    Generate (via `exec`, the way `dataclasses` builds `__init__`) a flat
+    function for `plan` and every plan it references that does not have one
+    yet, and store them in `functions[variant]` of the plans.
+
+    All the new functions are created in one shared namespace, so recursive
+    dataclasses simply call each other by name.
+    """
+    with _plan_cache_lock:
+        function = plan.functions.get(variant)
+        if function is not None:
+            return function
+
+        pending: List[_Plan] = []
+        indices: Dict[int, int] = dict()
+
+        stack = [plan]
+        while stack:
+            current = stack.pop()
+            if id(current) in indices:
+                continue
+
+            index = len(indices)
+            indices[id(current)] = index
+            function = current.functions.get(variant)
+            if function is not None:
+                namespace[_function_name(prefix, index, current)] = function
+                continue
+
+            pending.append(current)
+            namespace[f"_cls_{index}"] = current.dataclass_type
+            stack.extend(_referenced_plans(current))
+
+        # NOTE(braynstorm):
+        #   Unions are generated last - their dispatch tables refer to the
+        #   functions of their members.
+        pending.sort(key=lambda current: isinstance(current, _UnionPlan))
+
+        source: List[str] = []
+        for current in pending:
+            source += plan_source(current, indices, namespace)
+            source.append("")
+
+        exec(_compile("\n".join(source)), namespace)
+
+        for current in pending:
+            name = _function_name(prefix, indices[id(current)], current)
+            current.functions[variant] = namespace[name]
+
+        return plan.functions[variant]
+
+
+def _get_decoder(
+    dataclass_type: Any,
+    key_transformer: Callable[[str], str],
+    implicit_optional: bool,
+    options: _DecoderOptions = _DecoderOptions(),
+    intern: Optional[Callable[[Any, Hashable], Any]] = None,
+    only: Optional[_Mask] = None,
+) -> Optional[Callable[[Any, Callable[..., None]], Any]]:
+    """
+    Get the (cached) generated decoder of `dataclass_type`, or None if it is
+    not a dataclass.
+
+    `intern` is the intern pool, required if `options.intern` is set.
+    `only` is the (frozen) mask of the fields to decode, if any.
+    Inside `collect_stats()`, the instrumented decoder is returned.
+    """
+    stats = _active_stats.get()
+    if stats is not None:
+        options = options._replace(profile=True)
+
+    if options.memoize_keys:
+        plan = _get_plan(dataclass_type, key_transformer, implicit_optional)
+    else:
+        plan = _get_plan(dataclass_type, _transformer_noop, implicit_optional)
+    if plan is None:
+        return None
+
+    if only is not None:
+        plan = _project(
+            plan,
+            only,
+            key_transformer if options.memoize_keys else _transformer_noop,
+            implicit_optional,
+        )
+
+    variant = ("decode", options)
+    decoder = plan.functions.get(variant) or _generate(
+        plan,
+        variant,
+        "decode",
+        functools.partial(_decoder_source, options=options),
+        dict(
+            _MISSING=_MISSING,
+            _intern_str=_intern_str,
+            _perf_counter=time.perf_counter,
+            _new=object.__new__,
+            _setattr=object.__setattr__,
+            _UNSELECTED=UNSELECTED,
+        ),
+    )
+
+    extra_args: Tuple[Any, ...] = ()
+    if not options.memoize_keys:
+        extra_args += (key_transformer,)
+    if options.intern:
+        assert intern is not None
+        extra_args += (intern,)
+    if stats is not None:
+        extra_args += (stats,)
+
+    if not extra_args:
+        return decoder
+
+    return lambda data, on_extra_field: decoder(data, on_extra_field, *extra_args)
+
+
+def _intern_pool(
+    intern: Union[bool, InternPool],
+) -> Optional[Callable[[Any, Hashable], Any]]:
+    """
+    The intern pool for a single `intern=...` call.
+    """
+    if intern is True:
+        pool: Dict[Any, Any] = dict()
+        return lambda obj, key: pool.setdefault(key, obj)
+    if intern is False:
+        return None
+    return intern
+
+
+def _iterative_decoder(
+    dataclass_type: Any,
+    key_transformer: Callable[[str], str],
+    on_extra_field: Callable[[Type, str, Any], None],
+    implicit_optional: bool,
+    slots: bool,
+    only: Optional[Any],
+) -> Callable[[Any], Any]:
+    """
+    `data -> decoded` with the explicit-stack decoder (see `dictaclass.iterative`).
+    """
+    from dictaclass.iterative import iterative_decode
+
+    plan = _get_plan(dataclass_type, key_transformer, implicit_optional)
+    if plan is None:
+        return lambda data: data
+    if only is not None:
+        plan = _project(plan, _freeze_mask(only), key_transformer, implicit_optional)
+
+    compiled: Dict[int, Any] = dict()
+    stats = _active_stats.get()
+    return lambda data: iterative_decode(
+        plan, data, on_extra_field, slots, compiled, stats
+    )
+
+
+def _check_supported(mode: str, options: Dict[str, bool]) -> None:
+    """
+    Raise a TypeError if any of the `options` that `mode` can not honour is
+    set - silently ignoring them would decode something else than asked.
+    """
+    unsupported = [name for name, used in options.items() if used]
+    if unsupported:
+        raise TypeError(
+            f"to_dataclass({mode}=True) does not support {', '.join(unsupported)}."
+        )
+
+
+def compile_decoder(
+    dataclass_type: Type[T],
+    key_transformer: Optional[Callable[[str], str]] = None,
+    on_extra_field: Optional[Callable[[Type, str, Any], None]] = None,
+    implicit_optional: bool = False,
+    memoize_keys: bool = True,
+    trusted: bool = False,
+    slots: bool = False,
+    intern: Union[bool, InternPool] = False,
+    only: Optional[Any] = None,
+) -> Callable[[Any], T]:
+    """
+    Create a reusable decoder function for `dataclass_type`.
+
+    The decoder is generated Python code specialized for the dataclass
+    (and every nested dataclass) - no per-field loops, no type inspection.
+    `decoder(data)` is equivalent to `to_dataclass(dataclass_type, data,
+    key_transformer, on_extra_field, implicit_optional)`.
+
+    >>> decode_shape = compile_decoder(Shape)
+    >>> shapes = [decode_shape(d) for d in json.loads(source)]
+
+    Args:
+        See `to_dataclass`.
+    Returns:
+        Callable[[Any], T]: The decoder.
+    """
+    if key_transformer is None:
+        key_transformer = _transformer_noop
+
+    if on_extra_field is None:
+        on_extra_field = _on_extra_field_noop
+
+    options = _DecoderOptions(
+        memoize_keys,
+        trusted,
+        slots,
+        intern is not False,
+        extra_fields=on_extra_field is not _on_extra_field_noop,
+    )
+    mask = None if only is None else _freeze_mask(only)
+    root = _get_decoder(
+        dataclass_type,
+        key_transformer,
+        implicit_optional,
+        options,
+        _intern_pool(intern),
+        mask,
+    )
+    if root is None:
+        return lambda data: data
+
+    extra_field_handler = on_extra_field
+
+    if intern is True:
+        # NOTE(braynstorm):
+        #   A new pool for every call, like for `to_dataclass`.
+        def interning_decoder(data: Any) -> T:
+            root = _get_decoder(
+                dataclass_type,
                 key_transformer,
-                on_extra_field,
                 implicit_optional,
+                options,
+                _intern_pool(True),
+                mask,
             )
+            return root(data, extra_field_handler)  # type: ignore
 
-    extra_keys = set(data.keys())
-    extra_keys.difference_update(used_keys)
+        return interning_decoder
 
-    for field in extra_keys:
-        value = data[field]
-        on_extra_field(dataclass_type, field, value)
+    def decoder(data: Any) -> T:
+        return root(data, extra_field_handler)
 
-    return dataclass_type(**dataclass_dict)
+    return decoder
 
 
 def to_dataclass(
@@ -247,6 +1661,13 @@ def to_dataclass(
     key_transformer: Optional[Callable[[str], str]] = None,
     on_extra_field: Optional[Callable[[Type, str, Any], None]] = None,
     implicit_optional: bool = False,
+    lazy: bool = False,
+    memoize_keys: bool = True,
+    trusted: bool = False,
+    slots: bool = False,
+    intern: Union[bool, InternPool] = False,
+    only: Optional[Any] = None,
+    iterative: bool = False,
 ) -> T:
     """
     Convert nested dicts/lists to a dataclass structure.
@@ -289,6 +1710,46 @@ def to_dataclass(
             Args: the dataclass type, name of the field, value of the field.
         implicit_optional (bool, optional:
             When set to True, every field is interpreted as Optional[T].
+        lazy (bool, optional):
+            When set to True, return a lazy proxy (a subclass of the dataclass)
+            whose fields are converted from `data` only when first accessed.
+            See `dictaclass.lazy`.
+        memoize_keys (bool, optional):
+            `key_transformer` is called once per field of every dataclass type,
+            and the results are cached (together with the generated decoders).
+            Set to False if `key_transformer` can return different keys for
+            the same field name, to call it for every field of every object
+            instead. Not supported when `lazy` is True.
+        trusted (bool, optional):
+            When set to True, `data` is trusted to be well-formed (e.g. it was
+            produced by `dataclass_to_dict`): lists and dicts of non-dataclass
+            values are reused as they are, instead of being copied, and the
+            dataclasses are created without calling `__init__` (nor
+            `__post_init__`) - the fields are set directly, even on frozen
+            dataclasses. `data` is not type-checked, and `on_extra_field`
+            is not called. Not supported when `lazy` is True.
+        slots (bool, optional):
+            When set to True, every dataclass (the root and the nested ones)
+            is constructed as its `slotted` equivalent, whose instances
+            use `__slots__` instead of a `__dict__`. Not supported when `lazy`
+            is True.
+        intern (bool | InternPool, optional):
+            When set to True, equal frozen dataclasses (without list/set/dict
+            fields) decoded in this call are the same (shared) object, and
+            strings are `sys.intern`ed. Pass an `InternPool` to share the
+            objects between calls. Not supported when `lazy` is True.
+        only (Dict[str, Any] | Set[str] | None, optional):
+            Decode only these fields: a set of field names, or a dict of
+            field name -> the mask of the nested dataclass(es) (or True for
+            the whole field), e.g. `{"customer": {"id"}, "items": {"sku"}}`.
+            The other fields get their defaults, or `UNSELECTED` if they have
+            none, and their keys do not count as extra fields. Not supported
+            when `lazy` is True.
+        iterative (bool, optional):
+            When set to True, decode with an explicit stack instead of the
+            generated (recursive) decoders, for data nested deeper than the
+            recursion limit. Not supported with `memoize_keys=False`,
+            `trusted` or `intern`. See `dictaclass.iterative`.
     Returns:
         T: _description_
 
@@ -300,26 +1761,330 @@ def to_dataclass(
     if on_extra_field is None:
         on_extra_field = _on_extra_field_noop
 
-    if sys.version_info.minor >= 8:
-        return _to_dataclass_38(
+    if lazy:
+        from dictaclass.lazy import lazy_decode
+
+        _check_supported(
+            "lazy",
+            {
+                "memoize_keys=False": not memoize_keys,
+                "trusted": trusted,
+                "slots": slots,
+                "intern": intern is not False,
+                "only": only is not None,
+                "iterative": iterative,
+            },
+        )
+
+        plan = _get_plan(dataclass_type, key_transformer, implicit_optional)
+        return lazy_decode(plan, data, on_extra_field)
+
+    if iterative:
+        _check_supported(
+            "iterative",
+            {
+                "memoize_keys=False": not memoize_keys,
+                "trusted": trusted,
+                "intern": intern is not False,
+            },
+        )
+        return _iterative_decoder(
             dataclass_type,
-            data,
             key_transformer,
             on_extra_field,
             implicit_optional,
+            slots,
+            only,
+        )(data)
+
+    decoder = _get_decoder(
+        dataclass_type,
+        key_transformer,
+        implicit_optional,
+        _DecoderOptions(
+            memoize_keys,
+            trusted,
+            slots,
+            intern is not False,
+            extra_fields=on_extra_field is not _on_extra_field_noop,
+        ),
+        _intern_pool(intern),
+        None if only is None else _freeze_mask(only),
+    )
+    if decoder is None:
+        return data
+
+    return decoder(data, on_extra_field)
+
+
+def to_dataclasses(
+    dataclass_type: Type[T],
+    items: Iterable[Any],
+    key_transformer: Optional[Callable[[str], str]] = None,
+    on_extra_field: Optional[Callable[[Type, str, Any], None]] = None,
+    implicit_optional: bool = False,
+    generator: bool = False,
+    memoize_keys: bool = True,
+    trusted: bool = False,
+    slots: bool = False,
+    intern: Union[bool, InternPool] = False,
+    only: Optional[Any] = None,
+    iterative: bool = False,
+) -> Union[List[T], Iterator[T]]:
+    """
+    Convert many dicts of the same shape to dataclasses.
+
+    Equivalent to `[to_dataclass(dataclass_type, item, ...) for item in items]`,
+    but the argument defaulting and the decoder lookup happen only once.
+
+    >>> points = to_dataclasses(Point, json.loads(source))
+
+    Args:
+        dataclass_type (Type[T]): The type of every item.
+        items (Iterable[Any]): json.loads()'d items.
+        key_transformer, on_extra_field, implicit_optional, memoize_keys,
+        trusted, slots, intern, only, iterative:
+            See `to_dataclass`.
+        generator (bool, optional):
+            When set to True, return a generator decoding the items one at a
+            time, instead of a list.
+    Returns:
+        List[T] | Iterator[T]: The decoded items, in order.
+    """
+    if key_transformer is None:
+        key_transformer = _transformer_noop
+
+    if on_extra_field is None:
+        on_extra_field = _on_extra_field_noop
+
+    if iterative:
+        _check_supported(
+            "iterative",
+            {
+                "memoize_keys=False": not memoize_keys,
+                "trusted": trusted,
+                "intern": intern is not False,
+            },
         )
-    else:
-        return _to_dataclass_37(
+        iterative_decoder = _iterative_decoder(
             dataclass_type,
-            data,
             key_transformer,
             on_extra_field,
             implicit_optional,
+            slots,
+            only,
         )
+        if generator:
+            return (iterative_decoder(item) for item in items)
+        return [iterative_decoder(item) for item in items]
+
+    decoder = _get_decoder(
+        dataclass_type,
+        key_transformer,
+        implicit_optional,
+        _DecoderOptions(
+            memoize_keys,
+            trusted,
+            slots,
+            intern is not False,
+            extra_fields=on_extra_field is not _on_extra_field_noop,
+        ),
+        _intern_pool(intern),
+        None if only is None else _freeze_mask(only),
+    )
+    if decoder is None:
+        if generator:
+            return iter(items)
+        return list(items)
+
+    if generator:
+        return (decoder(item, on_extra_field) for item in items)
+    return [decoder(item, on_extra_field) for item in items]
+
+
+_IMMUTABLE_TYPES = frozenset((int, float, complex, bool, str, bytes, type(None)))
+
+
+def _encode_any(value: Any, key_transformer: Callable[[str], str]) -> Any:
+    """
+    Encode a value whose type is not known ahead of time (the equivalent of
+    what `dataclasses.asdict` does for every value).
+    """
+    value_type = type(value)
+    if value_type in _IMMUTABLE_TYPES:
+        return value
+    if is_dataclass(value_type):
+        return _get_encoder(value_type, key_transformer)(value)
+    if isinstance(value, array.array):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return [_encode_any(v, key_transformer) for v in value]
+    if isinstance(value, list):
+        return [_encode_any(v, key_transformer) for v in value]
+    if isinstance(value, tuple):
+        items = [_encode_any(v, key_transformer) for v in value]
+        if hasattr(value, "_fields"):
+            # NOTE(braynstorm): namedtuple
+            return value_type(*items)
+        return value_type(items)
+    if isinstance(value, dict):
+        return value_type(
+            (_encode_any(k, key_transformer), _encode_any(v, key_transformer))
+            for k, v in value.items()
+        )
+    return deepcopy(value)
+
+
+def _packed_to_list(value: Any) -> List[Any]:
+    # NOTE(braynstorm):
+    #   Decoded packed fields are arrays, but instances built by hand may
+    #   hold plain lists (or any iterable of numbers).
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return list(value)
+
+
+def _encoded_expr(field_plan: _FieldPlan, item: Optional[str], value: str) -> str:
+    """
+    Python expression encoding `value` (which is not None) according to the
+    field plan. `item` is the name of the encoder of the stored dataclass, if any.
+    """
+    kind = field_plan.kind
+    if kind == _KIND_PACKED:
+        return f"_packed_to_list({value})"
 
+    if item is not None:
+        convert: Optional[str] = item + "({})"
+    elif field_plan.value_type in _IMMUTABLE_TYPES:
+        convert = None
+    else:
+        convert = "_encode_any({}, _key_transformer)"
+
+    if convert is None:
+        if kind in (_KIND_VALUE, _KIND_DATACLASS):
+            return value
+        if kind in (_KIND_LIST, _KIND_SET):
+            return f"list({value})"
+        return f"dict({value})"
+
+    if kind in (_KIND_VALUE, _KIND_DATACLASS):
+        return convert.format(value)
+    if kind in (_KIND_LIST, _KIND_SET):
+        return f"[{convert.format('v')} for v in {value}]"
+    return f"{{k: {convert.format('v')} for k, v in {value}.items()}}"
+
+
+def _encoder_source(
+    plan: _Plan,
+    indices: Dict[int, int],
+    namespace: Dict[str, Any],
+) -> List[str]:
+    index = indices[id(plan)]
+    if isinstance(plan, _UnionPlan):
+        return [
+            f"def {_function_name('encode', index, plan)}(obj):",
+            f"    return _encode_any(obj, _key_transformer)",
+        ]
+
+    dataclass_fields = {f.name: f for f in fields(plan.dataclass_type)}
+    field_plans = [f for f in plan.fields if f.name in dataclass_fields]
+
+    lines = [
+        f"def {_function_name('encode', index, plan)}(obj):",
+        f"    if type(obj) is not _cls_{index}:",
+        f"        return _encode_any(obj, _key_transformer)",
+    ]
+    items = []
+    # NOTE(braynstorm):
+    #   Required fields are `UNSELECTED` in the results of `only=`, and are
+    #   left out of the output - checked once, before the fast path.
+    unselectable = []
+    for i, field_plan in enumerate(field_plans):
+        item = None
+        if field_plan.item is not None:
+            item_index = indices[id(field_plan.item)]
+            item = _function_name("encode", item_index, field_plan.item)
+
+        value = f"v{i}"
+        encoded = _encoded_expr(field_plan, item, value)
+        lines.append(f"    {value} = obj.{field_plan.name}")
+        if encoded != value:
+            encoded = f"None if {value} is None else {encoded}"
+        items.append((field_plan.key, encoded))
+
+        f = dataclass_fields[field_plan.name]
+        if f.init and f.default is MISSING and f.default_factory is MISSING:
+            unselectable.append(value)
+
+    if unselectable:
+        condition = " or ".join(f"{value} is _UNSELECTED" for value in unselectable)
+        lines += [f"    if {condition}:", "        encoded = {}"]
+        for i, (key, encoded) in enumerate(items):
+            value = f"v{i}"
+            if value in unselectable:
+                lines += [
+                    f"        if {value} is not _UNSELECTED:",
+                    f"            encoded[{key!r}] = {encoded}",
+                ]
+            else:
+                lines.append(f"        encoded[{key!r}] = {encoded}")
+        lines.append("        return encoded")
+
+    fast = ", ".join(f"{key!r}: {encoded}" for key, encoded in items)
+    lines.append(f"    return {{{fast}}}")
+    return lines
+
+
+def _get_encoder(
+    dataclass_type: Any,
+    key_transformer: Callable[[str], str],
+) -> Callable[[Any], Dict[str, Any]]:
+    plan = _get_plan(dataclass_type, key_transformer, False)
+    assert plan is not None
+
+    return plan.functions.get("encode") or _generate(
+        plan,
+        "encode",
+        "encode",
+        _encoder_source,
+        dict(
+            _encode_any=_encode_any,
+            _packed_to_list=_packed_to_list,
+            _UNSELECTED=UNSELECTED,
+            _key_transformer=key_transformer,
+        ),
+    )
 
-def dataclass_to_dict(dataclassObject: Any) -> Dict[str, Any]:
+
+def dataclass_to_dict(
+    dataclassObject: Any,
+    key_transformer: Optional[Callable[[str], str]] = None,
+) -> Dict[str, Any]:
     """
     Convert a dataclass hierarchy to a simple dict/list hierarchy.
+
+    The reverse of `to_dataclass`:
+        - sets are converted to lists.
+        - `key_transformer` converts the field names to the keys of the
+          output (pass the same one that is passed to `to_dataclass`).
+        - fields left `UNSELECTED` by `only=` are left out.
+
+    Like `dataclasses.asdict`, values of unknown (mutable) types are
+    deep-copied, but immutable values (`str`, `int`, ...) are not.
+
+    Args:
+        dataclassObject (Any): The dataclass instance to convert.
+        key_transformer (Callable[[str], str] | None, optional):
+            Name transformer function, to convert dataclass field names to
+            names of the output data. Defaults to None - no transformation.
+    Returns:
+        Dict[str, Any]: The dict hierarchy.
     """
-    return asdict(dataclassObject)
+    dataclass_type = type(dataclassObject)
+    if not is_dataclass(dataclass_type):
+        raise TypeError("dataclass_to_dict() should be called on dataclass instances")
+
+    if key_transformer is None:
+        key_transformer = _transformer_noop
+
+    return _get_encoder(dataclass_type, key_transformer)(dataclassObject)
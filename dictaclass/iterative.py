@@ -0,0 +1,212 @@
+"""
+Iterative decoding: an explicit-stack decoder for deep and recursive data.
+
+The generated decoders call each other once per nesting level, so data nested
+deeper than the recursion limit (a linked list of `Node`s, a deep tree...)
+raises `RecursionError`. `to_dataclass(T, data, iterative=True)` walks the
+same plans with a stack of pending tasks instead:
+
+    - decoding a dict creates its `kwargs`, converts the plain values right
+      away, and pushes one task per nested dataclass, plus a task
+      constructing the object once all of them are done.
+    - each nested dataclass is written into its slot of the parent's
+      `kwargs` (or of the list/dict being filled) when it is constructed.
+    - dicts without nested dataclasses are constructed right away.
+
+The Python stack does not grow with the depth of the data. Inside
+`collect_stats()`, the same statistics as the generated decoders' are
+recorded.
+"""
+from dataclasses import MISSING
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+import time
+
+from dictaclass.dictaclass import (
+    _KIND_DATACLASS,
+    _KIND_DICT,
+    _KIND_LIST,
+    _KIND_PACKED,
+    _KIND_SET,
+    _KIND_VALUE,
+    _MISSING,
+    UNSELECTED,
+    DecoderStats,
+    _Plan,
+    _UnionPlan,
+    _on_extra_field_noop,
+    slotted,
+)
+
+# NOTE(braynstorm):
+#   Tasks on the stack:
+#       (_DECODE, plan, data, target, slot) - decode `data`, store it in
+#           `target[slot]`.
+#       (_CONSTRUCT, compiled, kwargs, target, slot, start) - every nested
+#           value in `kwargs` is decoded, construct the object. `start` is
+#           when its decoding started (for the stats).
+#       (_FREEZE, items, target, slot) - every item of a set is decoded,
+#           store the set.
+_DECODE = 0
+_CONSTRUCT = 1
+_FREEZE = 2
+
+_COLLECTION_KINDS = (_KIND_LIST, _KIND_SET, _KIND_DICT)
+
+# NOTE(braynstorm):
+#   (name, key, optional, kind, item plan, packed converter) of every field.
+_Steps = Tuple[Tuple[str, str, bool, int, Any, Any], ...]
+
+
+class _Compiled:
+    """
+    Everything `iterative_decode` needs about a (non-Union) plan, worked out
+    once per decoder.
+    """
+
+    __slots__ = ("dataclass_type", "cls", "steps", "keys", "unselected")
+
+    def __init__(self, plan: _Plan, slots: bool) -> None:
+        self.dataclass_type = plan.dataclass_type
+        self.cls = slotted(plan.dataclass_type) if slots else plan.dataclass_type
+        self.steps: _Steps = tuple(
+            (
+                f.name,
+                f.key,
+                f.optional,
+                f.kind,
+                f.item,
+                f.value_type.converter() if f.kind == _KIND_PACKED else None,
+            )
+            for f in plan.fields
+        )
+        self.keys = frozenset(f.key for f in (plan.base or plan).fields)
+        self.unselected = tuple(
+            f.name
+            for f in plan.unselected
+            if f.init and f.default is MISSING and f.default_factory is MISSING
+        )
+
+
+def iterative_decode(
+    plan: _Plan,
+    data: Any,
+    on_extra_field: Callable[[Type, str, Any], None],
+    slots: bool = False,
+    compiled: Optional[Dict[int, _Compiled]] = None,
+    stats: Optional[DecoderStats] = None,
+) -> Any:
+    """
+    Decode `data` with `plan`, like the generated decoders (with the keys
+    memoized, the data untrusted and nothing interned) but without recursion.
+
+    `compiled` caches the `_Compiled` plans (by id) between calls with the
+    same root plan and `slots`. `stats` records the decoded objects.
+    """
+    if compiled is None:
+        compiled = dict()
+    check_extra_keys = on_extra_field is not _on_extra_field_noop
+
+    root: List[Any] = [None]
+    stack: List[Tuple[Any, ...]] = [(_DECODE, plan, data, root, 0)]
+    push = stack.append
+    pop = stack.pop
+
+    while stack:
+        task = pop()
+        action = task[0]
+        if action == _CONSTRUCT:
+            _, constructed, arguments, target, slot, start = task
+            target[slot] = constructed.cls(**arguments)
+            if stats is not None:
+                elapsed = time.perf_counter() - start
+                stats.record(constructed.dataclass_type, elapsed, True)
+            continue
+        if action == _FREEZE:
+            _, members, target, slot = task
+            target[slot] = set(members)
+            continue
+
+        _, plan, data, target, slot = task
+        start = 0.0
+        if stats is not None:
+            start = time.perf_counter()
+        if data is None:
+            target[slot] = None
+            if stats is not None and not isinstance(plan, _UnionPlan):
+                stats.record(plan.dataclass_type, 0.0, False)
+            continue
+
+        assert isinstance(data, dict)
+        if isinstance(plan, _UnionPlan):
+            plan = plan.member(data)
+
+        current = compiled.get(id(plan))
+        if current is None:
+            current = compiled[id(plan)] = _Compiled(plan, slots)
+
+        kwargs: Dict[str, Any] = dict()
+        # NOTE(braynstorm):
+        #   Nested dataclasses, in order - pushed after the construct task,
+        #   and reversed, so they are decoded first and in order.
+        children: List[Tuple[Any, ...]] = []
+        present = 0
+        for name, key, optional, kind, item, converter in current.steps:
+            value = data.get(key, _MISSING)
+            if value is _MISSING:
+                continue
+
+            present += 1
+            if stats is not None and kind in _COLLECTION_KINDS:
+                count = 0 if value is None else len(value)
+                stats.count(current.dataclass_type, name, count)
+            if value is None:
+                assert optional, f"dictaclass key '{key}' is not optional."
+                kwargs[name] = None
+            elif kind == _KIND_VALUE:
+                kwargs[name] = value
+            elif kind == _KIND_PACKED:
+                kwargs[name] = converter(value)
+            elif item is None:
+                kwargs[name] = (
+                    list(value)
+                    if kind == _KIND_LIST
+                    else set(value)
+                    if kind == _KIND_SET
+                    else dict(value)
+                )
+            elif kind == _KIND_DATACLASS:
+                children.append((_DECODE, item, value, kwargs, name))
+            elif kind == _KIND_DICT:
+                items: Dict[Any, Any] = dict.fromkeys(value)
+                kwargs[name] = items
+                for k, v in value.items():
+                    children.append((_DECODE, item, v, items, k))
+            else:
+                elements = [None] * len(value)
+                for i, v in enumerate(value):
+                    children.append((_DECODE, item, v, elements, i))
+                if kind == _KIND_LIST:
+                    kwargs[name] = elements
+                else:
+                    children.append((_FREEZE, elements, kwargs, name))
+
+        if check_extra_keys and len(data) != present:
+            for key in data.keys() - current.keys:
+                on_extra_field(plan.dataclass_type, key, data[key])
+
+        for name in current.unselected:
+            kwargs[name] = UNSELECTED
+
+        if not children:
+            target[slot] = current.cls(**kwargs)
+            if stats is not None:
+                elapsed = time.perf_counter() - start
+                stats.record(current.dataclass_type, elapsed, True)
+            continue
+
+        push((_CONSTRUCT, current, kwargs, target, slot, start))
+        children.reverse()
+        stack += children
+
+    return root[0]
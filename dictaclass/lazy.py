@@ -0,0 +1,199 @@
+"""
+Lazy proxies: dataclasses whose fields are converted on first access.
+
+`to_dataclass(T, data, lazy=True)` returns an instance of a generated subclass
+of `T`. Each field of `T` is replaced by a property that converts the raw value
+from `data` the first time it is read, and caches the result on the instance.
+Nested dataclasses are lazy proxies themselves.
+
+Differences from the regular (eager) conversion:
+    - `__init__` and `__post_init__` of `T` are not called.
+    - Missing required fields are reported when the proxy is created, but
+      `None` values of non-optional fields only when they are accessed.
+    - `on_extra_field` is called when each proxy is created, i.e. for nested
+      dataclasses only once they are accessed.
+    - Pickling/copying a proxy produces a regular instance of `T`.
+"""
+from dataclasses import MISSING, Field, FrozenInstanceError, fields
+from typing import Any, Callable, Dict, FrozenSet, Optional, Type
+
+from dictaclass.dictaclass import (
+    _KIND_DATACLASS,
+    _KIND_LIST,
+    _KIND_PACKED,
+    _KIND_SET,
+    _KIND_VALUE,
+    _MISSING,
+    _FieldPlan,
+    _Plan,
+    _UnionPlan,
+    _on_extra_field_noop,
+    _plan_cache_lock,
+)
+
+_DATA = "__dictaclass_data__"
+_ON_EXTRA_FIELD = "__dictaclass_on_extra_field__"
+
+
+def _convert(
+    field_plan: _FieldPlan,
+    value: Any,
+    on_extra_field: Callable[[Type, str, Any], None],
+) -> Any:
+    kind = field_plan.kind
+    item = field_plan.item
+    if kind == _KIND_VALUE:
+        return value
+    if kind == _KIND_DATACLASS:
+        return lazy_decode(item, value, on_extra_field)
+    if kind == _KIND_PACKED:
+        return field_plan.value_type.converter()(value)
+    if kind == _KIND_LIST:
+        if item is None:
+            return list(value)
+        return [lazy_decode(item, v, on_extra_field) for v in value]
+    if kind == _KIND_SET:
+        if item is None:
+            return set(value)
+        return {lazy_decode(item, v, on_extra_field) for v in value}
+    if item is None:
+        return dict(value)
+    return {k: lazy_decode(item, v, on_extra_field) for k, v in value.items()}
+
+
+def _default_factory(field: Field) -> Callable[[], Any]:
+    if field.default is not MISSING:
+        default = field.default
+        return lambda: default
+    if field.default_factory is not MISSING:  # type: ignore
+        return field.default_factory  # type: ignore
+    return lambda: MISSING
+
+
+def _is_required(field: Field) -> bool:
+    return (
+        field.init
+        and field.default is MISSING
+        and field.default_factory is MISSING  # type: ignore
+    )
+
+
+def _lazy_property(field_plan: _FieldPlan, field: Field, frozen: bool) -> property:
+    name = field_plan.name
+    key = field_plan.key
+    optional = field_plan.optional
+    default_factory = _default_factory(field)
+
+    def get(self: Any) -> Any:
+        state = self.__dict__
+        try:
+            return state[name]
+        except KeyError:
+            pass
+
+        data = state.get(_DATA)
+        if data is None:
+            raise AttributeError(name)
+
+        value = data.get(key, _MISSING)
+        if value is _MISSING:
+            value = default_factory()
+        elif value is None:
+            assert optional, f"dictaclass key '{key}' is not optional."
+        else:
+            value = _convert(field_plan, value, state[_ON_EXTRA_FIELD])
+
+        state[name] = value
+        return value
+
+    def set(self: Any, value: Any) -> None:
+        if frozen and _DATA in self.__dict__:
+            raise FrozenInstanceError(f"cannot assign to field '{name}'")
+        self.__dict__[name] = value
+
+    return property(get, set, doc=f"Lazily converted field '{name}'.")
+
+
+def _lazy_type(plan: _Plan) -> Type[Any]:
+    with _plan_cache_lock:
+        if plan.lazy_type is not None:
+            return plan.lazy_type
+
+        dataclass_type = plan.dataclass_type
+        dataclass_fields = {f.name: f for f in fields(dataclass_type)}
+        frozen = dataclass_type.__dataclass_params__.frozen
+        compared = [f.name for f in dataclass_fields.values() if f.compare]
+        init_fields = [f.name for f in dataclass_fields.values() if f.init]
+
+        def __eq__(self: Any, other: Any) -> Any:
+            if not isinstance(other, dataclass_type):
+                return NotImplemented
+            return all(getattr(self, n) == getattr(other, n) for n in compared)
+
+        def __reduce__(self: Any) -> Any:
+            return dataclass_type, tuple(getattr(self, n) for n in init_fields)
+
+        namespace: Dict[str, Any] = dict(
+            __module__=dataclass_type.__module__,
+            __qualname__=dataclass_type.__qualname__,
+            __doc__=dataclass_type.__doc__,
+            __hash__=dataclass_type.__hash__,
+            __reduce__=__reduce__,
+        )
+        if dataclass_type.__dataclass_params__.eq:
+            namespace["__eq__"] = __eq__
+
+        for field_plan in plan.fields:
+            field = dataclass_fields.get(field_plan.name)
+            if field is not None:
+                namespace[field_plan.name] = _lazy_property(field_plan, field, frozen)
+
+        lazy_type = type(dataclass_type.__name__, (dataclass_type,), namespace)
+        lazy_type.__dictaclass_required_keys__ = frozenset(  # type: ignore
+            field_plan.key
+            for field_plan in plan.fields
+            if field_plan.name in dataclass_fields
+            and _is_required(dataclass_fields[field_plan.name])
+        )
+        lazy_type.__dictaclass_keys__ = frozenset(  # type: ignore
+            field_plan.key for field_plan in plan.fields
+        )
+
+        plan.lazy_type = lazy_type
+        return lazy_type
+
+
+def lazy_decode(
+    plan: Optional[_Plan],
+    data: Any,
+    on_extra_field: Callable[[Type, str, Any], None],
+) -> Any:
+    """
+    Create a lazy proxy of `plan.dataclass_type` over `data`.
+    """
+    if plan is None or data is None:
+        return data
+
+    assert isinstance(data, dict)
+
+    if isinstance(plan, _UnionPlan):
+        plan = plan.member(data)
+
+    lazy_type = plan.lazy_type or _lazy_type(plan)
+
+    required: FrozenSet[str] = lazy_type.__dictaclass_required_keys__
+    if not required.issubset(data.keys()):
+        missing = ", ".join(sorted(repr(k) for k in required - data.keys()))
+        raise TypeError(
+            f"{plan.dataclass_type.__name__} is missing required fields: {missing}"
+        )
+
+    if on_extra_field is not _on_extra_field_noop:
+        for key in data.keys() - lazy_type.__dictaclass_keys__:
+            on_extra_field(plan.dataclass_type, key, data[key])
+
+    proxy = object.__new__(lazy_type)
+    state = proxy.__dict__
+    state[_DATA] = data
+    state[_ON_EXTRA_FIELD] = on_extra_field
+    return proxy
@@ -0,0 +1,442 @@
+"""
+Schema-driven JSON parsing: dataclasses are built while the JSON text is
+parsed, without first building the whole tree of dicts.
+
+Only the JSON objects/arrays that hold other dataclasses are walked here,
+driven by the plan of their dataclass. Everything else - plain values, and
+the objects of dataclasses that hold only plain values - is scanned by the
+C scanner of the `json` module, and converted right away by the generated
+decoders. So at any time, at most one such object is held as a dict.
+
+The values of unknown keys are scanned by the C scanner too, so they are
+built (one at a time) and dropped right away rather than skipped: skipping
+them in Python, bracket by bracket, is slower than building them in C for
+anything but long arrays of numbers.
+"""
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+import json
+import json.decoder
+import json.scanner
+import re
+
+from dictaclass.dictaclass import (
+    _KIND_DATACLASS,
+    _KIND_LIST,
+    _KIND_PACKED,
+    _KIND_SET,
+    _KIND_VALUE,
+    _DecoderOptions,
+    _FieldPlan,
+    _Plan,
+    _UnionPlan,
+    _active_stats,
+    _build_field_plan,
+    _get_decoder,
+    _on_extra_field_noop,
+    _plan_cache_lock,
+    _transformer_noop,
+)
+
+T = TypeVar("T")
+
+# NOTE(braynstorm):
+#   (text, index, on_extra_field) -> (value, index after the value)
+#   The scanner raises StopIteration(index) on invalid JSON, `from_json`
+#   turns it into a JSONDecodeError.
+_Parse = Callable[[str, int, Callable[..., None]], Tuple[Any, int]]
+
+_WHITESPACE = " \t\n\r"
+
+# NOTE(braynstorm):
+#   Typed by hand - the stubs of `json` don't have the (undocumented)
+#   scanner functions, and the pattern always matches (maybe nothing).
+_skip_whitespace: Callable[[str, int], "re.Match[str]"]
+_skip_whitespace = re.compile(r"[ \t\n\r]*").match  # type: ignore
+_scanstring: Callable[[str, int], Tuple[str, int]]
+_scanstring = json.decoder.scanstring  # type: ignore
+_scan_once: Callable[[str, int], Tuple[Any, int]]
+_scan_once = json.scanner.make_scanner(json.JSONDecoder())  # type: ignore
+
+
+def _parse_value(
+    s: str,
+    idx: int,
+    on_extra_field: Callable[..., None],
+) -> Tuple[Any, int]:
+    return _scan_once(s, idx)
+
+
+def _parse_array(
+    parse_item: _Parse,
+    s: str,
+    idx: int,
+    on_extra_field: Callable[..., None],
+) -> Tuple[List[Any], int]:
+    if s[idx : idx + 1] != "[":
+        value, idx = _scan_once(s, idx)
+        assert isinstance(value, list)
+
+    items: List[Any] = []
+    append = items.append
+    idx += 1
+    if s[idx : idx + 1] in _WHITESPACE:
+        idx = _skip_whitespace(s, idx).end()
+    if s[idx : idx + 1] == "]":
+        return items, idx + 1
+
+    while True:
+        if s.startswith("null", idx):
+            append(None)
+            idx += 4
+        else:
+            item, idx = parse_item(s, idx, on_extra_field)
+            append(item)
+
+        char = s[idx : idx + 1]
+        if char in _WHITESPACE:
+            idx = _skip_whitespace(s, idx).end()
+            char = s[idx : idx + 1]
+        if char == "]":
+            return items, idx + 1
+        if char != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", s, idx)
+        idx += 1
+        if s[idx : idx + 1] in _WHITESPACE:
+            idx = _skip_whitespace(s, idx).end()
+
+
+def _parse_mapping(
+    parse_item: _Parse,
+    s: str,
+    idx: int,
+    on_extra_field: Callable[..., None],
+) -> Tuple[Dict[str, Any], int]:
+    if s[idx : idx + 1] != "{":
+        value, idx = _scan_once(s, idx)
+        assert isinstance(value, dict)
+
+    items: Dict[str, Any] = {}
+    idx += 1
+    if s[idx : idx + 1] in _WHITESPACE:
+        idx = _skip_whitespace(s, idx).end()
+    if s[idx : idx + 1] == "}":
+        return items, idx + 1
+
+    while True:
+        if s[idx : idx + 1] != '"':
+            raise json.JSONDecodeError(
+                "Expecting property name enclosed in double quotes", s, idx
+            )
+        key, idx = _scanstring(s, idx + 1)
+        if s[idx : idx + 1] != ":":
+            idx = _skip_whitespace(s, idx).end()
+            if s[idx : idx + 1] != ":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", s, idx)
+        idx += 1
+        if s[idx : idx + 1] in _WHITESPACE:
+            idx = _skip_whitespace(s, idx).end()
+
+        if s.startswith("null", idx):
+            items[key] = None
+            idx += 4
+        else:
+            items[key], idx = parse_item(s, idx, on_extra_field)
+
+        char = s[idx : idx + 1]
+        if char in _WHITESPACE:
+            idx = _skip_whitespace(s, idx).end()
+            char = s[idx : idx + 1]
+        if char == "}":
+            return items, idx + 1
+        if char != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", s, idx)
+        idx += 1
+        if s[idx : idx + 1] in _WHITESPACE:
+            idx = _skip_whitespace(s, idx).end()
+
+
+def _field_parser(
+    field_plan: _FieldPlan,
+    key_transformer: Callable[[str], str],
+    implicit_optional: bool,
+) -> _Parse:
+    """
+    Parser of a (non-null) value of the field.
+    """
+    kind = field_plan.kind
+    item = field_plan.item
+
+    if kind == _KIND_PACKED:
+        converter = field_plan.value_type.converter()
+
+        def parse_packed(s: str, idx: int, on_extra_field: Any) -> Tuple[Any, int]:
+            value, idx = _scan_once(s, idx)
+            return converter(value), idx
+
+        return parse_packed
+
+    if item is None:
+        if kind == _KIND_SET:
+
+            def parse_set(s: str, idx: int, on_extra_field: Any) -> Tuple[Any, int]:
+                value, idx = _scan_once(s, idx)
+                return set(value), idx
+
+            return parse_set
+        # NOTE(braynstorm):
+        #   Lists and dicts fresh from the scanner are not copied.
+        return _parse_value
+
+    parse_item = _dataclass_parser(item, key_transformer, implicit_optional)
+    if kind in (_KIND_VALUE, _KIND_DATACLASS):
+        return parse_item
+    if kind == _KIND_LIST:
+        return lambda s, idx, oef: _parse_array(parse_item, s, idx, oef)
+    if kind == _KIND_SET:
+
+        def parse_dataclass_set(s: str, idx: int, oef: Any) -> Tuple[Any, int]:
+            items, idx = _parse_array(parse_item, s, idx, oef)
+            return set(items), idx
+
+        return parse_dataclass_set
+    return lambda s, idx, oef: _parse_mapping(parse_item, s, idx, oef)
+
+
+def _holds_collections(plan: _Plan, seen: Set[int]) -> bool:
+    """
+    Can the objects of `plan` hold (directly or in nested dataclasses)
+    lists/sets/dicts of dataclasses? Those are worth walking - everything
+    else is small enough to be scanned at once.
+    """
+    if isinstance(plan, _UnionPlan) or id(plan) in seen:
+        return False
+    seen.add(id(plan))
+
+    for field_plan in plan.fields:
+        if field_plan.item is None:
+            continue
+        if field_plan.kind != _KIND_DATACLASS:
+            return True
+        if _holds_collections(field_plan.item, seen):
+            return True
+    return False
+
+
+def _dataclass_parser(
+    plan: _Plan,
+    key_transformer: Callable[[str], str],
+    implicit_optional: bool,
+) -> _Parse:
+    """
+    Get the (cached) parser of the dataclass (or Union) of `plan`.
+    """
+    with _plan_cache_lock:
+        parse = plan.functions.get("parse")
+        if parse is not None:
+            return parse
+
+        if _holds_collections(plan, set()):
+            parse = _walking_parser(plan, key_transformer, implicit_optional)
+        else:
+            parse = _scanning_parser(plan, key_transformer, implicit_optional)
+        plan.functions["parse"] = parse
+        return parse
+
+
+def _scanning_parser(
+    plan: _Plan,
+    key_transformer: Callable[[str], str],
+    implicit_optional: bool,
+) -> _Parse:
+    """
+    Scan the whole object to a dict and decode it with the generated decoder.
+    For dataclasses of plain values, and for Unions (the tag can be anywhere
+    in the object).
+    """
+    # NOTE(braynstorm):
+    #   Parsers are cached in the plans, so they must not keep the decoders
+    #   of a `collect_stats()` block - inside of one, the (instrumented)
+    #   decoder is looked up on every call instead.
+    decoders: Dict[bool, Callable[[Any, Callable[..., None]], Any]] = dict()
+
+    def get_decoder(extra_fields: bool) -> Callable[[Any, Callable[..., None]], Any]:
+        decoder = _get_decoder(
+            plan.dataclass_type,
+            key_transformer,
+            implicit_optional,
+            _DecoderOptions(extra_fields=extra_fields),
+        )
+        assert decoder is not None
+        return decoder
+
+    def parse_scanned(
+        s: str,
+        idx: int,
+        on_extra_field: Callable[..., None],
+    ) -> Tuple[Any, int]:
+        value, idx = _scan_once(s, idx)
+        extra_fields = on_extra_field is not _on_extra_field_noop
+        if _active_stats.get() is not None:
+            return get_decoder(extra_fields)(value, on_extra_field), idx
+
+        decoder = decoders.get(extra_fields)
+        if decoder is None:
+            decoder = decoders[extra_fields] = get_decoder(extra_fields)
+        return decoder(value, on_extra_field), idx
+
+    return parse_scanned
+
+
+def _walking_parser(
+    plan: _Plan,
+    key_transformer: Callable[[str], str],
+    implicit_optional: bool,
+) -> _Parse:
+    """
+    Walk the object, parsing each known field with its own parser.
+    """
+    dataclass_type = plan.dataclass_type
+    # NOTE(braynstorm):
+    #   key -> (field name, optional, parser). Created on the first call,
+    #   so recursive dataclasses work.
+    by_key: Optional[Dict[str, Tuple[str, bool, _Parse]]] = None
+
+    def parse_walked(
+        s: str,
+        idx: int,
+        on_extra_field: Callable[..., None],
+    ) -> Tuple[Any, int]:
+        nonlocal by_key
+        if by_key is None:
+            by_key = {
+                field_plan.key: (
+                    field_plan.name,
+                    field_plan.optional,
+                    _field_parser(field_plan, key_transformer, implicit_optional),
+                )
+                for field_plan in plan.fields
+            }
+        fields = by_key
+
+        if s[idx : idx + 1] != "{":
+            value, idx = _scan_once(s, idx)
+            assert isinstance(value, dict)
+
+        kwargs: Dict[str, Any] = {}
+        idx += 1
+        if s[idx : idx + 1] in _WHITESPACE:
+            idx = _skip_whitespace(s, idx).end()
+        if s[idx : idx + 1] == "}":
+            return dataclass_type(**kwargs), idx + 1
+
+        while True:
+            if s[idx : idx + 1] != '"':
+                raise json.JSONDecodeError(
+                    "Expecting property name enclosed in double quotes", s, idx
+                )
+            key, idx = _scanstring(s, idx + 1)
+            if s[idx : idx + 1] != ":":
+                idx = _skip_whitespace(s, idx).end()
+                if s[idx : idx + 1] != ":":
+                    raise json.JSONDecodeError("Expecting ':' delimiter", s, idx)
+            idx += 1
+            if s[idx : idx + 1] in _WHITESPACE:
+                idx = _skip_whitespace(s, idx).end()
+
+            field = fields.get(key)
+            if field is None:
+                # NOTE(braynstorm):
+                #   Unknown values are still built by the scanner (to find
+                #   where they end), but dropped right away - see the module
+                #   docstring.
+                value, idx = _scan_once(s, idx)
+                on_extra_field(dataclass_type, key, value)
+            elif s.startswith("null", idx):
+                assert field[1], f"dictaclass key '{key}' is not optional."
+                kwargs[field[0]] = None
+                idx += 4
+            else:
+                kwargs[field[0]], idx = field[2](s, idx, on_extra_field)
+
+            char = s[idx : idx + 1]
+            if char in _WHITESPACE:
+                idx = _skip_whitespace(s, idx).end()
+                char = s[idx : idx + 1]
+            if char == "}":
+                return dataclass_type(**kwargs), idx + 1
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", s, idx)
+            idx += 1
+            if s[idx : idx + 1] in _WHITESPACE:
+                idx = _skip_whitespace(s, idx).end()
+
+    return parse_walked
+
+
+def from_json(
+    dataclass_type: Type[T],
+    source: Union[str, bytes, bytearray],
+    key_transformer: Optional[Callable[[str], str]] = None,
+    on_extra_field: Optional[Callable[[Type, str, Any], None]] = None,
+    implicit_optional: bool = False,
+) -> T:
+    """
+    Parse a JSON document straight to `dataclass_type`.
+
+    Equivalent to `to_dataclass(dataclass_type, json.loads(source), ...)`,
+    but the dataclasses are built while the JSON is parsed, so the dicts of
+    the whole document are never held in memory at the same time. The value
+    of each unknown key is still built, then dropped.
+
+    `dataclass_type` can also be a `List[...]`, `Set[...]`, `Dict[str, ...]`
+    or `Optional[...]` of dataclasses.
+
+    >>> orders = from_json(List[Order], response.content)
+
+    Args:
+        dataclass_type (Type[T]): The type of the document.
+        source (str | bytes | bytearray): The JSON document (utf-8, -16 or -32).
+        key_transformer, on_extra_field, implicit_optional:
+            See `to_dataclass`.
+    Returns:
+        T: The decoded document.
+    """
+    if key_transformer is None:
+        key_transformer = _transformer_noop
+
+    if on_extra_field is None:
+        on_extra_field = _on_extra_field_noop
+
+    if isinstance(source, (bytes, bytearray)):
+        source = source.decode(json.detect_encoding(source), "surrogatepass")
+
+    root = _build_field_plan("", dataclass_type, key_transformer, implicit_optional)
+    parse = _field_parser(root, key_transformer, implicit_optional)
+
+    idx = _skip_whitespace(source, 0).end()
+    try:
+        if source.startswith("null", idx):
+            assert root.optional, "dictaclass document is not optional."
+            value: Any = None
+            idx += 4
+        else:
+            value, idx = parse(source, idx, on_extra_field)
+    except StopIteration as error:
+        raise json.JSONDecodeError("Expecting value", source, error.value) from None
+
+    idx = _skip_whitespace(source, idx).end()
+    if idx != len(source):
+        raise json.JSONDecodeError("Extra data", source, idx)
+    return value
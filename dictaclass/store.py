@@ -0,0 +1,247 @@
+"""
+Memory-mapped record stores: random access to records of a file, decoded on
+demand.
+
+File layout (integers are "<Q"):
+    - "DCRS\\x01", the binary format header of the record type (with its
+      schema fingerprint, see `dictaclass.binary`), the number of records and
+      the offset of the index.
+    - the records, in the binary format (without header), one after another.
+    - the index: the offset of every record, then the end of the last one.
+
+`RecordStore.open` maps the file, so opening is instant whatever its size,
+`store[i]` only decodes record `i`, and every process opening the same file
+shares the same pages (the OS page cache) instead of holding its own copy.
+"""
+from typing import (
+    Any,
+    Generic,
+    Iterable,
+    Iterator,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+    overload,
+)
+
+import array
+import contextlib
+import mmap
+import os
+import struct
+import sys
+
+from dictaclass.binary import _codec
+
+T = TypeVar("T")
+
+_MAGIC = b"DCRS\x01"
+_BINARY_HEADER_SIZE = 12
+_COUNTS = struct.Struct("<QQ")
+_HEADER_SIZE = len(_MAGIC) + _BINARY_HEADER_SIZE + _COUNTS.size
+_OFFSET = struct.Struct("<Q")
+
+
+class RecordStore(Generic[T]):
+    """
+    A read-only, memory-mapped sequence of `dataclass_type` records.
+
+    Indexing decodes a single record, slicing returns a `RecordStore` view of
+    the same file, and iterating decodes the records one at a time - nothing
+    is materialized. Stores can be pickled (e.g. sent to worker processes):
+    the other process maps the same file.
+
+    >>> RecordStore.write("products.dcrs", products)
+    >>> with RecordStore.open("products.dcrs", Product) as store:
+    >>>     product = store[123_456]
+    """
+
+    __slots__ = ("path", "dataclass_type", "_map", "_loader", "_index", "_range")
+
+    def __init__(
+        self,
+        path: str,
+        dataclass_type: Type[T],
+        mapped: mmap.mmap,
+        index: int,
+        records: range,
+    ) -> None:
+        self.path = path
+        self.dataclass_type = dataclass_type
+        self._map = mapped
+        self._loader = _codec(dataclass_type)[2]
+        self._index = index
+        self._range = records
+
+    @staticmethod
+    def write(
+        path: str,
+        records: Iterable[T],
+        dataclass_type: Optional[Type[T]] = None,
+    ) -> int:
+        """
+        Write `records` to a new store file at `path` (replacing any existing
+        one), one record at a time.
+
+        Args:
+            path (str): Path of the store file.
+            records (Iterable[T]): The records, e.g. a generator.
+            dataclass_type (Type[T] | None, optional):
+                The type of the records. Defaults to the type of the first one.
+        Returns:
+            int: The number of records written.
+        """
+        iterator = iter(records)
+        if dataclass_type is None:
+            first = next(iterator, None)
+            if first is None:
+                raise TypeError(
+                    "RecordStore.write() needs a dataclass_type when there are"
+                    " no records"
+                )
+            dataclass_type = type(first)
+            iterator = _prepend(first, iterator)
+
+        header, dumper, _ = _codec(dataclass_type)
+        offsets = array.array("Q")
+
+        # NOTE(braynstorm):
+        #   Written to a temporary file first - processes that have the
+        #   current file mapped keep reading it unchanged.
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                file.write(bytes(_HEADER_SIZE))
+                position = _HEADER_SIZE
+                buffer = bytearray()
+                for record in iterator:
+                    offsets.append(position)
+                    del buffer[:]
+                    dumper(record, buffer)
+                    file.write(buffer)
+                    position += len(buffer)
+
+                count = len(offsets)
+                offsets.append(position)
+                if sys.byteorder != "little":
+                    offsets.byteswap()
+                file.write(offsets.tobytes())
+
+                file.seek(0)
+                file.write(_MAGIC + header + _COUNTS.pack(count, position))
+            os.replace(temporary, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temporary)
+            raise
+        return count
+
+    @staticmethod
+    def open(path: str, dataclass_type: Type[T]) -> "RecordStore[T]":
+        """
+        Map the store file at `path`.
+
+        Raises:
+            ValueError: The file is not a store, is truncated, or its records
+                were not written with the schema of `dataclass_type`.
+        """
+        header = _codec(dataclass_type)[0]
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(mapped) < _HEADER_SIZE or mapped[: len(_MAGIC)] != _MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a dictaclass record store.")
+        if mapped[len(_MAGIC) : len(_MAGIC) + _BINARY_HEADER_SIZE] != header:
+            mapped.close()
+            raise ValueError(
+                f"{path} was not written for the schema of"
+                f" {getattr(dataclass_type, '__qualname__', dataclass_type)}."
+            )
+
+        count, index = _COUNTS.unpack_from(mapped, len(_MAGIC) + _BINARY_HEADER_SIZE)
+        if index < _HEADER_SIZE or index + _OFFSET.size * (count + 1) != len(mapped):
+            mapped.close()
+            raise ValueError(f"{path} is truncated or corrupted.")
+        return RecordStore(path, dataclass_type, mapped, index, range(count))
+
+    def close(self) -> None:
+        """
+        Unmap the file. Records decoded before remain valid.
+        """
+        self._map.close()
+
+    def __enter__(self) -> "RecordStore[T]":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __reduce__(self) -> Any:
+        return _reopen, (self.path, self.dataclass_type, self._range)
+
+    def __len__(self) -> int:
+        return len(self._range)
+
+    def _offset(self, record: int) -> int:
+        return _OFFSET.unpack_from(self._map, self._index + 8 * record)[0]
+
+    @overload
+    def __getitem__(self, index: int) -> T:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "RecordStore[T]":
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, "RecordStore[T]"]:
+        if isinstance(index, slice):
+            return RecordStore(
+                self.path,
+                self.dataclass_type,
+                self._map,
+                self._index,
+                self._range[index],
+            )
+
+        try:
+            record = self._range[index]
+        except IndexError:
+            raise IndexError("RecordStore index out of range") from None
+        return self._loader(self._map, self._offset(record))[0]
+
+    def __iter__(self) -> Iterator[T]:
+        mapped = self._map
+        loader = self._loader
+        if self._range.step != 1:
+            offset = self._offset
+            for record in self._range:
+                yield loader(mapped, offset(record))[0]
+            return
+
+        # NOTE(braynstorm):
+        #   Contiguous records - each one starts where the previous one ended.
+        if not self._range:
+            return
+        position = self._offset(self._range.start)
+        for _ in self._range:
+            record, position = loader(mapped, position)
+            yield record
+
+    def __repr__(self) -> str:
+        return (
+            f"RecordStore({self.path!r}, "
+            f"{getattr(self.dataclass_type, '__qualname__', self.dataclass_type)},"
+            f" length={len(self)})"
+        )
+
+
+def _prepend(first: Any, iterator: Iterator[Any]) -> Iterator[Any]:
+    yield first
+    yield from iterator
+
+
+def _reopen(path: str, dataclass_type: Type[T], records: range) -> RecordStore[T]:
+    store = RecordStore.open(path, dataclass_type)
+    return RecordStore(path, dataclass_type, store._map, store._index, records)
@@ -0,0 +1,219 @@
+"""
+Streaming decoding of large JSON documents, one dataclass at a time.
+"""
+from typing import Any, Callable, Iterator, Optional, Type, TypeVar, Union, IO
+
+import codecs
+import json
+import os
+
+from dictaclass.dictaclass import compile_decoder
+
+T = TypeVar("T")
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789+-.eE"
+_LONGEST_LITERAL = len("-Infinity")
+
+
+class _Reader:
+    """
+    Chunked text reader. Only the unconsumed tail of the input is kept in
+    memory, so memory usage is bounded by `chunk_size` + twice the largest
+    record.
+    """
+
+    def __init__(self, read: Callable[[int], str], chunk_size: int) -> None:
+        self.read = read
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """
+        Read one more chunk. Returns False if the input is exhausted.
+        """
+        if self.eof:
+            return False
+
+        # NOTE(braynstorm):
+        #   A record longer than `chunk_size` doubles the read size every time,
+        #   so copying (and re-parsing) its beginning stays linear overall.
+        pending = len(self.buffer) - self.position
+        chunk = self.read(max(self.chunk_size, pending))
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character ("" at the end).
+        """
+        while True:
+            buffer = self.buffer
+            position = self.position
+            length = len(buffer)
+            while position < length and buffer[position] in _WHITESPACE:
+                position += 1
+            self.position = position
+
+            if position < length:
+                return buffer[position]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(
+                f"dictaclass expected '{char}' in the JSON stream, found '{found}'."
+            )
+        self.position += 1
+
+
+def _iter_ndjson(reader: _Reader) -> Iterator[Any]:
+    while True:
+        end = reader.buffer.find("\n", reader.position)
+        if end == -1:
+            if reader.fill():
+                continue
+            end = len(reader.buffer)
+
+        line = reader.buffer[reader.position : end]
+        reader.position = end + 1
+        if line.strip():
+            yield json.loads(line)
+
+        if reader.eof and reader.position >= len(reader.buffer):
+            return
+
+
+def _truncated(error: json.JSONDecodeError) -> bool:
+    """
+    Could the JSON value be valid, with more data after the end of the buffer?
+    """
+    # NOTE(braynstorm):
+    #   Cut literals ("tru", "-Infin") are reported at their first character,
+    #   and cut strings at their opening quote.
+    return (
+        len(error.doc) - error.pos <= _LONGEST_LITERAL
+        or error.msg.startswith("Unterminated string")
+    )
+
+
+def _iter_array(reader: _Reader) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+
+    while True:
+        try:
+            value, end = decoder.raw_decode(reader.buffer, reader.position)
+        except json.JSONDecodeError as error:
+            # NOTE(braynstorm):
+            #   Only a value cut by the end of the buffer is worth reading
+            #   more for - anything else is malformed whatever comes next.
+            if _truncated(error) and reader.fill():
+                continue
+            raise
+
+        # NOTE(braynstorm):
+        #   A number ending at the end of the buffer might be cut, e.g. "12"
+        #   followed by "34" (or "1." followed by "5") in the next chunk.
+        tail = reader.buffer[end:]
+        if (
+            type(value) in (int, float)
+            and not tail.strip(_NUMBER_CHARS)
+            and reader.fill()
+        ):
+            continue
+
+        reader.position = end
+        yield value
+
+        if reader.peek() == "]":
+            return
+        reader.expect(",")
+        reader.peek()
+
+
+def _text_read(source: IO[Any]) -> Callable[[int], str]:
+    if isinstance(source.read(0), bytes):
+        return codecs.getreader("utf-8")(source).read
+    return source.read
+
+
+def iter_json(
+    dataclass_type: Type[T],
+    source: Union[str, "os.PathLike[str]", IO[Any]],
+    key_transformer: Optional[Callable[[str], str]] = None,
+    on_extra_field: Optional[Callable[[Type, str, Any], None]] = None,
+    implicit_optional: bool = False,
+    format: str = "auto",
+    chunk_size: int = 1 << 16,
+) -> Iterator[T]:
+    """
+    Lazily decode a stream of JSON records to dataclasses.
+
+    The source is read in chunks of `chunk_size` characters and only the
+    record being decoded is kept in memory, so memory stays flat regardless
+    of the size of the file.
+
+    >>> for record in iter_json(Record, "export.ndjson"):
+    >>>     process(record)
+
+    Args:
+        dataclass_type (Type[T]): The type of every record.
+        source (str | PathLike | IO): Path or file object (text or binary,
+            utf-8) to read from.
+        key_transformer, on_extra_field, implicit_optional:
+            See `to_dataclass`.
+        format (str, optional):
+            - "ndjson": one JSON record per line.
+            - "array": a single top-level JSON array of records.
+            - "auto" (default): "array" if the input starts with '[',
+              "ndjson" otherwise.
+        chunk_size (int, optional): How many characters to read at a time.
+    Returns:
+        Iterator[T]: The decoded records, in order.
+    """
+    assert format in ("auto", "ndjson", "array"), f"Unknown format '{format}'."
+
+    decoder = compile_decoder(
+        dataclass_type,
+        key_transformer,
+        on_extra_field,
+        implicit_optional,
+    )
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as file:
+            yield from _iter_decoded(decoder, file.read, format, chunk_size)
+    else:
+        yield from _iter_decoded(decoder, _text_read(source), format, chunk_size)
+
+
+def _iter_decoded(
+    decoder: Callable[[Any], T],
+    read: Callable[[int], str],
+    format: str,
+    chunk_size: int,
+) -> Iterator[T]:
+    reader = _Reader(read, chunk_size)
+    if format == "auto":
+        format = "array" if reader.peek() == "[" else "ndjson"
+
+    if format == "array":
+        items = _iter_array(reader)
+    else:
+        items = _iter_ndjson(reader)
+
+    for item in items:
+        yield decoder(item)
@@ -0,0 +1,213 @@
+"""
+Ahead-of-time analysis: pay the first-call cost before the first call.
+
+The first decoding of a dataclass resolves the type hints of every nested
+dataclass (evaluating string annotations), builds the plans, generates the
+decoders and compiles them. `warmup(*types)` does all of it up front, and with
+`cache_file` it also saves the plans and the compiled code, so other processes
+(CLI tools, serverless functions...) only load them.
+
+`pickle` is imported only when a cache file is used, to keep the import of
+`dictaclass` itself cheap.
+"""
+from dataclasses import is_dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import contextlib
+import marshal
+import os
+import sys
+
+from dictaclass.dictaclass import (
+    _DecoderOptions,
+    _Plan,
+    _UnionPlan,
+    _code_cache,
+    _get_decoder,
+    _get_encoder,
+    _get_plan,
+    _plan_cache,
+    _plan_cache_lock,
+    _referenced_plans,
+    _registered_unions,
+    _transformer_noop,
+)
+
+# NOTE(braynstorm):
+#   Bump when `_Plan`/`_FieldPlan` or the generated code change shape.
+_CACHE_FORMAT = 1
+
+
+def _header() -> Tuple[Any, ...]:
+    # NOTE(braynstorm):
+    #   Code objects are only valid for the same interpreter version.
+    return (_CACHE_FORMAT, sys.implementation.cache_tag, sys.version_info[:2])
+
+
+def _fingerprint(plan: _Plan) -> str:
+    """
+    What the plan was built from: the annotations of the dataclass and of
+    its bases (or the members of the Union). A cached plan is only used if
+    the type still has the same fingerprint.
+    """
+    plan_type = plan.dataclass_type
+    if isinstance(plan, _UnionPlan):
+        return repr((plan_type, _registered_unions.get(plan_type)))
+
+    return repr(
+        [
+            (c.__module__, c.__qualname__, vars(c).get("__annotations__"))
+            for c in plan_type.__mro__
+            if is_dataclass(c)
+        ]
+    )
+
+
+def _reachable(plans: List[_Plan]) -> List[_Plan]:
+    seen: Dict[int, _Plan] = dict()
+    stack = list(plans)
+    while stack:
+        plan = stack.pop()
+        if id(plan) not in seen:
+            seen[id(plan)] = plan
+            stack.extend(_referenced_plans(plan))
+    return list(seen.values())
+
+
+def _load(cache_file: str) -> bool:
+    """
+    Put the plans and the code objects of `cache_file` in the caches.
+    Returns False (and leaves the caches alone) if the file is missing,
+    stale or broken.
+    """
+    import pickle
+
+    try:
+        with open(cache_file, "rb") as file:
+            content = pickle.load(file)
+        if content["header"] != _header():
+            return False
+        plans = content["plans"]
+        codes = [(source, marshal.loads(code)) for source, code in content["codes"]]
+    except Exception:
+        # NOTE(braynstorm):
+        #   Renamed/removed types, truncated files... the cache is rebuilt.
+        return False
+
+    # NOTE(braynstorm):
+    #   The plans point to each other, so a single changed dataclass
+    #   invalidates the whole file.
+    if any(_fingerprint(plan) != fingerprint for _, plan, fingerprint in plans):
+        return False
+
+    with _plan_cache_lock:
+        for cache_key, plan, _ in plans:
+            _plan_cache.setdefault(cache_key, plan)
+        for source, code in codes:
+            _code_cache.setdefault(source, code)
+    return True
+
+
+def _save(
+    cache_file: str,
+    plans: List[_Plan],
+    key_transformer: Callable[[str], str],
+    implicit_optional: bool,
+) -> None:
+    import pickle
+
+    with _plan_cache_lock:
+        entries = [
+            (key, plan, _fingerprint(plan))
+            for plan in plans
+            for key in (
+                (plan.dataclass_type, key_transformer, implicit_optional),
+                (plan.dataclass_type, key_transformer, False),
+            )
+            if _plan_cache.get(key) is plan
+        ]
+        codes = [(source, marshal.dumps(code)) for source, code in _code_cache.items()]
+
+    content = pickle.dumps(
+        dict(header=_header(), plans=entries, codes=codes),
+        pickle.HIGHEST_PROTOCOL,
+    )
+
+    # NOTE(braynstorm):
+    #   Written to a temporary file first, so concurrent processes never
+    #   load half a file.
+    temporary = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            file.write(content)
+        os.replace(temporary, cache_file)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporary)
+        raise
+
+
+def warmup(
+    *types: Any,
+    key_transformer: Optional[Callable[[str], str]] = None,
+    implicit_optional: bool = False,
+    cache_file: Optional[str] = None,
+) -> None:
+    """
+    Analyse `types` (and every dataclass they reference) and generate their
+    decoders and encoders now, instead of on the first
+    `to_dataclass`/`dataclass_to_dict` call.
+
+    >>> warmup(Order, Customer, cache_file="/tmp/schemas.dictaclass")
+
+    With `cache_file`, the plans and the compiled decoders are loaded from the
+    file if it is up to date (same Python version, same annotations in every
+    dataclass), and the file is (re)written otherwise. Cache files are
+    pickles: only load files written by your own application.
+
+    Args:
+        *types: Dataclasses (or Unions of dataclasses) to prepare.
+        key_transformer, implicit_optional:
+            See `to_dataclass`, the decoders are prepared for these. With
+            `cache_file`, `key_transformer` must be picklable (e.g. a
+            module-level function).
+        cache_file (str | None, optional):
+            Path of the file persisting the analysis between processes.
+    """
+    if key_transformer is None:
+        key_transformer = _transformer_noop
+
+    loaded = cache_file is not None and _load(cache_file)
+    with _plan_cache_lock:
+        known_sources = len(_code_cache)
+
+    plans: List[_Plan] = []
+    for dataclass_type in types:
+        plan = _get_plan(dataclass_type, key_transformer, implicit_optional)
+        if plan is None:
+            raise TypeError(
+                f"warmup() expects dataclasses or Unions of dataclasses, got"
+                f" {dataclass_type!r}."
+            )
+        plans.append(plan)
+
+        for extra_fields in (False, True):
+            _get_decoder(
+                dataclass_type,
+                key_transformer,
+                implicit_optional,
+                _DecoderOptions(extra_fields=extra_fields),
+            )
+        if is_dataclass(dataclass_type):
+            _get_encoder(dataclass_type, key_transformer)
+            encoder_plan = _get_plan(dataclass_type, key_transformer, False)
+            assert encoder_plan is not None
+            plans.append(encoder_plan)
+
+    if cache_file is None:
+        return
+
+    with _plan_cache_lock:
+        generated = len(_code_cache) != known_sources
+    if not loaded or generated:
+        _save(cache_file, _reachable(plans), key_transformer, implicit_optional)
@@ -0,0 +1,156 @@
+from dictaclass.aio import aiter_ndjson, ato_dataclass, ato_dataclasses
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from typing import Any, AsyncIterator, List, Optional
+
+import asyncio
+import json
+
+
+@dataclass(frozen=True)
+class Point:
+    x: int
+    y: int
+
+
+@dataclass(frozen=True)
+class Shape:
+    name: str
+    points: List[Point]
+    origin: Optional[Point] = None
+
+
+SHAPES = [
+    dict(name=f"s{i}", points=[dict(x=i, y=j) for j in range(3)]) for i in range(10)
+]
+
+
+def decoded(item: Any) -> Shape:
+    return Shape(item["name"], [Point(**p) for p in item["points"]])
+
+
+class Test_Aio_ToDataclass:
+    def test_executor(self) -> None:
+        async def run() -> None:
+            data = dict(name="s", points=[dict(x=1, y=2)], origin=dict(x=0, y=0))
+            expected = Shape("s", [Point(1, 2)], Point(0, 0))
+            assert await ato_dataclass(Shape, data) == expected
+            with ThreadPoolExecutor(1) as executor:
+                v = await ato_dataclass(Shape, data, executor=executor, slots=True)
+            assert v.origin.x == 0
+
+        asyncio.run(run())
+
+    def test_stats_of_the_task(self) -> None:
+        from dictaclass import collect_stats
+
+        async def run() -> None:
+            data = dict(name="s", points=[dict(x=1, y=2)])
+            with collect_stats() as stats:
+                await ato_dataclass(Shape, data)
+            assert stats.as_dict()[Shape.__qualname__]["calls"] == 1
+
+        asyncio.run(run())
+
+    def test_batches_yield_to_the_loop(self) -> None:
+        async def run() -> None:
+            ticks = 0
+
+            async def ticker() -> None:
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            task = asyncio.ensure_future(ticker())
+            await asyncio.sleep(0)
+            shapes = await ato_dataclasses(Shape, SHAPES, batch_size=2)
+            assert shapes == [decoded(item) for item in SHAPES]
+            assert ticks >= 5
+            task.cancel()
+
+            with ThreadPoolExecutor(2) as executor:
+                shapes = await ato_dataclasses(
+                    Shape, iter(SHAPES), batch_size=3, executor=executor
+                )
+            assert shapes == [decoded(item) for item in SHAPES]
+
+        asyncio.run(run())
+
+    def test_intern_across_items(self) -> None:
+        async def run() -> None:
+            items = [SHAPES[1], SHAPES[1], SHAPES[1]]
+            shapes = await ato_dataclasses(Shape, items, batch_size=2, intern=True)
+            assert shapes[0].points[0] is shapes[2].points[0]
+
+            with ThreadPoolExecutor(1) as executor:
+                shapes = await ato_dataclasses(
+                    Shape, items, batch_size=2, executor=executor, intern=True
+                )
+            assert shapes[0].points[0] is shapes[1].points[0]
+
+            source = "\n".join(json.dumps(item) for item in items).encode()
+
+            async def chunks() -> AsyncIterator[bytes]:
+                yield source
+
+            shapes = [s async for s in aiter_ndjson(Shape, chunks(), intern=True)]
+            assert shapes[0].points[0] is shapes[2].points[0]
+
+        asyncio.run(run())
+
+    def test_process_pool(self) -> None:
+        async def run() -> None:
+            extras: List[Any] = []
+            items = [dict(item, z=i) for i, item in enumerate(SHAPES)]
+            with ProcessPoolExecutor(2) as executor:
+                shapes = await ato_dataclasses(
+                    Shape,
+                    items,
+                    on_extra_field=lambda *args: extras.append(args),
+                    batch_size=3,
+                    executor=executor,
+                    slots=True,
+                    intern=True,
+                )
+                shape = await ato_dataclass(Shape, SHAPES[1], executor=executor)
+            assert [(s.name, s.points[0].x) for s in shapes] == [
+                (item["name"], i) for i, item in enumerate(SHAPES)
+            ]
+            assert extras == [(Shape, "z", i) for i in range(len(SHAPES))]
+            assert shape == decoded(SHAPES[1])
+
+        asyncio.run(run())
+
+
+class Test_Aio_NDJSON:
+    def test_async_iterable(self) -> None:
+        source = "\n".join(json.dumps(item) for item in SHAPES).encode()
+
+        async def chunks(size: int) -> AsyncIterator[bytes]:
+            for start in range(0, len(source), size):
+                yield source[start : start + size]
+
+        async def run() -> None:
+            for size in (1, 7, 64, len(source)):
+                shapes = [s async for s in aiter_ndjson(Shape, chunks(size))]
+                assert shapes == [decoded(item) for item in SHAPES]
+
+        asyncio.run(run())
+
+    def test_stream_reader(self) -> None:
+        source = "".join(json.dumps(item) + "\n\n" for item in SHAPES).encode()
+
+        async def run() -> None:
+            reader = asyncio.StreamReader()
+            reader.feed_data(source)
+            reader.feed_eof()
+            shapes = [
+                s
+                async for s in aiter_ndjson(Shape, reader, chunk_size=5, yield_every=1)
+            ]
+            assert shapes == [decoded(item) for item in SHAPES]
+
+        asyncio.run(run())
@@ -0,0 +1,89 @@
+from dictaclass import dataclass_to_dict, to_dataclasses
+from dictaclass.bench import (
+    SCHEMAS,
+    bench_depth,
+    bench_parallel,
+    bench_startup,
+    payloads,
+    run_suite,
+)
+
+from dataclasses import fields
+
+import json
+import random
+import sys
+
+import pytest
+
+
+class Test_Bench_Schemas:
+    @pytest.mark.parametrize("name", sorted(SCHEMAS))
+    def test_payloads_round_trip(self, name: str) -> None:
+        schema = SCHEMAS[name](3, 2, 4)
+        data = payloads(schema, 5)
+        objects = to_dataclasses(schema.dataclass_type, data)
+        assert len(objects) == 5
+        assert all(isinstance(o, schema.dataclass_type) for o in objects)
+        assert [dataclass_to_dict(o) for o in objects]
+
+    @pytest.mark.parametrize("name", sorted(SCHEMAS))
+    def test_payloads_are_deterministic(self, name: str) -> None:
+        schema = SCHEMAS[name](3, 2, 4)
+        assert payloads(schema, 3, seed=1) == payloads(schema, 3, seed=1)
+        assert payloads(schema, 3, seed=1) != payloads(schema, 3, seed=2)
+
+    def test_shape(self) -> None:
+        nested = SCHEMAS["nested"](2, 3, 5).generate
+        payload = nested(random.Random(0))
+        assert len(payload["child"]["child"]["items"]) == 5
+
+        inherited = SCHEMAS["inherited"](2, 3, 0).dataclass_type
+        assert len(fields(inherited)) == 6
+
+        tree = SCHEMAS["tree"](2, 3, 2).generate(random.Random(0))
+        assert len(tree["children"]) == 3
+        assert len(tree["children"][2]["children"][2]["children"]) == 2
+
+
+class Test_Bench_Suite:
+    def test_results_are_json(self) -> None:
+        results = run_suite(["flat", "collections"], 10, 1, 2, 1, 2)
+        results = json.loads(json.dumps(results))
+        assert results["parameters"]["records"] == 10
+        assert set(results["results"]) == {"flat", "collections"}
+        measured = results["results"]["flat"]["decode"]
+        assert measured["records_per_second"] > 0
+        assert measured["seconds_per_record"] > 0
+        assert measured["peak_bytes"] > 0
+
+
+class Test_Bench_Depth:
+    def test_recursion_limit(self) -> None:
+        results = bench_depth([10, sys.getrecursionlimit() * 2], 1)
+        shallow, deep = results.values()
+        assert shallow["recursive"] and shallow["iterative"]
+        assert deep["recursive"] is None
+        assert deep["iterative"]
+
+
+class Test_Bench_Startup:
+    def test_startup(self) -> None:
+        results = bench_startup(1)
+        assert set(results) == {"cold", "cached"}
+        assert results["cached"]["first_call_seconds"] > 0
+        assert results["cold"]["import_seconds"] > 0
+
+
+class Test_Bench_Parallel:
+    def test_parallel(self) -> None:
+        results = bench_parallel(30_000, 2, 1)
+        assert set(results) == {
+            "serial",
+            "parallel",
+            "parallel_parent",
+            "serial_json",
+            "parallel_json",
+            "parallel_json_parent",
+        }
+        assert all(seconds > 0 for seconds in results.values())
@@ -0,0 +1,158 @@
+from dictaclass import dataclass_to_dict, dumps_binary, loads_binary, to_dataclass
+
+from dataclasses import dataclass, field, replace
+
+from typing import Any, Dict, List, Optional, Set, Union
+
+import array
+import sys
+
+import pytest
+
+
+@dataclass(frozen=True)
+class Point:
+    x: int
+    y: float
+
+
+@dataclass
+class Circle:
+    kind: str
+    radius: float
+
+
+@dataclass
+class Square:
+    kind: str
+    side: float
+
+
+@dataclass
+class Shape:
+    name: str
+    origin: Point
+    visible: bool
+    points: List[Optional[Point]]
+    corners: Set[Point]
+    by_name: Dict[str, Point]
+    tags: List[str]
+    labels: Set[str]
+    ids: List[int]
+    ratios: List[float]
+    weights: array.array
+    raw: bytes
+    parts: List[Union[Circle, Square]]
+    note: Optional[str] = None
+    count: Optional[int] = None
+    parent: Optional["Shape"] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+    id: int = 0
+    score: float = 0.0
+
+
+SHAPE = dict(
+    name="sé",
+    origin=dict(x=0, y=0.5),
+    visible=True,
+    points=[dict(x=1, y=1.5), None, dict(x=2, y=-2e3)],
+    corners=[dict(x=0, y=0.0), dict(x=1, y=0.0)],
+    by_name=dict(a=dict(x=3, y=3.0)),
+    tags=["a", "b"],
+    labels=["c"],
+    ids=[1, -2, 1 << 40],
+    ratios=[0.5, 2.0],
+    weights=[1, 2.5],
+    raw=b"\x00\xff",
+    parts=[dict(kind="circle", radius=1.0), dict(kind="square", side=2.0)],
+    count=3,
+    parent=dict(
+        name="p",
+        origin=dict(x=9, y=9.0),
+        visible=False,
+        points=[],
+        corners=[],
+        by_name={},
+        tags=[],
+        labels=[],
+        ids=[],
+        ratios=[],
+        weights=[],
+        raw=b"",
+        parts=[],
+    ),
+    meta=dict(nested=[1, {"deep": None}, (True, 1 << 70)], value=1.5),
+    id=7,
+    score=-1.25,
+)
+
+
+class Test_Binary:
+    def test_round_trip(self) -> None:
+        from dictaclass import register_union
+
+        register_union(
+            Union[Circle, Square], "kind", dict(circle=Circle, square=Square)
+        )
+        v = to_dataclass(Shape, SHAPE)
+        data = dumps_binary(v)
+        assert loads_binary(Shape, data) == to_dataclass(Shape, dataclass_to_dict(v))
+        assert loads_binary(Shape, bytearray(data)) == v
+        assert loads_binary(Shape, memoryview(data)) == v
+        assert loads_binary(Shape, data).meta["nested"][2] == (True, 1 << 70)
+
+        point = Point(1, 2.0)
+        # NOTE(braynstorm): header, not-None flag, "<qd"
+        assert len(dumps_binary(point)) == 12 + 1 + 16
+        assert loads_binary(Point, dumps_binary(point)) == point
+
+        parts = Union[Circle, Square]
+        square = Square("square", 1.0)
+        assert loads_binary(parts, dumps_binary(square, parts)) == square
+
+    def test_schema_mismatch(self) -> None:
+        @dataclass(frozen=True)
+        class Point:
+            x: int
+            y: int
+
+        data = dumps_binary(Point(1, 2))
+        with pytest.raises(ValueError, match="not written for the schema"):
+            loads_binary(globals()["Point"], data)
+        with pytest.raises(ValueError, match="truncated"):
+            loads_binary(Point, data[:-1])
+        with pytest.raises(ValueError, match="trailing"):
+            loads_binary(Point, data + b"\x00")
+
+    def test_header_is_cached(self) -> None:
+        import pickle
+
+        from dictaclass.dictaclass import _get_plan, _transformer_noop
+
+        data = dumps_binary(Point(1, 2.0))
+        plan = _get_plan(Point, _transformer_noop, False)
+        assert plan.binary_header == data[:12]
+        assert "binary_header" not in plan.functions
+        assert pickle.loads(pickle.dumps(plan)).binary_header is None
+
+    def test_errors(self) -> None:
+        with pytest.raises(TypeError):
+            dumps_binary(dict(x=1))
+        with pytest.raises(TypeError):
+            loads_binary(int, b"")
+        with pytest.raises(TypeError, match=r"Point\.x"):
+            dumps_binary(Point(1 << 70, 0.0))
+        with pytest.raises(TypeError, match=r"Point\.x"):
+            dumps_binary(Point(1.5, 0.0))  # type: ignore
+        with pytest.raises(TypeError, match=r"Point\.y"):
+            dumps_binary(Point(1, "0"))  # type: ignore
+
+        v = to_dataclass(Shape, SHAPE)
+        for name, value in [("count", 1.5), ("ids", [1.5]), ("ratios", ["x"])]:
+            with pytest.raises(TypeError, match=rf"Shape\.{name}"):
+                dumps_binary(replace(v, **{name: value}))
+
+    def test_ints_in_float_fields(self) -> None:
+        v = loads_binary(Point, dumps_binary(Point(1, 2)))  # type: ignore
+        assert v == Point(1, 2.0)
+        assert type(v.y) is float
@@ -0,0 +1,75 @@
+from dictaclass import Columns, to_columns
+
+from dataclasses import dataclass, field
+
+from typing import List, Optional, Set
+
+import array
+
+import pytest
+
+
+@dataclass(frozen=True)
+class Point:
+    x: int
+    y: float
+
+
+@dataclass(frozen=True)
+class Sample:
+    id: int
+    value: Optional[float]
+    label: str
+    origin: Point
+    tags: Set[str] = field(default_factory=set)
+    weight: float = 1.0
+
+
+ROWS = [
+    dict(id=i, value=None if i == 2 else i / 2, label=f"s{i}", origin=dict(x=i, y=0.5))
+    for i in range(5)
+]
+
+
+class Test_Columns:
+    def test_columns(self) -> None:
+        table = to_columns(Sample, ROWS)
+        assert isinstance(table, Columns)
+        assert len(table) == 5
+
+        assert table.columns["id"] == array.array("q", range(5))
+        assert table.columns["value"] == [0.0, 0.5, None, 1.5, 2.0]
+        assert table.columns["label"] == [f"s{i}" for i in range(5)]
+        assert table.columns["origin"][3] == Point(3, 0.5)
+        assert table.columns["tags"] == [set()] * 5
+        assert table.columns["weight"] == array.array("d", [1.0] * 5)
+
+        assert table[1] == Sample(1, 0.5, "s1", Point(1, 0.5))
+        assert table[-1].id == 4
+        with pytest.raises(IndexError):
+            table[5]
+
+        assert list(table[1:3]) == [table[1], table[2]]
+        assert [s.id for s in table] == list(range(5))
+
+    def test_not_packed(self) -> None:
+        table = to_columns(Point, [dict(x=1, y=2.0)], packed=False)
+        assert table.columns == dict(x=[1], y=[2.0])
+
+    def test_huge_ints_stay_in_lists(self) -> None:
+        table = to_columns(Point, [dict(x=1 << 70, y=0.0)])
+        assert table.columns["x"] == [1 << 70]
+
+    def test_errors(self) -> None:
+        extras = []
+        to_columns(
+            Point,
+            iter([dict(x=1, y=2.0, z=3)]),
+            on_extra_field=lambda *args: extras.append(args),
+        )
+        assert extras == [(Point, "z", 3)]
+
+        with pytest.raises(TypeError):
+            to_columns(Point, [dict(x=1)])
+        with pytest.raises(AssertionError):
+            to_columns(Point, [dict(x=1, y=None)])
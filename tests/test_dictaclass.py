@@ -1,10 +1,17 @@
 from dictaclass.dictaclass import to_dataclass
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from typing import Any, Dict, List, Optional, Set, Tuple, Type, Union
 
 import pytest
+import sys
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    children: List["Node"]
 
 
 class Test_Dictaclass:
@@ -424,3 +431,1148 @@ class Test_Dictaclass_NameTransform:
 
         assert isinstance(v, ExampleDC)
         assert v.url_encoded == "asdf"
+
+
+class Test_Dictaclass_PlanCache:
+    def test_plan_is_reused(self) -> None:
+        from dictaclass.dictaclass import _get_plan, _transformer_noop
+
+        @dataclass(frozen=True)
+        class Child:
+            a: int
+
+        @dataclass(frozen=True)
+        class Parent:
+            children: List[Child]
+
+        plan = _get_plan(Parent, _transformer_noop, False)
+        assert plan is not None
+        assert plan is _get_plan(Parent, _transformer_noop, False)
+        assert plan is not _get_plan(Parent, _transformer_noop, True)
+        assert plan.fields[0].item is _get_plan(Child, _transformer_noop, False)
+
+        v = to_dataclass(Parent, dict(children=[dict(a=1), dict(a=2)]))
+        assert v == Parent([Child(1), Child(2)])
+
+    def test_clear_cache(self) -> None:
+        from dictaclass import clear_cache
+        from dictaclass.dictaclass import _get_plan, _transformer_noop
+
+        @dataclass(frozen=True)
+        class Example:
+            a: int
+
+        plan = _get_plan(Example, _transformer_noop, False)
+        clear_cache()
+        assert plan is not _get_plan(Example, _transformer_noop, False)
+        assert to_dataclass(Example, dict(a=1)) == Example(1)
+
+    def test_non_identifier_class_name(self) -> None:
+        from dataclasses import make_dataclass
+        from dictaclass import dataclass_to_dict
+
+        Item = make_dataclass("my-item", [("a", int)], frozen=True)
+        Order = make_dataclass("order #1", [("items", List[Item])], frozen=True)
+
+        v = to_dataclass(Order, dict(items=[dict(a=1), dict(a=2)]))
+        assert v == Order([Item(1), Item(2)])
+        assert dataclass_to_dict(v) == dict(items=[dict(a=1), dict(a=2)])
+
+
+class Test_Dictaclass_CompileDecoder:
+    def test_nested(self) -> None:
+        from dictaclass import compile_decoder
+
+        @dataclass(frozen=True)
+        class Pair:
+            first: str
+            last: Optional[str]
+
+        @dataclass(frozen=True)
+        class Object:
+            pairs: List[Pair]
+            by_name: Dict[str, Pair]
+            tags: Set[str]
+            main: Optional[Pair] = None
+
+        extras: List[Tuple[Type[Any], str, Any]] = []
+        decode = compile_decoder(
+            Object,
+            on_extra_field=lambda *args: extras.append(args),
+        )
+        data = dict(
+            pairs=[dict(first="f0", last=None), dict(first="f1", last="l1")],
+            by_name=dict(p=dict(first="f2", last="l2", middle="m")),
+            tags=["a", "b", "a"],
+        )
+        v = decode(data)
+        assert v == Object(
+            [Pair("f0", None), Pair("f1", "l1")],
+            dict(p=Pair("f2", "l2")),
+            {"a", "b"},
+        )
+        assert v == to_dataclass(Object, data)
+        assert extras == [(Pair, "middle", "m")]
+        assert decode(None) is None
+
+        with pytest.raises(AssertionError):
+            decode(dict(pairs=None, by_name={}, tags=[]))
+
+    def test_recursive(self) -> None:
+        from dictaclass import compile_decoder
+
+        decode = compile_decoder(Node)
+        v = decode(
+            dict(
+                name="root",
+                children=[
+                    dict(name="a", children=[]),
+                    dict(name="b", children=[dict(name="c", children=[])]),
+                ],
+            )
+        )
+        assert v == Node(
+            "root",
+            [Node("a", []), Node("b", [Node("c", [])])],
+        )
+
+    def test_extra_fields(self) -> None:
+        from dictaclass import compile_decoder
+
+        @dataclass(frozen=True)
+        class Point:
+            x: int
+            y: Optional[int] = None
+
+        extras: List[Tuple[Type[Any], str, Any]] = []
+        report = compile_decoder(Point, on_extra_field=lambda *a: extras.append(a))
+        ignore = compile_decoder(Point)
+
+        # The first one has as many keys as Point has fields.
+        for data in (dict(x=1, z=3), dict(x=1, y=2, z=3)):
+            assert report(data) == ignore(data)
+        assert report(dict(x=1, y=2)) == Point(1, 2)
+        assert extras == [(Point, "z", 3), (Point, "z", 3)]
+
+
+class Test_Dictaclass_Batch:
+    def test_list(self) -> None:
+        from dictaclass import to_dataclasses
+
+        @dataclass(frozen=True)
+        class Point:
+            x: int
+            y: int
+
+        v = to_dataclasses(Point, [dict(x=0, y=1), dict(x=2, y=3)])
+        assert v == [Point(0, 1), Point(2, 3)]
+
+    def test_generator(self) -> None:
+        from dictaclass import to_dataclasses
+
+        @dataclass(frozen=True)
+        class Point:
+            x: int
+            y: int
+
+        extras = []
+        v = to_dataclasses(
+            Point,
+            (dict(x=i, y=i, z=i) for i in range(3)),
+            on_extra_field=lambda *args: extras.append(args),
+            generator=True,
+        )
+        assert not isinstance(v, list)
+        assert next(v) == Point(0, 0)
+        assert extras == [(Point, "z", 0)]
+        assert list(v) == [Point(1, 1), Point(2, 2)]
+
+
+class Test_Dictaclass_ToDict:
+    def test_nested(self) -> None:
+        from dictaclass import dataclass_to_dict
+
+        @dataclass(frozen=True)
+        class Pair:
+            first: str
+            last: Optional[str]
+
+        @dataclass
+        class Object:
+            pairs: List[Pair]
+            by_name: Dict[str, Pair]
+            tags: Set[str]
+            main: Optional[Pair]
+            extra: Any
+
+        data = dict(
+            pairs=[dict(first="f0", last=None), dict(first="f1", last="l1")],
+            by_name=dict(p=dict(first="f2", last="l2")),
+            tags=["a"],
+            main=None,
+            extra=dict(nested=[1, 2]),
+        )
+        v = to_dataclass(Object, data)
+        d = dataclass_to_dict(v)
+        assert d == data
+        assert d["extra"] is not v.extra
+        assert d["extra"]["nested"] is not v.extra["nested"]
+        assert to_dataclass(Object, d) == v
+
+    def test_any_values(self) -> None:
+        from dictaclass import dataclass_to_dict
+
+        @dataclass(frozen=True)
+        class Pair:
+            first: str
+            last: str
+
+        @dataclass(frozen=True)
+        class SubPair(Pair):
+            middle: str
+
+        @dataclass
+        class Object:
+            pair: Pair
+            anything: Any
+
+        v = Object(SubPair("a", "c", "b"), (Pair("d", "e"), {Pair("f", "g")}))
+        assert dataclass_to_dict(v) == dict(
+            pair=dict(first="a", last="c", middle="b"),
+            anything=(dict(first="d", last="e"), [dict(first="f", last="g")]),
+        )
+
+    def test_key_transformer(self) -> None:
+        from dictaclass import dataclass_to_dict
+
+        def camelize(name: str) -> str:
+            first, *rest = name.split("_")
+            return first + "".join(part.title() for part in rest)
+
+        @dataclass(frozen=True)
+        class Inner:
+            inner_value: int
+
+        @dataclass(frozen=True)
+        class Outer:
+            outer_value: int
+            inner_values: List[Inner]
+
+        data = dict(outerValue=1, innerValues=[dict(innerValue=2)])
+        v = to_dataclass(Outer, data, camelize)
+        assert v == Outer(1, [Inner(2)])
+        assert dataclass_to_dict(v, camelize) == data
+
+    def test_not_a_dataclass(self) -> None:
+        from dictaclass import dataclass_to_dict
+
+        @dataclass
+        class Example:
+            a: int
+
+        with pytest.raises(TypeError):
+            dataclass_to_dict(Example)
+        with pytest.raises(TypeError):
+            dataclass_to_dict(dict(a=1))
+
+
+class Test_Dictaclass_Lazy:
+    def test_fields_are_converted_on_access(self) -> None:
+        from dataclasses import field
+
+        @dataclass(frozen=True)
+        class Pair:
+            first: str
+            last: str
+
+        @dataclass(frozen=True)
+        class Object:
+            name: str
+            main: Pair
+            pairs: List[Pair]
+            tags: Set[str] = field(default_factory=set)
+
+        extras: List[Tuple[Type[Any], str, Any]] = []
+        pairs = [dict(first="f0", last="l0"), dict(first="f1", last="l1", x=1)]
+        v = to_dataclass(
+            Object,
+            dict(name="o", main=dict(first="a", last="b"), pairs=pairs),
+            on_extra_field=lambda *args: extras.append(args),
+            lazy=True,
+        )
+        assert isinstance(v, Object)
+        assert "pairs" not in vars(v)
+        assert extras == []
+
+        assert v.pairs[1].first == "f1"
+        assert v.pairs is v.pairs
+        assert isinstance(v.pairs[0], Pair)
+        assert extras == [(Pair, "x", 1)]
+        assert v.tags == set()
+
+        eager = Object("o", Pair("a", "b"), [Pair("f0", "l0"), Pair("f1", "l1")])
+        assert v == eager
+        assert eager == v
+        assert hash(v.main) == hash(Pair("a", "b"))
+        assert repr(v) == repr(eager)
+
+    def test_frozen_and_mutable(self) -> None:
+        import copy
+        import dataclasses
+
+        @dataclass(frozen=True)
+        class Frozen:
+            a: int
+
+        @dataclass
+        class Mutable:
+            a: int
+
+        frozen = to_dataclass(Frozen, dict(a=1), lazy=True)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            frozen.a = 2  # type: ignore
+        assert dataclasses.replace(frozen, a=2).a == 2
+        assert type(copy.copy(frozen)) is Frozen
+
+        mutable = to_dataclass(Mutable, dict(a=1), lazy=True)
+        mutable.a = 2
+        assert mutable.a == 2
+
+    def test_errors(self) -> None:
+        @dataclass
+        class Example:
+            a: int
+            b: int
+
+        with pytest.raises(TypeError):
+            to_dataclass(Example, dict(a=1), lazy=True)
+
+        v = to_dataclass(Example, dict(a=1, b=None), lazy=True)
+        assert v.a == 1
+        with pytest.raises(AssertionError):
+            v.b
+
+    @pytest.mark.parametrize(
+        "option",
+        [
+            dict(memoize_keys=False),
+            dict(trusted=True),
+            dict(slots=True),
+            dict(intern=True),
+            dict(only={"a"}),
+            dict(iterative=True),
+        ],
+    )
+    def test_unsupported_options(self, option: Dict[str, Any]) -> None:
+        @dataclass
+        class Example:
+            a: int
+
+        with pytest.raises(TypeError, match="lazy"):
+            to_dataclass(Example, dict(a=1), lazy=True, **option)
+
+
+class Test_Dictaclass_MemoizeKeys:
+    def test_transformer_called_once_per_field(self) -> None:
+        calls: List[str] = []
+
+        def upper(name: str) -> str:
+            calls.append(name)
+            return name.upper()
+
+        @dataclass(frozen=True)
+        class Point:
+            x: int
+            y: int
+
+        @dataclass(frozen=True)
+        class Shape:
+            points: List[Point]
+
+        data = dict(POINTS=[dict(X=i, Y=i) for i in range(10)])
+        assert to_dataclass(Shape, data, upper).points[9] == Point(9, 9)
+        assert to_dataclass(Shape, data, upper).points[0] == Point(0, 0)
+        assert sorted(calls) == ["points", "x", "y"]
+
+    def test_opt_out(self) -> None:
+        from dictaclass import compile_decoder, to_dataclasses
+
+        counter = [0]
+
+        def numbered(name: str) -> str:
+            counter[0] += 1
+            return f"{name}{counter[0]}"
+
+        @dataclass(frozen=True)
+        class Point:
+            x: int
+            y: Optional[int] = None
+
+        extras = []
+        v = to_dataclass(
+            Point,
+            dict(x1=1, y2=2, x3=3),
+            numbered,
+            on_extra_field=lambda *args: extras.append(args),
+            memoize_keys=False,
+        )
+        assert v == Point(1, 2)
+        assert extras == [(Point, "x3", 3)]
+        assert counter == [2]
+
+        decode = compile_decoder(Point, numbered, memoize_keys=False)
+        assert decode(dict(x3=3, y4=None)) == Point(3, None)
+        assert to_dataclasses(Point, [dict(x5=5)], numbered, memoize_keys=False) == [
+            Point(5)
+        ]
+        with pytest.raises(AssertionError):
+            decode(dict(x7=None))
+
+
+class Test_Dictaclass_Trusted:
+    def test_primitive_collections(self) -> None:
+        from dictaclass import compile_decoder
+
+        @dataclass(frozen=True)
+        class Series:
+            values: List[float]
+            labels: Dict[str, int]
+            tags: Set[str]
+
+        data = dict(values=[1.0, 2.0], labels=dict(a=1), tags=["a", "b"])
+
+        v = to_dataclass(Series, data)
+        assert v == Series([1.0, 2.0], dict(a=1), {"a", "b"})
+        assert v.values is not data["values"]
+        assert v.labels is not data["labels"]
+
+        decoded = [
+            to_dataclass(Series, data, trusted=True),
+            compile_decoder(Series, trusted=True)(data),
+        ]
+        for v in decoded:
+            assert v == Series([1.0, 2.0], dict(a=1), {"a", "b"})
+            assert v.values is data["values"]
+            assert v.labels is data["labels"]
+
+    def test_init_is_not_called(self) -> None:
+        from dataclasses import field
+        from dictaclass import compile_decoder, slotted
+
+        calls = []
+
+        @dataclass(frozen=True)
+        class Point:
+            x: int
+            y: int = 0
+
+            def __post_init__(self) -> None:
+                calls.append(self)
+
+        @dataclass
+        class Shape:
+            name: str
+            points: List[Point]
+            origin: Optional[Point] = None
+            tags: Set[str] = field(default_factory=set)
+            area: float = field(default=0.0, init=False)
+
+        data = dict(
+            name="s",
+            points=[dict(x=1, y=2), dict(x=3)],
+            extra=True,
+        )
+        extras = []
+
+        def on_extra_field(*args: Any) -> None:
+            extras.append(args)
+
+        for slots in (False, True):
+            v = to_dataclass(
+                Shape, data, trusted=True, slots=slots, on_extra_field=on_extra_field
+            )
+            assert calls == []
+            assert extras == []
+
+            points_type = slotted(Point) if slots else Point
+            assert v.name == "s"
+            assert v.points == [points_type(1, 2), points_type(3, 0)]
+            assert v.origin is None
+            assert v.tags == set()
+            assert v.area == 0.0
+
+            with pytest.raises(Exception):
+                v.points[0].x = 10
+            calls.clear()
+
+        v1 = compile_decoder(Shape, trusted=True)(data)
+        v2 = compile_decoder(Shape, trusted=True)(data)
+        assert v1.tags is not v2.tags
+
+        with pytest.raises(TypeError, match="missing required field 'name'"):
+            to_dataclass(Shape, dict(points=[]), trusted=True)
+
+        to_dataclass(Shape, data)
+        assert len(calls) == 2
+
+
+class Test_Dictaclass_Packed:
+    def test_array_annotation(self) -> None:
+        import array
+        from dictaclass import dataclass_to_dict
+
+        @dataclass
+        class Series:
+            floats: array.array
+            ints: Optional[array.array]
+
+        data = dict(floats=[1, 2.5], ints=[1, 2])
+        v = to_dataclass(Series, data)
+        assert v.floats == array.array("d", [1.0, 2.5])
+        assert v.ints == array.array("q", [1, 2])
+        assert dataclass_to_dict(v) == data
+
+        assert to_dataclass(Series, dict(floats=[], ints=None)).ints is None
+
+    def test_encode_built_by_hand(self) -> None:
+        import array
+        from dictaclass import dataclass_to_dict
+
+        @dataclass
+        class Series:
+            floats: array.array
+            ints: Optional[array.array] = None
+
+        v = Series([1.0, 2.5], (1, 2))  # type: ignore
+        assert dataclass_to_dict(v) == dict(floats=[1.0, 2.5], ints=[1, 2])
+        assert dataclass_to_dict(Series([])) == dict(floats=[], ints=None)
+
+    @pytest.mark.skipif(sys.version_info < (3, 9), reason="typing.Annotated")
+    def test_packed_marker(self) -> None:
+        import array
+        from typing import Annotated
+        from dictaclass import Packed, dataclass_to_dict
+
+        @dataclass
+        class Series:
+            values: Annotated[List[float], Packed("f")]
+            counts: Optional[Annotated[List[int], Packed("i")]] = None
+
+        data = dict(values=[0.5, 1.5], counts=[1, 2, 3])
+        v = to_dataclass(Series, data)
+        assert isinstance(v.values, array.array)
+        assert v.values.typecode == "f"
+        assert v.values == array.array("f", [0.5, 1.5])
+        assert v.counts == array.array("i", [1, 2, 3])
+        assert dataclass_to_dict(v) == data
+        assert to_dataclass(Series, data, lazy=True).counts == v.counts
+
+    @pytest.mark.skipif(sys.version_info < (3, 9), reason="typing.Annotated")
+    def test_numpy(self) -> None:
+        numpy = pytest.importorskip("numpy")
+        from typing import Annotated
+        from dictaclass import Packed, dataclass_to_dict
+
+        @dataclass
+        class Series:
+            values: Annotated[List[float], Packed("d", numpy=True)]
+
+        v = to_dataclass(Series, dict(values=[0.5, 1.5]))
+        assert isinstance(v.values, numpy.ndarray)
+        assert v.values.dtype == numpy.float64
+        assert dataclass_to_dict(v) == dict(values=[0.5, 1.5])
+
+
+@dataclass(frozen=True)
+class FrozenPoint:
+    x: int
+    tags: List[str] = field(default_factory=list)
+
+
+@dataclass
+class MutablePoint:
+    x: int
+    tags: List[str] = field(default_factory=list)
+
+
+class Test_Dictaclass_Slots:
+    def test_slotted(self) -> None:
+        from dataclasses import FrozenInstanceError, field, fields
+        from dictaclass import slotted
+
+        @dataclass(frozen=True)
+        class Base:
+            a: str
+            tags: List[str] = field(default_factory=list)
+
+            def shout(self) -> str:
+                return self.a.upper()
+
+        @dataclass(frozen=True)
+        class Example(Base):
+            b: int = 10
+
+        Slotted = slotted(Example)
+        assert slotted(Example) is Slotted
+        assert Slotted.__name__ == "Example"
+        assert [f.name for f in fields(Slotted)] == ["a", "tags", "b"]
+
+        v = Slotted("x")
+        assert not hasattr(v, "__dict__")
+        assert v.tags == [] and v.b == 10
+        assert v.shout() == "X"
+        assert v == Slotted("x", [], 10)
+        with pytest.raises(FrozenInstanceError):
+            v.a = "y"  # type: ignore
+
+    def test_decode(self) -> None:
+        from dictaclass import dataclass_to_dict, slotted
+
+        @dataclass
+        class Point:
+            x: int
+            y: int
+
+        @dataclass
+        class Shape:
+            name: str
+            points: List[Point]
+            center: Optional[Point] = None
+
+        data = dict(name="s", points=[dict(x=1, y=2)], center=dict(x=0, y=0))
+        v = to_dataclass(Shape, data, slots=True)
+        assert type(v) is slotted(Shape)
+        assert type(v.points[0]) is slotted(Point)
+        assert type(v.center) is slotted(Point)
+        assert not hasattr(v.points[0], "__dict__")
+        assert dataclass_to_dict(v) == data
+
+        v.name = "t"
+        assert v.name == "t"
+
+    @pytest.mark.parametrize("point_type", [FrozenPoint, MutablePoint])
+    def test_copy_and_pickle(self, point_type: Type[Any]) -> None:
+        import copy
+        import pickle
+
+        from dictaclass import slotted
+
+        v = to_dataclass(point_type, dict(x=1, tags=["a"]), slots=True)
+        assert type(v) is slotted(point_type)
+
+        shallow = copy.copy(v)
+        assert type(shallow) is type(v) and shallow == v
+        assert shallow.tags is v.tags
+
+        deep = copy.deepcopy(v)
+        assert type(deep) is type(v) and deep == v
+        assert deep.tags is not v.tags
+
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(v, protocol))
+            assert type(loaded) is type(v) and loaded == v
+
+    @pytest.mark.parametrize("iterative", [False, True])
+    def test_extra_fields_report_the_dataclass(self, iterative: bool) -> None:
+        @dataclass
+        class Point:
+            x: int
+
+        @dataclass
+        class Shape:
+            points: List[Point]
+
+        extras: List[Tuple[Type[Any], str, Any]] = []
+        v = to_dataclass(
+            Shape,
+            dict(points=[dict(x=1, z=2)], w=3),
+            on_extra_field=lambda *args: extras.append(args),
+            slots=True,
+            iterative=iterative,
+        )
+        assert v.points[0].x == 1
+        assert sorted(extras, key=repr) == [(Point, "z", 2), (Shape, "w", 3)]
+
+
+class Test_Dictaclass_Intern:
+    def test_intern_in_one_call(self) -> None:
+        @dataclass(frozen=True)
+        class Currency:
+            code: str
+            digits: int
+
+        @dataclass(frozen=True)
+        class Price:
+            amount: int
+            currency: Currency
+
+        @dataclass(frozen=True)
+        class Order:
+            prices: List[Price]
+            tags: List[str]
+            labels: Dict[str, str]
+
+        eur = dict(code="EUR", digits=2)
+        data = dict(
+            prices=[dict(amount=i % 2, currency=dict(eur)) for i in range(4)],
+            tags=["".join(["t", "ag"]) for _ in range(2)],
+            labels={"".join(["k", "ey"]): "".join(["va", "lue"])},
+        )
+
+        v = to_dataclass(Order, data, intern=True)
+        assert v.prices[0].currency is v.prices[1].currency
+        assert v.prices[0] is v.prices[2]
+        assert v.prices[0] is not v.prices[1]
+        assert v.tags[0] is v.tags[1]
+        assert next(iter(v.labels)) is sys.intern("key")
+        assert v.labels["key"] is sys.intern("value")
+
+        other = to_dataclass(Order, data, intern=True)
+        assert other == v
+        assert other.prices[0] is not v.prices[0]
+
+        v = to_dataclass(Order, data)
+        assert v.prices[0].currency is not v.prices[1].currency
+
+    def test_shared_pool(self) -> None:
+        from dictaclass import InternPool, compile_decoder, to_dataclasses
+
+        @dataclass(frozen=True)
+        class Unit:
+            name: str
+
+        @dataclass
+        class Mutable:
+            name: str
+
+        pool = InternPool(maxsize=2)
+        a = to_dataclass(Unit, dict(name="m"), intern=pool)
+        b = compile_decoder(Unit, intern=pool)(dict(name="m"))
+        assert a is b
+        assert len(pool) == 1
+
+        to_dataclasses(Unit, [dict(name="s"), dict(name="kg")], intern=pool)
+        assert len(pool) == 2
+        assert to_dataclass(Unit, dict(name="m"), intern=pool) is not a
+
+        decode = compile_decoder(Mutable, intern=True)
+        assert decode(dict(name="x")) is not decode(dict(name="x"))
+
+    def test_equal_values_of_other_types(self) -> None:
+        from dictaclass import InternPool
+
+        @dataclass(frozen=True)
+        class Price:
+            amount: Any
+            active: Any
+
+        @dataclass(frozen=True)
+        class Line:
+            price: Price
+
+        @dataclass(frozen=True)
+        class Doc:
+            prices: List[Price]
+            lines: List[Line]
+
+        prices = [
+            dict(amount=1, active=1),
+            dict(amount=1.0, active=True),
+            dict(amount=1, active=1),
+        ]
+        data = dict(prices=prices, lines=[dict(price=p) for p in prices])
+        for intern in (True, InternPool()):
+            v = to_dataclass(Doc, data, intern=intern)
+            assert [(type(p.amount), type(p.active)) for p in v.prices] == [
+                (int, int),
+                (float, bool),
+                (int, int),
+            ]
+            assert v.prices[0] is v.prices[2]
+            assert v.lines[0] is v.lines[2]
+            assert v.lines[1].price is v.prices[1]
+            assert type(v.lines[1].price.active) is bool
+
+    def test_unhashable_values_are_not_interned(self) -> None:
+        @dataclass(frozen=True)
+        class Example:
+            anything: Any
+
+        v = to_dataclass(Example, dict(anything=[1]), intern=True)
+        assert v.anything == [1]
+
+
+class Test_Dictaclass_Stats:
+    def test_collect_stats(self) -> None:
+        from dictaclass import collect_stats, compile_decoder, to_dataclasses
+
+        @dataclass
+        class Item:
+            sku: str
+            tags: Set[str]
+
+        @dataclass
+        class Order:
+            items: List[Item]
+            note: Optional[Item]
+            prices: Dict[str, float]
+
+        data = [
+            dict(
+                items=[dict(sku="a", tags=["x", "y"]), dict(sku="b", tags=[])],
+                note=None,
+                prices=dict(a=1.0),
+            )
+            for _ in range(3)
+        ]
+
+        with collect_stats() as stats:
+            orders = to_dataclasses(Order, data)
+            decode = compile_decoder(Order)
+        assert orders == to_dataclasses(Order, data)
+
+        result = stats.as_dict()
+        assert result[Order.__qualname__]["calls"] == 3
+        assert result[Order.__qualname__]["objects"] == 3
+        assert result[Order.__qualname__]["elements"] == dict(items=6, prices=3)
+        assert result[Item.__qualname__]["calls"] == 6
+        assert result[Item.__qualname__]["objects"] == 6
+        assert result[Item.__qualname__]["elements"] == dict(tags=6)
+        assert result[Order.__qualname__]["seconds"] >= 0
+        assert list(result)[0] == Order.__qualname__
+
+        report = stats.report()
+        assert Item.__qualname__ in report
+        assert ".tags" in report
+
+        # Not recorded outside of the block, except for compiled decoders.
+        to_dataclasses(Order, data)
+        assert stats.as_dict()[Order.__qualname__]["calls"] == 3
+        decode(data[0])
+        assert stats.as_dict()[Order.__qualname__]["calls"] == 4
+
+        stats.clear()
+        assert stats.as_dict() == {}
+
+    def test_nested_blocks(self) -> None:
+        from dictaclass import DecoderStats, collect_stats
+
+        @dataclass
+        class Example:
+            x: int
+
+        outer = DecoderStats()
+        with collect_stats(outer):
+            with collect_stats() as inner:
+                to_dataclass(Example, dict(x=1))
+            to_dataclass(Example, dict(x=1), slots=True, intern=True)
+
+        assert inner.as_dict()[Example.__qualname__]["calls"] == 1
+        assert outer.as_dict()[Example.__qualname__]["calls"] == 1
+
+    def test_threads_and_tasks_are_separate(self) -> None:
+        import asyncio
+        import threading
+        from dictaclass import DecoderStats, collect_stats, compile_decoder
+
+        @dataclass
+        class Example:
+            x: int
+
+        stats = DecoderStats()
+
+        async def inside() -> None:
+            with collect_stats(stats):
+                await asyncio.sleep(0.01)
+                to_dataclass(Example, dict(x=1))
+
+        async def outside() -> None:
+            for _ in range(5):
+                to_dataclass(Example, dict(x=1))
+                await asyncio.sleep(0)
+
+        async def run() -> None:
+            await asyncio.gather(inside(), outside())
+
+        asyncio.run(run())
+        assert stats.as_dict()[Example.__qualname__]["calls"] == 1
+
+        with collect_stats() as shared:
+            decode = compile_decoder(Example)
+        seen = threading.Event()
+
+        def other_thread() -> None:
+            to_dataclass(Example, dict(x=1))
+            for _ in range(1000):
+                decode(dict(x=1))
+            seen.set()
+
+        with collect_stats() as local:
+            threads = [threading.Thread(target=other_thread) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert seen.is_set()
+        assert Example.__qualname__ not in local.as_dict()
+        assert shared.as_dict()[Example.__qualname__]["calls"] == 4000
+
+
+class Test_Dictaclass_Union:
+    @pytest.mark.skipif(sys.version_info < (3, 8), reason="typing.Literal")
+    def test_literal_tags(self) -> None:
+        from typing import Literal
+
+        from dictaclass import (
+            UNSELECTED,
+            compile_decoder,
+            dataclass_to_dict,
+            to_dataclasses,
+        )
+
+        @dataclass
+        class Created:
+            kind: Literal["created"]
+            id: int
+
+        @dataclass
+        class Moved:
+            kind: Literal["moved", "renamed"]
+            id: int
+            to: str
+
+        @dataclass
+        class Log:
+            first: Union[Created, Moved]
+            events: List[Union[Created, Moved]]
+            by_id: Dict[str, Union[Created, Moved]]
+            last: Optional[Union[Created, Moved]] = None
+
+        created = dict(kind="created", id=1)
+        moved = dict(kind="moved", id=2, to="b")
+        renamed = dict(kind="renamed", id=3, to="c")
+        data = dict(
+            first=moved,
+            events=[created, moved, renamed],
+            by_id={"1": created},
+            last=None,
+        )
+
+        v = to_dataclass(Log, data)
+        assert v.first == Moved("moved", 2, "b")
+        assert v.events == [
+            Created("created", 1),
+            Moved("moved", 2, "b"),
+            Moved("renamed", 3, "c"),
+        ]
+        assert v.by_id == {"1": Created("created", 1)}
+        assert v.last is None
+        assert dataclass_to_dict(v) == data
+
+        Event = Union[Created, Moved]
+        assert to_dataclass(Event, created) == Created("created", 1)
+        assert to_dataclasses(Event, [moved, created]) == [
+            Moved("moved", 2, "b"),
+            Created("created", 1),
+        ]
+        assert compile_decoder(Event, slots=True)(moved).to == "b"
+        assert to_dataclass(Event, moved, only={"kind", "to"}).id is UNSELECTED
+        assert to_dataclass(Event, renamed, memoize_keys=False).to == "c"
+        assert to_dataclass(Event, renamed, lazy=True).to == "c"
+
+        with pytest.raises(ValueError, match="unknown tag 'deleted'"):
+            to_dataclass(Event, dict(kind="deleted", id=1))
+        with pytest.raises(ValueError, match="is missing"):
+            to_dataclass(Event, dict(id=1))
+        with pytest.raises(ValueError, match=r"unknown tag \[\]"):
+            to_dataclass(Event, dict(kind=[], id=1), lazy=True)
+
+    @pytest.mark.skipif(sys.version_info < (3, 8), reason="typing.Literal")
+    def test_invalid_literal_tags(self) -> None:
+        from typing import Literal
+
+        @dataclass
+        class A:
+            kind: Literal["a"]
+
+        @dataclass
+        class B:
+            kind: Literal["a", "b"]
+
+        @dataclass
+        class C:
+            other: Literal["c"]
+
+        with pytest.raises(TypeError, match="same tag 'a'"):
+            to_dataclass(Union[A, B], dict(kind="a"))
+        with pytest.raises(TypeError, match="can't find the tag field"):
+            to_dataclass(Union[A, C], dict(kind="a"))
+
+    def test_register_union(self) -> None:
+        from dictaclass import register_union
+
+        @dataclass
+        class Circle:
+            type: str
+            radius: float
+
+        @dataclass
+        class Square:
+            type: str
+            side: float
+
+        @dataclass
+        class Drawing:
+            shapes: List[Union[Circle, Square]]
+
+        Shape = Union[Circle, Square]
+        with pytest.raises(TypeError):
+            to_dataclass(Drawing, dict(shapes=[]))
+
+        register_union(Shape, "type", {"circle": Circle, "square": Square})
+        v = to_dataclass(
+            Drawing,
+            dict(
+                shapes=[
+                    dict(type="square", side=2.0),
+                    dict(type="circle", radius=1.0),
+                ]
+            ),
+        )
+        assert v.shapes == [Square("square", 2.0), Circle("circle", 1.0)]
+
+        with pytest.raises(TypeError):
+            register_union(Shape, "type", {"circle": Circle, "point": Node})
+        with pytest.raises(TypeError):
+            register_union(Union[Circle, int])
+
+    def test_unions_of_values_are_not_supported(self) -> None:
+        @dataclass
+        class Example:
+            value: Union[int, str]
+
+        with pytest.raises(AssertionError):
+            to_dataclass(Example, dict(value=1))
+
+
+class Test_Dictaclass_Only:
+    @dataclass
+    class Customer:
+        id: int
+        name: str
+        email: Optional[str] = None
+
+    @dataclass
+    class Item:
+        sku: str
+        price: float
+        tags: List[str] = field(default_factory=list)
+
+    @dataclass
+    class Order:
+        id: int
+        customer: "Test_Dictaclass_Only.Customer"
+        items: List["Test_Dictaclass_Only.Item"]
+        note: str = ""
+
+    data = dict(
+        id=1,
+        customer=dict(id=7, name="Ann", email="ann@example.com"),
+        items=[
+            dict(sku="a", price=1.0, tags=["x"]),
+            dict(sku="b", price=2.0),
+        ],
+        note="fragile",
+    )
+
+    def test_mask(self) -> None:
+        from dictaclass import UNSELECTED
+
+        Customer, Item, Order = self.Customer, self.Item, self.Order
+        extra: List[str] = []
+        v = to_dataclass(
+            Order,
+            self.data,
+            on_extra_field=lambda t, k, _: extra.append(k),
+            only={"customer": {"id"}, "items": {"sku"}},
+        )
+        assert v == Order(
+            UNSELECTED,  # type: ignore
+            Customer(7, UNSELECTED),  # type: ignore
+            [Item("a", UNSELECTED), Item("b", UNSELECTED)],  # type: ignore
+        )
+        assert extra == []
+        assert repr(UNSELECTED) == "UNSELECTED"
+
+        # NOTE(braynstorm): unselected fields may be missing from the data
+        v = to_dataclass(Order, dict(customer=dict(id=1)), only=dict(customer={"id"}))
+        assert v.customer.id == 1
+
+        v = to_dataclass(Order, self.data, only={"id", "customer"})
+        assert v.customer == Customer(7, "Ann", "ann@example.com")
+        assert v.items is UNSELECTED
+
+    def test_options(self) -> None:
+        from dictaclass import UNSELECTED, compile_decoder, to_dataclasses
+
+        only = {"customer": {"name"}, "note": True}
+        expected = to_dataclass(self.Order, self.data, only=only)
+        assert expected.note == "fragile"
+        assert expected.customer.name == "Ann"
+
+        assert compile_decoder(self.Order, only=only)(self.data) == expected
+        assert to_dataclasses(self.Order, [self.data], only=only) == [expected]
+        v = to_dataclass(self.Order, self.data, memoize_keys=False, only=only)
+        assert v == expected
+        v = to_dataclass(self.Order, self.data, slots=True, only=only)
+        assert v.note == "fragile"
+
+        v = to_dataclass(self.Order, self.data, trusted=True, only={"items": {"sku"}})
+        assert v.note == ""
+        assert v.items[0].tags == []
+        assert v.items[0].price is UNSELECTED
+
+        # NOTE(braynstorm): the projection does not change the full decoder
+        assert to_dataclass(self.Order, self.data).customer.email == "ann@example.com"
+
+    def test_encode(self) -> None:
+        from dictaclass import dataclass_to_dict
+
+        v = to_dataclass(self.Order, self.data, only={"note"})
+        assert dataclass_to_dict(v) == dict(note="fragile")
+
+        only = {"customer": {"id"}, "items": {"sku"}}
+        v = to_dataclass(self.Order, self.data, only=only)
+        encoded = dataclass_to_dict(v)
+        assert encoded == dict(
+            customer=dict(id=7, email=None),
+            items=[dict(sku="a", tags=[]), dict(sku="b", tags=[])],
+            note="",
+        )
+        assert to_dataclass(self.Order, encoded, only=only) == v
+
+    def test_extra_fields(self) -> None:
+        extra: List[str] = []
+        to_dataclass(
+            self.Customer,
+            dict(id=1, name="Ann", age=3),
+            on_extra_field=lambda t, k, _: extra.append(k),
+            only={"id"},
+        )
+        to_dataclass(
+            self.Customer,
+            dict(ID=1, NAME="Ann", AGE=3),
+            key_transformer=str.upper,
+            on_extra_field=lambda t, k, _: extra.append(k),
+            memoize_keys=False,
+            only={"id"},
+        )
+        assert extra == ["age", "AGE"]
+
+    def test_invalid_masks(self) -> None:
+        with pytest.raises(ValueError, match="can't select missing"):
+            to_dataclass(self.Order, self.data, only={"missing"})
+        with pytest.raises(ValueError, match="can't select fields of 'note'"):
+            to_dataclass(self.Order, self.data, only={"note": {"x"}})
+        with pytest.raises(TypeError):
+            to_dataclass(self.Order, self.data, only="id")
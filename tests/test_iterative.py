@@ -0,0 +1,163 @@
+from dictaclass import UNSELECTED, to_dataclass, to_dataclasses
+
+from dataclasses import dataclass, field
+
+from typing import Any, Dict, List, Optional, Set
+
+import array
+import sys
+
+import pytest
+
+
+@dataclass(frozen=True)
+class Point:
+    x: int
+    y: float
+
+
+@dataclass
+class Node:
+    value: int
+    next: Optional["Node"] = None
+
+
+@dataclass
+class Tree:
+    name: str
+    children: List["Tree"]
+    by_name: Dict[str, "Tree"] = field(default_factory=dict)
+
+
+@dataclass
+class Shape:
+    name: str
+    origin: Point
+    points: List[Optional[Point]]
+    corners: Set[Point]
+    by_name: Dict[str, Optional[Point]]
+    tags: List[str]
+    weights: array.array
+    note: Optional[str] = None
+    parent: Optional["Shape"] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+SHAPE = dict(
+    name="s",
+    origin=dict(x=0, y=0.5),
+    points=[dict(x=1, y=1.5), None, dict(x=2, y=-2e3)],
+    corners=[dict(x=0, y=0.0), dict(x=0, y=0.0), dict(x=1, y=0.0)],
+    by_name=dict(a=dict(x=3, y=3.0), b=None),
+    tags=["a", "b"],
+    weights=[1, 2.5],
+    parent=dict(
+        name="p",
+        origin=dict(x=9, y=9.0),
+        points=[],
+        corners=[],
+        by_name={},
+        tags=[],
+        weights=[],
+    ),
+    meta=dict(nested=[1, {"deep": None}]),
+)
+
+
+def _chain(depth: int) -> Dict[str, Any]:
+    data: Optional[Dict[str, Any]] = None
+    for value in range(depth):
+        data = dict(value=value, next=data)
+    assert data is not None
+    return data
+
+
+class Test_Iterative:
+    def test_same_as_generated(self) -> None:
+        assert to_dataclass(Shape, SHAPE, iterative=True) == to_dataclass(Shape, SHAPE)
+
+        tree = dict(
+            name="a",
+            children=[dict(name="b", children=[]), dict(name="c", children=[])],
+            by_name=dict(d=dict(name="d", children=[dict(name="e", children=[])])),
+        )
+        v = to_dataclass(Tree, tree, iterative=True)
+        assert v == to_dataclass(Tree, tree)
+        assert [c.name for c in v.children] == ["b", "c"]
+
+        items = [SHAPE, SHAPE["parent"]]
+        assert to_dataclasses(Shape, items, iterative=True) == to_dataclasses(
+            Shape, items
+        )
+        assert list(to_dataclasses(Shape, items, iterative=True, generator=True)) == (
+            to_dataclasses(Shape, items)
+        )
+        assert to_dataclass(List[Point], [1], iterative=True) == [1]
+
+    def test_deeper_than_the_recursion_limit(self) -> None:
+        depth = sys.getrecursionlimit() * 3
+        node = to_dataclass(Node, _chain(depth), iterative=True)
+        values = []
+        while node is not None:
+            values.append(node.value)
+            node = node.next
+        assert values == list(range(depth - 1, -1, -1))
+
+        with pytest.raises(RecursionError):
+            to_dataclass(Node, _chain(depth))
+
+    def test_options(self) -> None:
+        extra: List[str] = []
+        to_dataclass(
+            Tree,
+            dict(name="a", children=[dict(name="b", children=[], age=1)], x=2),
+            on_extra_field=lambda t, k, _: extra.append(k),
+            iterative=True,
+        )
+        assert extra == ["x", "age"]
+
+        v = to_dataclass(Shape, SHAPE, slots=True, iterative=True)
+        assert not hasattr(v, "__dict__")
+        assert not hasattr(v.parent, "__dict__")
+
+        v = to_dataclass(
+            Shape, SHAPE, only={"name": True, "parent": {"name"}}, iterative=True
+        )
+        assert v.parent.origin is UNSELECTED
+        assert v.origin is UNSELECTED
+        assert v.meta == {}
+
+    def test_errors(self) -> None:
+        with pytest.raises(AssertionError, match="'name' is not optional"):
+            to_dataclass(Tree, dict(name=None, children=[]), iterative=True)
+        with pytest.raises(TypeError):
+            to_dataclass(Tree, dict(name="a"), iterative=True)
+
+    @pytest.mark.parametrize(
+        "option",
+        [dict(memoize_keys=False), dict(trusted=True), dict(intern=True)],
+    )
+    def test_unsupported_options(self, option: Dict[str, Any]) -> None:
+        with pytest.raises(TypeError, match="iterative=True"):
+            to_dataclass(Tree, dict(name="a", children=[]), iterative=True, **option)
+        with pytest.raises(TypeError, match="iterative=True"):
+            to_dataclasses(Tree, [], iterative=True, generator=True, **option)
+
+    def test_stats(self) -> None:
+        from dictaclass import collect_stats
+
+        def counters(stats: Any) -> Dict[str, Any]:
+            return {
+                name: (measured["calls"], measured["objects"], measured["elements"])
+                for name, measured in stats.as_dict().items()
+            }
+
+        with collect_stats() as recursive:
+            to_dataclasses(Shape, [SHAPE, SHAPE])
+        with collect_stats() as iterative:
+            to_dataclasses(Shape, [SHAPE, SHAPE], iterative=True)
+        assert counters(iterative) == counters(recursive)
+
+        shape = iterative.as_dict()[Shape.__qualname__]
+        assert shape["calls"] == 4
+        assert shape["seconds"] >= iterative.as_dict()[Point.__qualname__]["seconds"]
@@ -0,0 +1,84 @@
+from dictaclass import parallel_to_dataclass, parallel_to_dataclasses
+
+from dataclasses import dataclass
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Set
+
+
+@dataclass(frozen=True)
+class Point:
+    x: int
+    y: int
+
+
+@dataclass(frozen=True)
+class Shape:
+    name: str
+    points: List[Point]
+    corners: Set[Point]
+    center: Optional[Point] = None
+
+
+class Test_Parallel:
+    def test_items(self) -> None:
+        items = [dict(x=i, y=-i) for i in range(100)]
+        with ProcessPoolExecutor(2) as pool:
+            v = parallel_to_dataclasses(Point, items, chunk_size=7, executor=pool)
+        assert v == [Point(i, -i) for i in range(100)]
+
+    def test_single_chunk_is_local(self) -> None:
+        extras = []
+        v = parallel_to_dataclasses(
+            Point,
+            iter([dict(x=1, y=2, z=3)]),
+            on_extra_field=lambda *args: extras.append(args),
+        )
+        assert v == [Point(1, 2)]
+        assert extras == [(Point, "z", 3)]
+
+    def test_extras_are_replayed_in_order(self) -> None:
+        extras = []
+        items = [dict(x=i, y=i, z=i) for i in range(20)]
+        v = parallel_to_dataclasses(
+            Point,
+            items,
+            on_extra_field=lambda *args: extras.append(args),
+            workers=2,
+            chunk_size=3,
+        )
+        assert v == [Point(i, i) for i in range(20)]
+        assert extras == [(Point, "z", i) for i in range(20)]
+
+    def test_nested(self) -> None:
+        data = dict(
+            name="shape",
+            points=[dict(x=i, y=i) for i in range(50)],
+            corners=[dict(x=i, y=0) for i in range(4)],
+            center=dict(x=0, y=0),
+        )
+        v = parallel_to_dataclass(Shape, data, workers=2, chunk_size=10)
+        assert v == Shape(
+            "shape",
+            [Point(i, i) for i in range(50)],
+            {Point(i, 0) for i in range(4)},
+            Point(0, 0),
+        )
+
+    def test_parse_json(self) -> None:
+        lines = [f'{{"x": {i}, "y": {-i}}}\n'.encode() for i in range(30)]
+        v = parallel_to_dataclasses(
+            Point, iter(lines), workers=2, chunk_size=4, parse_json=True
+        )
+        assert v == [Point(i, -i) for i in range(30)]
+        assert parallel_to_dataclasses(Point, lines[:2], parse_json=True) == [
+            Point(0, 0),
+            Point(1, -1),
+        ]
+
+    def test_gc_is_restored(self) -> None:
+        import gc
+
+        items = [dict(x=i, y=i) for i in range(30)]
+        assert parallel_to_dataclasses(Point, items, workers=2, chunk_size=4)
+        assert gc.isenabled()
@@ -0,0 +1,156 @@
+from dictaclass import from_json, to_dataclass
+
+from dataclasses import dataclass, field
+
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+import array
+import json
+
+import pytest
+
+
+@dataclass(frozen=True)
+class Point:
+    x: int
+    y: float
+
+
+@dataclass(frozen=True)
+class Tree:
+    name: str
+    children: List["Tree"]
+
+
+@dataclass
+class Shape:
+    name: str
+    origin: Point
+    points: List[Point]
+    corners: Set[Point]
+    by_name: Dict[str, Optional[Point]]
+    tags: List[str]
+    labels: Set[str]
+    weights: array.array
+    note: Optional[str] = None
+    parent: Optional["Shape"] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+SHAPE = dict(
+    name="sé",
+    origin=dict(x=0, y=0.5),
+    points=[dict(x=1, y=1.5), None, dict(x=2, y=-2e3)],
+    corners=[dict(x=0, y=0.0), dict(x=0, y=0.0)],
+    by_name=dict(a=dict(x=3, y=3.0), b=None),
+    tags=["a", "b"],
+    labels=["a", "a"],
+    weights=[1, 2.5],
+    parent=dict(
+        name="p",
+        origin=dict(x=9, y=9.0),
+        points=[],
+        corners=[],
+        by_name={},
+        tags=[],
+        labels=[],
+        weights=[],
+    ),
+    meta=dict(nested=[1, {"deep": None}]),
+)
+
+
+class Test_Parser:
+    @pytest.mark.parametrize("indent", [None, 2])
+    def test_same_as_to_dataclass(self, indent: Optional[int]) -> None:
+        source = json.dumps(SHAPE, indent=indent)
+        assert from_json(Shape, source) == to_dataclass(Shape, SHAPE)
+        assert from_json(Shape, source.encode()) == to_dataclass(Shape, SHAPE)
+        assert from_json(Shape, source.encode("utf-16")) == to_dataclass(Shape, SHAPE)
+
+    def test_recursive(self) -> None:
+        data = dict(name="a", children=[dict(name="b", children=[])])
+        assert from_json(Tree, json.dumps(data)) == Tree("a", [Tree("b", [])])
+
+    def test_root_types(self) -> None:
+        points = [dict(x=1, y=1.0), dict(x=2, y=2.0)]
+        source = json.dumps(points)
+        assert from_json(List[Point], source) == [Point(1, 1.0), Point(2, 2.0)]
+        assert from_json(Set[Point], source) == {Point(1, 1.0), Point(2, 2.0)}
+        assert from_json(Dict[str, Point], json.dumps(dict(a=points[0]))) == dict(
+            a=Point(1, 1.0)
+        )
+        assert from_json(Optional[Point], " null ") is None
+        assert from_json(List[int], "[1, 2]") == [1, 2]
+
+        with pytest.raises(AssertionError):
+            from_json(Point, "null")
+
+    def test_extra_fields(self) -> None:
+        extras: List[Tuple[Type[Any], str, Any]] = []
+        source = json.dumps(
+            dict(name="a", unknown=[1, 2], children=[dict(name="b", x=1, children=[])])
+        )
+        assert from_json(Tree, source) == Tree("a", [Tree("b", [])])
+        from_json(Tree, source, on_extra_field=lambda *args: extras.append(args))
+        assert extras == [(Tree, "unknown", [1, 2]), (Tree, "x", 1)]
+
+        extras.clear()
+        from_json(
+            List[Point],
+            '[{"x": 1, "y": 2, "z": 3}]',
+            on_extra_field=lambda *args: extras.append(args),
+        )
+        assert extras == [(Point, "z", 3)]
+
+    def test_key_transformer(self) -> None:
+        tree = from_json(
+            Tree,
+            '{"NAME": "a", "CHILDREN": [{"NAME": "b", "CHILDREN": []}]}',
+            key_transformer=str.upper,
+        )
+        assert tree == Tree("a", [Tree("b", [])])
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "",
+            "{",
+            '{"name": "a", "children": [}',
+            '{"name": "a" "children": []}',
+            '{"name": "a", "children": []} x',
+            '{"name" "a"}',
+            "{name: 1}",
+        ],
+    )
+    def test_invalid_json(self, source: str) -> None:
+        with pytest.raises(json.JSONDecodeError):
+            from_json(Tree, source)
+
+    def test_invalid_types(self) -> None:
+        with pytest.raises(AssertionError):
+            from_json(Tree, '{"name": "a", "children": null}')
+        with pytest.raises(AssertionError):
+            from_json(Tree, '{"name": "a", "children": 1}')
+        with pytest.raises(AssertionError):
+            from_json(Tree, "[]")
+
+    def test_stats_are_not_cached(self) -> None:
+        from dictaclass import collect_stats
+
+        @dataclass(frozen=True)
+        class Sample:
+            x: int
+
+        source = '[{"x": 1}, {"x": 2}]'
+        with collect_stats() as stats:
+            assert from_json(List[Sample], source) == [Sample(1), Sample(2)]
+        assert stats.as_dict()[Sample.__qualname__]["calls"] == 2
+
+        from_json(List[Sample], source)
+        assert stats.as_dict()[Sample.__qualname__]["calls"] == 2
+
+        with collect_stats() as other:
+            from_json(List[Sample], source)
+        assert other.as_dict()[Sample.__qualname__]["calls"] == 2
+        assert stats.as_dict()[Sample.__qualname__]["calls"] == 2
@@ -0,0 +1,107 @@
+from dictaclass import RecordStore, to_dataclass
+
+from dataclasses import dataclass
+
+from typing import Iterator, List, Optional
+
+import os
+import pickle
+
+import pytest
+
+
+@dataclass(frozen=True)
+class Tag:
+    name: str
+
+
+@dataclass
+class Product:
+    id: int
+    name: str
+    price: float
+    tags: List[Tag]
+    note: Optional[str] = None
+
+
+def _products(count: int) -> Iterator[Product]:
+    for i in range(count):
+        yield to_dataclass(
+            Product,
+            dict(
+                id=i,
+                name=f"product-{i}",
+                price=i / 4,
+                tags=[dict(name="t")] * (i % 3),
+                note=None if i % 2 else "even",
+            ),
+        )
+
+
+class Test_RecordStore:
+    def test_random_access(self, tmp_path) -> None:
+        path = str(tmp_path / "products.dcrs")
+        assert RecordStore.write(path, _products(100)) == 100
+
+        expected = list(_products(100))
+        with RecordStore.open(path, Product) as store:
+            assert len(store) == 100
+            assert store[0] == expected[0]
+            assert store[57] == expected[57]
+            assert store[-1] == expected[-1]
+            with pytest.raises(IndexError):
+                store[100]
+
+            assert list(store) == expected
+            assert list(store[10:20]) == expected[10:20]
+            assert list(store[::-7]) == expected[::-7]
+            assert store[10:20][-1] == expected[19]
+            assert len(store[90:200]) == 10
+            assert list(store[50:10]) == []
+
+            copy = pickle.loads(pickle.dumps(store[5:8]))
+            assert list(copy) == expected[5:8]
+            copy.close()
+
+    def test_empty_and_typed(self, tmp_path) -> None:
+        path = str(tmp_path / "empty.dcrs")
+        with pytest.raises(TypeError):
+            RecordStore.write(path, [])
+
+        assert RecordStore.write(path, [], Product) == 0
+        with RecordStore.open(path, Product) as store:
+            assert len(store) == 0
+            assert list(store) == []
+
+    def test_schema_mismatch(self, tmp_path) -> None:
+        path = str(tmp_path / "tags.dcrs")
+        RecordStore.write(path, [Tag("a")])
+        with pytest.raises(ValueError, match="not written for the schema"):
+            RecordStore.open(path, Product)
+
+        with open(path, "wb") as file:
+            file.write(b"something else entirely")
+        with pytest.raises(ValueError, match="not a dictaclass record store"):
+            RecordStore.open(path, Tag)
+
+    def test_truncated(self, tmp_path) -> None:
+        path = str(tmp_path / "products.dcrs")
+        RecordStore.write(path, _products(10))
+        with open(path, "rb") as file:
+            content = file.read()
+
+        for size in (len(content) - 1, 40, 30, 5):
+            with open(path, "wb") as file:
+                file.write(content[:size])
+            with pytest.raises(ValueError):
+                RecordStore.open(path, Product)
+
+    def test_failed_write(self, tmp_path) -> None:
+        def records() -> Iterator[Product]:
+            yield from _products(3)
+            raise RuntimeError("source failed")
+
+        path = str(tmp_path / "products.dcrs")
+        with pytest.raises(RuntimeError, match="source failed"):
+            RecordStore.write(path, records())
+        assert os.listdir(tmp_path) == []
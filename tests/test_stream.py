@@ -0,0 +1,122 @@
+from dictaclass import dataclass_to_dict, iter_json
+
+from dataclasses import dataclass
+
+from typing import Any, Callable, List, Optional
+
+import io
+import json
+
+import pytest
+
+
+@dataclass(frozen=True)
+class Point:
+    x: int
+    y: float
+
+
+@dataclass(frozen=True)
+class Shape:
+    name: str
+    points: List[Point]
+    color: Optional[str] = None
+
+
+SHAPES = [
+    Shape(f"shape {i}", [Point(j, j / 3) for j in range(i)], "red" if i % 2 else None)
+    for i in range(20)
+]
+
+RECORDS = [
+    dict(
+        name=shape.name,
+        points=[dict(x=p.x, y=p.y) for p in shape.points],
+        color=shape.color,
+    )
+    for shape in SHAPES
+]
+
+
+class _Source:
+    def __init__(self, read: Callable[[int], str]) -> None:
+        self.read = read
+
+
+class Test_Stream:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+    def test_ndjson(self, chunk_size: int) -> None:
+        source = "\n".join(json.dumps(r) for r in RECORDS) + "\n\n"
+        v = list(iter_json(Shape, io.StringIO(source), chunk_size=chunk_size))
+        assert v == SHAPES
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+    def test_array(self, chunk_size: int) -> None:
+        source = json.dumps(RECORDS, indent=2)
+        v = list(iter_json(Shape, io.StringIO(source), chunk_size=chunk_size))
+        assert v == SHAPES
+
+    def test_numbers_across_chunks(self) -> None:
+        source = " [ 12345 , 678,9 ] "
+        v = list(iter_json(int, io.StringIO(source), chunk_size=2))
+        assert v == [12345, 678, 9]
+
+    def test_empty(self) -> None:
+        assert list(iter_json(Point, io.StringIO("[ ]"))) == []
+        assert list(iter_json(Point, io.StringIO(""))) == []
+
+    def test_binary_file_and_path(self, tmp_path) -> None:
+        path = tmp_path / "shapes.ndjson"
+        path.write_text("\n".join(json.dumps(r) for r in RECORDS), encoding="utf-8")
+
+        assert list(iter_json(Shape, path)) == SHAPES
+        assert list(iter_json(Shape, str(path), format="ndjson")) == SHAPES
+        with open(path, "rb") as file:
+            assert list(iter_json(Shape, file, chunk_size=5)) == SHAPES
+
+    def test_extra_fields(self) -> None:
+        extras = []
+        v = iter_json(
+            Point,
+            io.StringIO('[{"x": 1, "y": 2, "z": 3}]'),
+            on_extra_field=lambda *args: extras.append(args),
+        )
+        assert list(v) == [Point(1, 2)]
+        assert extras == [(Point, "z", 3)]
+
+    def test_malformed(self) -> None:
+        with pytest.raises(ValueError):
+            list(iter_json(Point, io.StringIO('[{"x": 1, "y": 2} {"x": 1}]')))
+        with pytest.raises(ValueError):
+            list(iter_json(Point, io.StringIO('[{"x": 1, "y": 2}'), chunk_size=3))
+
+    def test_malformed_reads_little(self) -> None:
+        source = "[" + ",".join(json.dumps(r) for r in RECORDS * 50) + "]"
+        source = source.replace('"y"', '"y" 0', 2)
+        stream = io.StringIO(source)
+        with pytest.raises(ValueError):
+            list(iter_json(Shape, stream, chunk_size=64))
+        assert stream.tell() < len(source) / 10
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3])
+    def test_values_cut_by_chunks(self, chunk_size: int) -> None:
+        source = '[1.5, -2e3, true, null, "a\\u00e9b", {"x": 1, "y": -0.25}]'
+        v = list(iter_json(Any, io.StringIO(source), chunk_size=chunk_size))
+        assert v == [1.5, -2e3, True, None, "aéb", dict(x=1, y=-0.25)]
+
+    def test_large_record(self) -> None:
+        big = Shape("big", [Point(i, i / 2) for i in range(2000)])
+        source = json.dumps([RECORDS[3], dataclass_to_dict(big), RECORDS[4]])
+        stream = io.StringIO(source)
+        reads = []
+
+        def read(size: int) -> str:
+            reads.append(size)
+            return stream.read(size)
+
+        v = list(iter_json(Shape, _Source(read), chunk_size=16))
+        assert v == [SHAPES[3], big, SHAPES[4]]
+        # NOTE(braynstorm):
+        #   The read size grows with the record, instead of thousands of
+        #   16 characters reads (each one re-parsing the record).
+        assert len(reads) < 50
@@ -0,0 +1,107 @@
+from dictaclass import dataclass_to_dict, to_dataclass, warmup
+from dictaclass.dictaclass import (
+    _DecoderOptions,
+    _code_cache,
+    _get_plan,
+    _transformer_noop,
+    clear_cache,
+)
+
+from dataclasses import dataclass, field
+
+from typing import Dict, List, Optional
+
+import os
+
+import pytest
+
+
+@dataclass
+class Leaf:
+    name: str
+    weight: float = 1.0
+
+
+@dataclass
+class Branch:
+    leaves: List["Leaf"]
+    by_name: Dict[str, "Leaf"] = field(default_factory=dict)
+    parent: Optional["Branch"] = None
+
+
+DATA = dict(
+    leaves=[dict(name="a"), dict(name="b", weight=2.0)],
+    parent=dict(leaves=[]),
+)
+
+
+class Test_Warmup:
+    def setup_method(self) -> None:
+        clear_cache()
+
+    def teardown_method(self) -> None:
+        clear_cache()
+
+    def test_generates_ahead_of_time(self) -> None:
+        warmup(Branch)
+
+        plan = _get_plan(Branch, _transformer_noop, False)
+        assert plan is not None
+        assert ("decode", _DecoderOptions(extra_fields=False)) in plan.functions
+        assert "encode" in plan.functions
+        assert plan.fields[0].item is _get_plan(Leaf, _transformer_noop, False)
+
+        v = to_dataclass(Branch, DATA)
+        assert v.parent == Branch([])
+        assert to_dataclass(Branch, dataclass_to_dict(v)) == v
+
+        with pytest.raises(TypeError, match="expects dataclasses"):
+            warmup(int)
+
+    def test_cache_file(self, tmp_path) -> None:
+        cache_file = str(tmp_path / "schemas.dictaclass")
+        warmup(Branch, cache_file=cache_file)
+        expected = to_dataclass(Branch, DATA)
+        first = _get_plan(Branch, _transformer_noop, False)
+        assert os.path.exists(cache_file)
+
+        # NOTE(braynstorm): a new process - the plans come from the file
+        clear_cache()
+        warmup(Branch, cache_file=cache_file)
+        loaded = _get_plan(Branch, _transformer_noop, False)
+        assert loaded is not first
+        assert loaded.fields[0].item is _get_plan(Leaf, _transformer_noop, False)
+        assert _code_cache
+        assert to_dataclass(Branch, DATA) == expected
+
+        modified = os.path.getmtime(cache_file)
+        clear_cache()
+        warmup(Branch, cache_file=cache_file)
+        assert os.path.getmtime(cache_file) == modified
+
+    def test_stale_cache_file(self, tmp_path) -> None:
+        cache_file = str(tmp_path / "schemas.dictaclass")
+        warmup(Branch, cache_file=cache_file)
+
+        clear_cache()
+        annotations = Leaf.__annotations__
+        Leaf.__annotations__ = dict(annotations, weight=int)
+        try:
+            warmup(Branch, cache_file=cache_file)
+            plan = _get_plan(Leaf, _transformer_noop, False)
+            assert plan.fields[1].value_type is int
+        finally:
+            Leaf.__annotations__ = annotations
+            clear_cache()
+
+        with open(cache_file, "wb") as file:
+            file.write(b"broken")
+        warmup(Branch, cache_file=cache_file)
+        assert to_dataclass(Branch, DATA).leaves[1].weight == 2.0
+
+    def test_failed_write(self, tmp_path) -> None:
+        cache_file = tmp_path / "schemas.dictaclass"
+        cache_file.mkdir()
+        with pytest.raises(OSError):
+            warmup(Branch, cache_file=str(cache_file))
+        assert os.listdir(tmp_path) == ["schemas.dictaclass"]